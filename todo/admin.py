@@ -2,10 +2,11 @@
 
 from django.contrib import admin
 
-from .models import Employee, Snippet, Task
+from .models import Employee, OverdueDigest, Snippet, Task
 
 admin.site.register(Employee)  # Register Employee model
 admin.site.register(Task)      # Register Task model
 admin.site.register(Snippet)   # Register Snippet model
+admin.site.register(OverdueDigest)  # Register OverdueDigest model
 
 # Register your models here.
@@ -0,0 +1,233 @@
+"""
+Async (ASGI-native) read endpoints for employees, tasks and snippets.
+
+They mirror the GET list/retrieve responses of the DRF viewsets, reusing
+their querysets, filters and fast readers, but query through Django's async
+ORM so a request does not hold a worker thread while waiting on the
+database. Highlighting is rendered in the bounded pool from
+``highlighting.render_pool``. Only safe methods are served; writes go through
+the DRF viewsets.
+
+Requests are authenticated by the configured DRF authenticators (session,
+Basic and token) and throttled like the DRF views. The endpoints are a subset
+of the DRF ones: lists are page-number paginated only, so
+``?pagination=cursor``/``?cursor=`` and ``?count=false`` are rejected with
+400, and responses carry no ETag or Last-Modified.
+"""
+
+import math
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from . import compression, fastjson, fieldsets, highlighting, throttling
+from .models import Snippet
+from .pagination import KeysetPagination
+from .views import HIGHLIGHT_MODES, EmployeeViewSet, SnippetViewSet, TaskViewSet, style_link
+
+
+def json_response(data, status=200):
+    """Render ``data`` exactly as the DRF JSON renderer does."""
+    return HttpResponse(fastjson.json_renderer().render(data), status=status, content_type='application/json')
+
+
+def retry_response(detail, status, wait):
+    """Return an error response asking the client to retry after ``wait`` seconds."""
+    response = json_response({'detail': detail}, status=status)
+    response.headers['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def authenticate(request):
+    """Return the user of ``request`` according to ``DEFAULT_AUTHENTICATION_CLASSES``."""
+    return Request(request, authenticators=[cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES]).user
+
+
+async def admit(request):
+    """
+    Authenticate and throttle ``request`` as the DRF views do.
+
+    Returns ``(user, token bucket or None, None)``, or ``(None, None, error
+    response)`` for bad credentials or a throttled client.
+    """
+    try:
+        user = await sync_to_async(authenticate)(request)
+    except AuthenticationFailed as error:
+        header = api_settings.DEFAULT_AUTHENTICATION_CLASSES[0]().authenticate_header(request)
+        response = json_response({'detail': error.detail}, status=401 if header else 403)
+        if header:
+            response.headers['WWW-Authenticate'] = header
+        return None, None, response
+    bucket = throttling.bucket_for(user, throttling.TokenBucketThrottle().get_ident(request))
+    if bucket is not None:
+        allowed, wait = bucket.take()
+        if not allowed:
+            return None, None, retry_response('Request was throttled.', 429, wait)
+    return user, bucket, None
+
+
+def unsupported_pagination(request):
+    """Return an error naming a pagination mode these views do not offer, or None."""
+    if (
+        request.GET.get(KeysetPagination.mode_query_param) == 'cursor'
+        or CursorPagination.cursor_query_param in request.GET
+    ):
+        return {'pagination': ['Cursor pagination is not supported here; use the synchronous endpoint.']}
+    if request.GET.get(KeysetPagination.count_query_param, '').lower() in ('false', '0'):
+        return {'count': ['Count-free pages are not supported here; use the synchronous endpoint.']}
+    return None
+
+
+class AsyncReadView(View):
+    """Async list (``pk`` omitted) and retrieve view backed by a DRF viewset."""
+    viewset_class = None
+    http_method_names = ['get', 'head', 'options']
+
+    def filter_queryset(self, request):
+        """Return the viewset's queryset filtered by the query string, or the form errors."""
+        viewset = self.viewset_class()
+        queryset = viewset.queryset.all()
+        filterset_class = DjangoFilterBackend().get_filterset_class(viewset, queryset)
+        if filterset_class is None:
+            return queryset, None
+        filterset = filterset_class(request.GET, queryset=queryset, request=request)
+        if not filterset.is_valid():
+            return None, filterset.errors
+        return filterset.qs, None
+
+    async def get(self, request, pk=None):
+        """Return a page of objects, or one object when ``pk`` is given."""
+        _, _, response = await admit(request)
+        if response is not None:
+            return response
+        if pk is None:
+            errors = unsupported_pagination(request)
+            if errors:
+                return json_response(errors, status=400)
+        queryset, errors = await sync_to_async(self.filter_queryset)(request)
+        if errors:
+            return json_response(errors, status=400)
+        try:
+            if fieldsets.requested(request, self.viewset_class.serializer_class)[1]:
+                return json_response({'expand': ['Not supported here; use the synchronous endpoint.']}, status=400)
+            reader = self.viewset_class.reader_class(request)
+        except ValidationError as error:
+            return json_response(error.detail, status=400)
+        if pk is not None:
+            rows = await reader.arepresent(reader.values(queryset.filter(pk=pk))[:1])
+            if not rows:
+                return json_response({'detail': 'Not found.'}, status=404)
+            return json_response(rows[0])
+        return await self.paginated(request, reader, reader.values(queryset))
+
+    async def paginated(self, request, reader, rows):
+        """Return a page-number paginated response shaped like the DRF one."""
+        page_size = api_settings.PAGE_SIZE
+        try:
+            page = int(request.GET.get('page', 1))
+            if page < 1:
+                raise ValueError
+        except ValueError:
+            return json_response({'detail': 'Invalid page.'}, status=404)
+        count = await rows.acount()
+        offset = (page - 1) * page_size
+        if offset and offset >= count:
+            return json_response({'detail': 'Invalid page.'}, status=404)
+        url = request.build_absolute_uri()
+        previous_url = None
+        if page == 2:
+            previous_url = remove_query_param(url, 'page')
+        elif page > 2:
+            previous_url = replace_query_param(url, 'page', page - 1)
+        return json_response({
+            'count': count,
+            'next': replace_query_param(url, 'page', page + 1) if offset + page_size < count else None,
+            'previous': previous_url,
+            'results': await reader.arepresent(rows[offset:offset + page_size]),
+        })
+
+
+class AsyncEmployeeView(AsyncReadView):
+    """Async reads of employees."""
+    viewset_class = EmployeeViewSet
+
+
+class AsyncTaskView(AsyncReadView):
+    """Async reads of tasks."""
+    viewset_class = TaskViewSet
+
+
+class AsyncSnippetView(AsyncReadView):
+    """Async reads of snippets."""
+    viewset_class = SnippetViewSet
+
+
+class AsyncSnippetHighlightView(View):
+    """
+    Async highlighted HTML of a snippet, rendered off the event loop.
+
+    Like ``SnippetHighlightView``, snippets left to the render worker answer
+    503 with ``Retry-After`` until it stores them.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    async def get(self, request, pk):
+        """Return highlighted HTML for a snippet, or 404 if not found."""
+        user, bucket, response = await admit(request)
+        if response is not None:
+            return response
+        if not user.is_authenticated:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, status=403)
+        mode = request.GET.get('mode', 'full')
+        if mode not in HIGHLIGHT_MODES:
+            return json_response({'error': f"mode must be one of {', '.join(HIGHLIGHT_MODES)}."}, status=400)
+        column = 'highlighted_body' if mode == 'body' else 'highlighted_html'
+        row = await Snippet.objects.filter(pk=pk).values(
+            'code', 'language', 'style', 'linenos', 'rendered_key', column,
+        ).afirst()
+        if row is None:
+            return json_response({'error': 'Snippet not found.'}, status=404)
+        key = highlighting.render_key(row['code'], row['language'], row['style'], row['linenos'])
+        if row['rendered_key'] and row['rendered_key'] == key:
+            html = row[column]
+        elif not highlighting.renders_inline(row['code']):
+            # Left to the render worker; only a cached rendering is served.
+            html = await highlighting.arender_html(
+                row['code'], row['language'], row['style'], row['linenos'], full=mode == 'full', render_missing=False,
+            )
+            if html is None:
+                return retry_response(
+                    'The snippet is being highlighted; retry later.', 503, highlighting.pending_retry_after(),
+                )
+        else:
+            try:
+                with throttling.render_slot():
+                    html = await highlighting.arender_html(
+                        row['code'], row['language'], row['style'], row['linenos'], full=mode == 'full',
+                    )
+            except throttling.Overloaded as error:
+                return retry_response(error.detail, 503, error.wait)
+        if bucket is not None:
+            bucket.charge(throttling.code_cost(len(row['code'])))
+        if mode == 'body':
+            key = f'{key}:body'
+        encoding = compression.choose_encoding(request)
+        if encoding is not None and len(html) >= compression.min_bytes():
+            response = HttpResponse(
+                await highlighting.aencoded_html(key, html, encoding), content_type='text/html; charset=utf-8',
+            )
+            patch_vary_headers(response, ('Accept-Encoding',))
+            response.headers['Content-Encoding'] = encoding
+        else:
+            response = HttpResponse(html, content_type='text/html; charset=utf-8')
+        if mode == 'body':
+            response.headers['Link'] = style_link(row['style'])
+        return response
@@ -0,0 +1,126 @@
+"""
+Cached API authentication.
+
+``CachedBasicAuthentication`` and ``CachedTokenAuthentication`` replace DRF's
+classes in ``DEFAULT_AUTHENTICATION_CLASSES``. Verified credentials are kept
+in the ``TODO_AUTH_CACHE`` cache for ``TODO_AUTH_CACHE_SECONDS``, so a service
+account using Basic auth pays for one password hash per period instead of one
+per request. Basic credentials are cached under an HMAC of the username and
+password, never in the clear, together with the user's password hash.
+
+Revocation depends on the cache being shared by every worker process:
+
+- With a shared backend (Redis, Memcached, database or file cache), users are
+  cached too and dropped whenever they are saved or deleted or their groups or
+  permissions change, and deleted tokens are dropped (see ``todo/signals.py``),
+  so every process sees the change at once. A cached token costs no query.
+- A per-process cache (``LocMemCache``, the default) cannot be invalidated in
+  other processes, so it only saves the password hash: every hit re-reads the
+  user in one primary key query and is refused if the user was deactivated or
+  their password hash changed. Tokens are then checked as DRF does.
+
+``revoke_user()`` and ``revoke_token()`` drop entries explicitly.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.crypto import salted_hmac
+from rest_framework.authentication import BasicAuthentication, TokenAuthentication
+
+KEY_PREFIX = 'auth'
+
+
+def timeout():
+    """Seconds verified credentials and users stay cached; 0 disables the cache."""
+    return getattr(settings, 'TODO_AUTH_CACHE_SECONDS', 60)
+
+
+def get_cache():
+    """Return the cache holding verified credentials."""
+    return caches[getattr(settings, 'TODO_AUTH_CACHE', 'default')]
+
+
+def is_shared():
+    """Whether the auth cache is shared by all processes, so deletes reach all of them."""
+    return not isinstance(get_cache(), (LocMemCache, DummyCache))
+
+
+def user_key(pk):
+    return f'{KEY_PREFIX}:user:{pk}'
+
+
+def token_key(key):
+    return f'{KEY_PREFIX}:token:{salted_hmac(KEY_PREFIX, key).hexdigest()}'
+
+
+def basic_key(userid, password):
+    credentials = f'{userid}\0{password}'
+    return f'{KEY_PREFIX}:basic:{salted_hmac(KEY_PREFIX, credentials).hexdigest()}'
+
+
+def cache_user(user):
+    """Cache ``user`` for later requests, if the cache is shared."""
+    if is_shared():
+        get_cache().set(user_key(user.pk), user, timeout())
+
+
+def active_user(pk):
+    """Return the active user ``pk``, cached if the cache is shared, else from the database; or None."""
+    user = get_cache().get(user_key(pk)) if is_shared() else None
+    if user is None:
+        user = get_user_model()._default_manager.filter(pk=pk).first()
+        if user is None:
+            return None
+        cache_user(user)
+    return user if user.is_active else None
+
+
+def revoke_user(pk):
+    """Forget the cached user ``pk``, and with it every cached credential of theirs."""
+    get_cache().delete(user_key(pk))
+
+
+def revoke_token(key):
+    """Forget the cached token ``key``."""
+    get_cache().delete(token_key(key))
+
+
+class CachedBasicAuthentication(BasicAuthentication):
+    """``BasicAuthentication`` remembering verified credentials."""
+
+    def authenticate_credentials(self, userid, password, request=None):
+        if not timeout():
+            return super().authenticate_credentials(userid, password, request)
+        cache = get_cache()
+        key = basic_key(userid, password)
+        entry = cache.get(key)
+        if entry is not None:
+            pk, password_hash = entry
+            user = active_user(pk)
+            if user is not None and user.password == password_hash:
+                return (user, None)
+        user, auth = super().authenticate_credentials(userid, password, request)
+        cache.set(key, (user.pk, user.password), timeout())
+        cache_user(user)
+        return (user, auth)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """``TokenAuthentication`` remembering valid tokens in a shared cache."""
+
+    def authenticate_credentials(self, key):
+        if not timeout() or not is_shared():
+            return super().authenticate_credentials(key)
+        cache = get_cache()
+        token = cache.get(token_key(key))
+        if token is not None:
+            user = active_user(token.user_id)
+            if user is not None:
+                return (user, token)
+        user, token = super().authenticate_credentials(key)
+        cache.set(token_key(key), self.get_model()(key=token.key, user_id=token.user_id, created=token.created), timeout())
+        cache_user(user)
+        return (user, token)
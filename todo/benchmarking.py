@@ -0,0 +1,197 @@
+"""
+Helpers shared by the benchmark management commands.
+
+Benchmarks run against a throwaway test database so seeding millions of rows
+never touches the configured one.
+"""
+
+import random
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import TASK_STATUS_CHOICES, Employee, Snippet, Task
+
+DEPARTMENTS = ['HR', 'ENG', 'MKT']
+LANGUAGES = ['python', 'javascript', 'sql', 'bash', 'go']
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """
+    Set up the test environment and database, yield, then tear both down.
+
+    The test environment allows the ``testserver`` host used by the test
+    client. Rate limiting is switched off so runs measure the server.
+    """
+    old_name = connection.settings_dict['NAME']
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        with override_settings(TODO_THROTTLE_RATES={}):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def seed(employees=100, tasks=1000, snippets=0, batch_size=5000, seed_value=0):
+    """Bulk insert synthetic employees, tasks and snippets; return the counts."""
+    rng = random.Random(seed_value)
+    now = timezone.now()
+    statuses = [status for status, _ in TASK_STATUS_CHOICES]
+    Employee.objects.bulk_create(
+        (
+            Employee(
+                name=f'Employee {n}',
+                email=f'employee{n}@yourcompany.com',
+                department=rng.choice(DEPARTMENTS),
+                birth_date=(now - timedelta(days=rng.randint(20 * 365, 60 * 365))).date(),
+            )
+            for n in range(employees)
+        ),
+        batch_size=batch_size,
+    )
+    employee_ids = list(Employee.objects.values_list('id', flat=True))
+    for start in range(0, tasks, batch_size):
+        batch = []
+        for n in range(start, min(start + batch_size, tasks)):
+            status = rng.choice(statuses)
+            batch.append(Task(
+                employee_id=rng.choice(employee_ids) if employee_ids else None,
+                title=f'Task {n}',
+                description=f'Description of task {n}',
+                status=status,
+                completed=status == 'DONE',
+                priority=rng.randint(1, 5),
+                due_date=now + timedelta(hours=rng.randint(-24 * 60, 24 * 60)),
+            ))
+        Task.objects.bulk_create(batch)
+    if snippets:
+        task_ids = list(Task.objects.values_list('id', flat=True)[:snippets])
+        Snippet.objects.bulk_create(
+            (
+                Snippet(
+                    task_id=task_ids[n % len(task_ids)],
+                    code='\n'.join(f'value_{line} = compute({line}, {n})' for line in range(20)),
+                    language=rng.choice(LANGUAGES),
+                )
+                for n in range(snippets)
+            ),
+            batch_size=batch_size,
+        )
+    return {'employees': employees, 'tasks': tasks, 'snippets': snippets}
+
+
+def timed(func, repeat):
+    """Call ``func`` ``repeat`` times and return the durations in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def percentile(ordered, fraction):
+    """Return the nearest-rank ``fraction`` percentile of sorted ``ordered``."""
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(samples):
+    """Return p50/p90/p99/mean of ``samples`` (milliseconds), rounded."""
+    ordered = sorted(samples)
+    return {
+        'p50_ms': round(statistics.median(ordered), 3),
+        'p90_ms': round(percentile(ordered, 0.90), 3),
+        'p99_ms': round(percentile(ordered, 0.99), 3),
+        'mean_ms': round(statistics.fmean(ordered), 3),
+        'samples': len(ordered),
+    }
+
+
+def api_endpoints():
+    """
+    Return ``(name, path)`` for every router list/detail URL and the highlight view.
+
+    Detail URLs use the first row of each table, so call this after seeding.
+    """
+    from .urls import router
+
+    endpoints = []
+    for _, viewset, basename in router.registry:
+        endpoints.append((f'{basename}-list', reverse(f'{basename}-list')))
+        pk = viewset.queryset.model.objects.order_by('pk').values_list('pk', flat=True).first()
+        if pk is not None:
+            endpoints.append((f'{basename}-detail', reverse(f'{basename}-detail', args=[pk])))
+    snippet_pk = Snippet.objects.order_by('pk').values_list('pk', flat=True).first()
+    if snippet_pk is not None:
+        endpoints.append(('snippet-highlight', reverse('snippet-highlight', args=[snippet_pk])))
+    return endpoints
+
+
+def bench_endpoint(client, path, requests=100, warmup=10):
+    """
+    Drive ``path`` with GETs through ``client`` and return its statistics.
+
+    Reports throughput, latency percentiles, queries per request and the peak
+    Python memory allocated by one request (measured on a separate, traced
+    request so tracing does not skew the timings).
+    """
+    for _ in range(warmup):
+        client.get(path)
+    statuses, samples, queries = {}, [], []
+    started = time.perf_counter()
+    for _ in range(requests):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(path)
+            samples.append((time.perf_counter() - start) * 1000)
+        queries.append(len(captured))
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    try:
+        response = client.get(path)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'path': path,
+        'requests': requests,
+        'requests_per_second': round(requests / elapsed, 1),
+        'statuses': {str(code): count for code, count in statuses.items()},
+        'latency': summarize(samples),
+        'queries': {'min': min(queries), 'max': max(queries), 'mean': round(statistics.fmean(queries), 2)},
+        'response_bytes': len(response.content),
+        'peak_memory_kib': round(peak / 1024, 1),
+    }
+
+
+def bench_api(requests=100, warmup=10, only=None):
+    """
+    Run ``bench_endpoint`` over ``api_endpoints()`` (or those named in ``only``).
+
+    Requests are made by a logged-in regular user, since some read endpoints
+    require authentication; session lookups count towards the queries.
+    """
+    from django.contrib.auth.models import User
+
+    user, _ = User.objects.get_or_create(username='bench')
+    client = Client()
+    client.force_login(user)
+    return {
+        name: bench_endpoint(client, path, requests=requests, warmup=warmup)
+        for name, path in api_endpoints()
+        if not only or name in only
+    }
@@ -0,0 +1,183 @@
+"""
+Bulk create, update and delete for ModelViewSets.
+
+A list-shaped body on POST, PATCH or DELETE against the list URL is validated
+as a whole, written with ``bulk_create``/``bulk_update`` in one transaction,
+and rejected with per-item errors (aligned with the input) if any item is
+invalid. Hyperlinked relations are resolved with one query per related model
+for the whole batch.
+"""
+
+from urllib.parse import urlparse
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.urls import Resolver404, resolve
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+
+class PrefetchedHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+    """
+    HyperlinkedRelatedField that looks objects up in ``context['related_objects']``.
+
+    The context maps a model to ``{str(pk): instance}``. Without it the field
+    falls back to one query per value.
+    """
+
+    def get_object(self, view_name, view_args, view_kwargs):
+        """Return the related object from the prefetched batch when available."""
+        prefetched = self.context.get('related_objects', {}).get(self.get_queryset().model)
+        if prefetched is None:
+            return super().get_object(view_name, view_args, view_kwargs)
+        try:
+            return prefetched[str(view_kwargs[self.lookup_url_kwarg])]
+        except KeyError:
+            raise self.get_queryset().model.DoesNotExist
+
+
+class BulkModelMixin:
+    """ModelViewSet mixin adding list-shaped create, update and delete."""
+
+    bulk_max_items = 1000
+
+    def create(self, request, *args, **kwargs):
+        """Create one object, or a batch when the body is a list."""
+        if isinstance(request.data, list):
+            return self.bulk_create(request)
+        return super().create(request, *args, **kwargs)
+
+    def bulk_create(self, request):
+        """Validate and insert a list of objects in one transaction."""
+        items = request.data
+        error = self.check_batch(items)
+        if error:
+            return error
+        serializer = self.get_serializer(data=items, many=True, context=self.get_bulk_context(items))
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        model = self.get_queryset().model
+        instances = [model(**data) for data in serializer.validated_data]
+        with transaction.atomic():
+            self.perform_bulk_create(instances)
+        data = self.get_serializer(instances, many=True).data
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def bulk_update(self, request, *args, **kwargs):
+        """Partially update a list of objects, identified by ``id``, in one transaction."""
+        items = request.data
+        error = self.check_batch(items)
+        if error:
+            return error
+        model = self.get_queryset().model
+        ids = [self.to_pk(model, item.get('id')) if isinstance(item, dict) else None for item in items]
+        instances = self.get_queryset().in_bulk([pk for pk in ids if pk is not None])
+        context = self.get_bulk_context(items)
+        errors, validated = [], []
+        for pk, item in zip(ids, items):
+            instance = instances.get(pk)
+            if instance is None:
+                errors.append({'id': ['Object with this id does not exist.']})
+                validated.append(None)
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=True, context=context)
+            serializer.is_valid()
+            errors.append(serializer.errors)
+            validated.append((instance, serializer.validated_data))
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        fields = set()
+        for instance, data in validated:
+            for name, value in data.items():
+                setattr(instance, name, value)
+            fields.update(data)
+        with transaction.atomic():
+            self.perform_bulk_update([instance for instance, _ in validated], fields)
+        data = self.get_serializer([instance for instance, _ in validated], many=True).data
+        return Response(data)
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        """Delete a list of objects, given as ids or ``{"id": ...}`` items."""
+        items = request.data
+        error = self.check_batch(items)
+        if error:
+            return error
+        model = self.get_queryset().model
+        ids = [self.to_pk(model, item.get('id') if isinstance(item, dict) else item) for item in items]
+        existing = set(self.get_queryset().filter(pk__in=ids).values_list('pk', flat=True))
+        errors = [{} if pk in existing else {'id': ['Object with this id does not exist.']} for pk in ids]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            self.perform_bulk_destroy(self.get_queryset().filter(pk__in=ids))
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def perform_bulk_create(self, instances):
+        """Insert the validated instances."""
+        self.get_queryset().model._default_manager.bulk_create(instances)
+
+    def perform_bulk_update(self, instances, fields):
+        """Write ``fields`` of the updated instances, bumping auto_now fields."""
+        model = self.get_queryset().model
+        now = timezone.now()
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False):
+                for instance in instances:
+                    setattr(instance, field.attname, now)
+                fields.add(field.name)
+        if fields:
+            model._default_manager.bulk_update(instances, list(fields))
+
+    def perform_bulk_destroy(self, queryset):
+        """Delete the selected objects."""
+        queryset.delete()
+
+    def check_batch(self, items):
+        """Return an error response if ``items`` is not an acceptable batch."""
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Expected a non-empty list of items.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'detail': f'At most {self.bulk_max_items} items can be sent in one request.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return None
+
+    def get_bulk_context(self, items):
+        """
+        Serializer context with every hyperlinked relation in ``items`` prefetched.
+
+        Issues one query per related model.
+        """
+        context = self.get_serializer_context()
+        related = {}
+        for name, field in self.get_serializer_class()().fields.items():
+            if not isinstance(field, PrefetchedHyperlinkedRelatedField) or field.read_only:
+                continue
+            pks = set()
+            for item in items:
+                url = item.get(name) if isinstance(item, dict) else None
+                if not isinstance(url, str):
+                    continue
+                try:
+                    match = resolve(urlparse(url).path)
+                except Resolver404:
+                    continue
+                if match.view_name == field.view_name and field.lookup_url_kwarg in match.kwargs:
+                    pks.add(match.kwargs[field.lookup_url_kwarg])
+            queryset = field.get_queryset()
+            objects = queryset.in_bulk([pk for pk in (self.to_pk(queryset.model, value) for value in pks) if pk is not None])
+            related[queryset.model] = {str(pk): obj for pk, obj in objects.items()}
+        context['related_objects'] = related
+        return context
+
+    @staticmethod
+    def to_pk(model, value):
+        """Convert ``value`` to a primary key of ``model``, or None if malformed."""
+        if value is None or isinstance(value, (dict, list, bool)):
+            return None
+        try:
+            return model._meta.pk.to_python(value)
+        except ValidationError:
+            return None
@@ -0,0 +1,55 @@
+"""
+Precomputed catalog of Pygments languages and styles.
+
+Enumerating lexers and styles walks Pygments' whole plugin registry, which is
+slow enough to show up in every process start. The catalog is generated once
+into ``pygments_catalog.json`` by ``manage.py build_pygments_catalog`` and
+read on first use. If it was built for another Pygments version (or
+``TODO_PYGMENTS_CATALOG=live`` is set) the registry is enumerated instead.
+"""
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import pygments
+
+CATALOG_PATH = Path(__file__).resolve().with_name('pygments_catalog.json')
+
+
+def build_catalog():
+    """Enumerate the installed Pygments lexers and styles."""
+    from pygments.lexers import get_all_lexers
+    from pygments.styles import get_all_styles
+
+    lexers = [item for item in get_all_lexers() if item[1]]
+    return {
+        'pygments_version': pygments.__version__,
+        'languages': sorted([item[1][0], item[0]] for item in lexers),
+        'styles': sorted(get_all_styles()),
+    }
+
+
+@lru_cache(maxsize=None)
+def load_catalog():
+    """Return the catalog, from the precomputed file when it is current."""
+    if os.getenv('TODO_PYGMENTS_CATALOG') != 'live':
+        try:
+            with open(CATALOG_PATH, encoding='utf-8') as catalog_file:
+                catalog = json.load(catalog_file)
+        except (OSError, ValueError):
+            catalog = None
+        if catalog and catalog.get('pygments_version') == pygments.__version__:
+            return catalog
+    return build_catalog()
+
+
+def language_choices():
+    """``(alias, name)`` choices for ``Snippet.language``."""
+    return [tuple(item) for item in load_catalog()['languages']]
+
+
+def style_choices():
+    """``(style, style)`` choices for ``Snippet.style``."""
+    return [(style, style) for style in load_catalog()['styles']]
@@ -0,0 +1,190 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` compresses text responses (JSON, NDJSON, CSV, HTML,
+CSS, plain text) with Brotli when the ``brotli`` package is installed and the
+client accepts it, and with gzip otherwise. Responses shorter than
+``TODO_COMPRESS_MIN_BYTES`` are sent as they are; streaming responses are
+compressed chunk by chunk as they are produced. Binary downloads, range
+responses and responses that already carry a ``Content-Encoding`` (such as
+precompressed snippet HTML, see ``highlighting.encoded_html``) are left
+alone.
+
+Like Django's ``GZipMiddleware``, gzip output is padded with a random number
+of bytes to mitigate BREACH, and strong ETags are made weak.
+"""
+
+import gzip
+import secrets
+import struct
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json',
+    'application/x-ndjson',
+    'application/javascript',
+    'text/',
+)
+ENCODINGS = ('br', 'gzip')
+MAX_RANDOM_BYTES = 100
+PRECOMPRESS_LEVEL = 9
+
+
+def min_bytes():
+    """Smallest response body worth compressing."""
+    return getattr(settings, 'TODO_COMPRESS_MIN_BYTES', 512)
+
+
+def accepted_encodings(header):
+    """Return the content codings a client accepts (q > 0) from ``Accept-Encoding``."""
+    accepted = set()
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def choose_encoding(request):
+    """Return ``'br'``, ``'gzip'`` or None for ``request``."""
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING'))
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(data, encoding, level=None):
+    """Compress ``data`` (bytes) with ``encoding``; ``level`` for one-off precompression."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if level else 5)
+    if level:
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return compress_string(data, max_random_bytes=MAX_RANDOM_BYTES)
+
+
+def brotli_sequence(sequence):
+    """Brotli-compress an iterable of byte chunks, flushing after each."""
+    compressor = brotli.Compressor(quality=5)
+    for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def abrotli_sequence(sequence):
+    """Async counterpart of ``brotli_sequence``."""
+    compressor = brotli.Compressor(quality=5)
+    async for chunk in sequence:
+        data = compressor.process(chunk) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+async def agzip_sequence(sequence):
+    """
+    Async counterpart of Django's ``compress_sequence``: one gzip member for
+    the whole stream, sync-flushed after each chunk, with the same random
+    padding in the header's file name.
+    """
+    header = bytearray(gzip.compress(b'', compresslevel=6, mtime=0)[:10])
+    header[3] = gzip.FNAME
+    yield bytes(header) + b'a' * secrets.randbelow(MAX_RANDOM_BYTES) + b'\0'
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    crc = size = 0
+    async for chunk in sequence:
+        crc = zlib.crc32(chunk, crc)
+        size += len(chunk)
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush() + struct.pack('<II', crc, size & 0xFFFFFFFF)
+
+
+def is_compressible(response):
+    """Whether ``response`` is a text body that may be compressed."""
+    if response.has_header('Content-Encoding') or response.has_header('Content-Range'):
+        return False
+    if response.status_code == 206 or response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def mark_encoded(response, encoding):
+    """Set ``Content-Encoding`` and weaken a strong ETag (RFC 9110 8.8.1)."""
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response.headers['ETag'] = 'W/' + etag
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+
+class CompressionMiddleware:
+    """Compress text responses with Brotli or gzip above a size threshold."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        """Compress ``response`` if it is worth it and the client accepts it."""
+        if not is_compressible(response):
+            return response
+        if not response.streaming and len(response.content) < min_bytes():
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            if response.is_async:
+                content = response.streaming_content
+                response.streaming_content = (abrotli_sequence if encoding == 'br' else agzip_sequence)(content)
+            elif encoding == 'br':
+                response.streaming_content = brotli_sequence(response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content, max_random_bytes=MAX_RANDOM_BYTES,
+                )
+            del response.headers['Content-Length']
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        return mark_encoded(response, encoding)
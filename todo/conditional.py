@@ -0,0 +1,83 @@
+"""
+Conditional GET (ETag / Last-Modified) for list, detail and highlight views.
+
+Validators come from a cheap aggregate over the filtered queryset: the latest
+``last_modified_field`` value and the row count (so deletions change the
+ETag), combined with the request path and negotiated media type. A matching
+``If-None-Match`` is answered with 304 before any row is serialized.
+
+Lists carry only the ETag: a row being deleted or leaving the filter does not
+move the latest timestamp forward, so a ``Last-Modified`` date could answer
+``If-Modified-Since`` with 304 for a list that changed. Detail and highlight
+responses also send ``Last-Modified``.
+
+The validators only track the viewset's own model: renaming an employee does
+not change the ETag of the tasks embedding that name until a task changes.
+"""
+
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def make_validators(request, *parts):
+    """Return ``(etag, last_modified timestamp)`` for the given state parts."""
+    last_modified = parts[0]
+    media_type = getattr(getattr(request, 'accepted_renderer', None), 'media_type', '')
+    digest = hashlib.sha1(
+        '|'.join(str(part) for part in (request.get_full_path(), media_type, *parts)).encode('utf-8')
+    ).hexdigest()
+    return quote_etag(digest), (int(last_modified.timestamp()) if last_modified else None)
+
+
+def not_modified_response(request, etag, last_modified):
+    """Return a 304 response if the request's validators match, else None."""
+    return get_conditional_response(getattr(request, '_request', request), etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    """Set the ETag and Last-Modified headers on a successful response."""
+    if response.status_code == 200:
+        response.headers.setdefault('ETag', etag)
+        if last_modified is not None:
+            response.headers.setdefault('Last-Modified', http_date(last_modified))
+    return response
+
+
+class ConditionalGetMixin:
+    """ViewSet mixin answering unchanged list/retrieve requests with 304."""
+    last_modified_field = None
+
+    def list(self, request, *args, **kwargs):
+        """List, or 304 if the filtered rows did not change."""
+        state = self.filter_queryset(self.get_queryset()).order_by().aggregate(
+            last=Max(self.last_modified_field), count=Count('pk'),
+        )
+        etag, _ = make_validators(request, state['last'], state['count'])
+        response = not_modified_response(request, etag, None)
+        if response is not None:
+            return response
+        return set_validators(super().list(request, *args, **kwargs), etag, None)
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve, or 304 if the object did not change."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            last = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                .values_list(self.last_modified_field, flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            last = None
+        if last is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag, last_modified = make_validators(request, last)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        return set_validators(super().retrieve(request, *args, **kwargs), etag, last_modified)
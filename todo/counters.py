@@ -0,0 +1,106 @@
+"""
+Per-employee task counters.
+
+``Employee`` carries one counter per task status. They are adjusted with
+``F()`` updates in the same transaction as the task write: ``Task.save`` for
+single saves and deletes, ``TaskQuerySet.bulk_create``/``bulk_update`` for
+batches and ``TaskQuerySet.delete`` for queryset deletes, which uncounts the
+tasks with one UPDATE per (employee, status) change rather than per task. Tasks
+deleted along with their employee need no uncounting. Plain
+``QuerySet.update()`` calls and raw deletes bypass them; ``manage.py
+task_counters`` rebuilds or verifies the counters from the task table.
+"""
+
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from . import models
+
+UPDATE_CHUNK_SIZE = 500
+
+
+def state(task):
+    """Return the ``(employee_id, status)`` a task is counted under."""
+    return task.employee_id, task.status
+
+
+def apply(deltas):
+    """
+    Apply ``{(employee_id, status): delta}`` to the counters.
+
+    Employees with identical changes share one UPDATE, so a large batch spread
+    over many employees costs a handful of statements, not one per employee.
+    """
+    by_employee = defaultdict(dict)
+    for (employee_id, status), delta in deltas.items():
+        field = models.TASK_STATUS_COUNTER_FIELDS.get(status)
+        if employee_id is not None and field and delta:
+            by_employee[employee_id][field] = delta
+    by_changes = defaultdict(list)
+    for employee_id, changes in by_employee.items():
+        by_changes[tuple(sorted(changes.items()))].append(employee_id)
+    for changes, employee_ids in by_changes.items():
+        for start in range(0, len(employee_ids), UPDATE_CHUNK_SIZE):
+            models.Employee.objects.filter(pk__in=employee_ids[start:start + UPDATE_CHUNK_SIZE]).update(
+                **{field: F(field) + delta for field, delta in changes}
+            )
+
+
+def move(states):
+    """Apply ``(old_state, new_state)`` transitions; either side may be None."""
+    deltas = Counter()
+    for old, new in states:
+        if old == new:
+            continue
+        if old is not None:
+            deltas[old] -= 1
+        if new is not None:
+            deltas[new] += 1
+    apply(deltas)
+
+
+def counter_expressions(task_model):
+    """
+    Return ``{counter field: expression}`` counting each employee's tasks.
+
+    Takes the task model so data migrations can pass the historical one.
+    """
+    expressions = {}
+    for status, field in models.TASK_STATUS_COUNTER_FIELDS.items():
+        counted = (
+            task_model.objects.filter(employee=OuterRef('pk'), status=status)
+            .order_by()
+            .values('employee')
+            .annotate(count=Count('pk'))
+            .values('count')
+        )
+        expressions[field] = Coalesce(Subquery(counted, output_field=IntegerField()), Value(0))
+    return expressions
+
+
+def rebuild(employee_model, task_model, employee_ids=None):
+    """Recompute employees' counters (all, or ``employee_ids``) from the task table; return rows updated."""
+    employees = employee_model.objects.all()
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=employee_ids)
+    return employees.update(**counter_expressions(task_model))
+
+
+def drift():
+    """Return ``{employee_id: {field: (stored, actual)}}`` for counters that are wrong."""
+    fields = list(models.TASK_STATUS_COUNTER_FIELDS.values())
+    rows = models.Employee.objects.annotate(
+        **{f'actual_{field}': expression for field, expression in counter_expressions(models.Task).items()}
+    ).values('pk', *fields, *(f'actual_{field}' for field in fields))
+    wrong = {}
+    for row in rows.iterator():
+        mismatched = {
+            field: (row[field], row[f'actual_{field}'])
+            for field in fields
+            if row[field] != row[f'actual_{field}']
+        }
+        if mismatched:
+            wrong[row['pk']] = mismatched
+    return wrong
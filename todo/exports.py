@@ -0,0 +1,102 @@
+"""
+Streaming NDJSON and CSV exports.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` and encoded one
+line at a time, so memory use does not depend on the size of the table.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.renderers import BaseRenderer
+
+DEFAULT_CHUNK_SIZE = 2000
+
+TASK_EXPORT_FIELDS = [
+    'id', 'employee_id', 'title', 'description', 'completed', 'created_at', 'updated_at',
+    'due_date', 'priority', 'attachment', 'tags', 'status',
+]
+EMPLOYEE_EXPORT_FIELDS = [
+    'id', 'name', 'email', 'birth_date', 'profile_picture', 'bio', 'is_active', 'salary', 'department',
+]
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Declares the ``ndjson`` format; export responses are streamed directly."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+class CSVRenderer(BaseRenderer):
+    """Declares the ``csv`` format; export responses are streamed directly."""
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=DjangoJSONEncoder).encode('utf-8')
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(queryset, fields, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield ``fields`` of every row of ``queryset`` as tuples, in chunks."""
+    return queryset.select_related(None).prefetch_related(None).values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+def ndjson_lines(rows, fields):
+    """Encode rows as newline-delimited JSON objects."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def csv_lines(rows, fields):
+    """Encode rows as CSV, starting with a header line."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+ENCODERS = {'ndjson': ndjson_lines, 'csv': csv_lines}
+
+
+def export_lines(queryset, fields, export_format, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Return an iterator over the encoded lines of an export."""
+    return ENCODERS[export_format](iter_rows(queryset, fields, chunk_size), fields)
+
+
+class ExportMixin:
+    """
+    ViewSet mixin adding ``GET <list>/export/?format=ndjson|csv``.
+
+    The export honours the viewset's filters and is not paginated.
+    """
+    export_fields = None
+    export_chunk_size = DEFAULT_CHUNK_SIZE
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """Stream every row matching the filters as NDJSON (default) or CSV."""
+        export_format = request.accepted_renderer.format
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_lines(queryset, self.export_fields, export_format, self.export_chunk_size),
+            content_type=f'{request.accepted_renderer.media_type}; charset=utf-8',
+        )
+        filename = f'{queryset.model._meta.model_name}s.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
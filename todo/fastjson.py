@@ -0,0 +1,74 @@
+"""
+Fast JSON rendering and parsing with orjson.
+
+``FastJSONRenderer`` and ``FastJSONParser`` are drop-in replacements for
+DRF's ``JSONRenderer``/``JSONParser``, selected in
+``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']``/``['DEFAULT_PARSER_CLASSES']``.
+They produce and accept the same JSON: dates, decimals and other non-native
+values still go through DRF's encoder, and ``\\u2028``/``\\u2029`` are escaped.
+Without orjson installed, or for indented (browsable API) output, they fall
+back to the standard library.
+"""
+
+from io import BytesIO
+
+from rest_framework.utils import encoders
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` encoding compact UTF-8 output with orjson."""
+    default = encoders.JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None or data is None or self.ensure_ascii or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            rendered = orjson.dumps(
+                data, default=self.default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # e.g. integers beyond 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        for raw, escaped in LINE_SEPARATORS:
+            if raw in rendered:
+                rendered = rendered.replace(raw, escaped)
+        return rendered
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` decoding UTF-8 bodies with orjson."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read() if stream is not None else b''
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+        # Let the standard library accept what orjson does not (e.g. huge
+        # integers) or produce its usual error message.
+        return super().parse(BytesIO(body), media_type, parser_context)
+
+
+def json_renderer():
+    """Return an instance of the configured default JSON renderer."""
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if issubclass(renderer_class, JSONRenderer):
+            return renderer_class()
+    return JSONRenderer()
@@ -0,0 +1,126 @@
+"""
+Sparse fieldsets (``?fields=``) and expansion (``?expand=``) for API reads.
+
+``?fields=id,title`` limits a GET response to those top-level fields. The
+serializer drops the others, the fast readers select only the columns they
+need and the serializer path loads them with ``only()``, so unrequested
+fields such as ``highlighted`` or an employee's ``tasks`` cost nothing.
+
+``?expand=employee`` replaces a hyperlink with a nested summary of the
+related object, loaded in the same query (or one prefetch per page). The
+names a serializer accepts are the keys of its ``Meta.expandable_fields``,
+each mapped to a function building the nested serializer. Expanded fields
+are always included, even when ``?fields=`` does not list them.
+
+Without the parameters responses are unchanged.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+FIELDS_PARAM = 'fields'
+EXPAND_PARAM = 'expand'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def split(value):
+    """Split a comma-separated parameter into names."""
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+def requested(request, serializer_class):
+    """
+    Return ``(field names or None, expanded names)`` asked for by ``request``.
+
+    Only safe requests are considered. Unknown names raise a 400
+    ``ValidationError`` listing the valid ones.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None, ()
+    params = getattr(request, 'query_params', request.GET)
+    names, expand = split(params.get(FIELDS_PARAM)), split(params.get(EXPAND_PARAM))
+    if not names and not expand:
+        return None, ()
+    known = list(serializer_class.Meta.fields)
+    expandable = list(getattr(serializer_class.Meta, 'expandable_fields', {}))
+    errors = {}
+    unknown = [name for name in names if name not in known]
+    if unknown:
+        errors[FIELDS_PARAM] = [f"Unknown fields: {', '.join(unknown)}. Choose from: {', '.join(known)}."]
+    unknown = [name for name in expand if name not in expandable]
+    if unknown:
+        errors[EXPAND_PARAM] = [
+            f"Cannot expand: {', '.join(unknown)}. Choose from: {', '.join(expandable) or 'nothing'}."
+        ]
+    if errors:
+        raise serializers.ValidationError(errors)
+    if names:
+        names += [name for name in expand if name not in names]
+    return names or None, tuple(dict.fromkeys(expand))
+
+
+def columns(serializer_class, fields):
+    """
+    Return the model columns needed to render ``fields``, for ``only()``.
+
+    ``Meta.field_columns`` lists the columns of method and property fields.
+    Returns None if a field cannot be mapped to columns, so nothing is deferred.
+    """
+    meta = serializer_class.Meta
+    extra = getattr(meta, 'field_columns', {})
+    needed = []
+    for name, field in fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            # Expanded relation: the foreign key of a forward one; reverse ones are prefetched.
+            relation = _model_field(meta.model, field.source)
+            if relation is None:
+                return None
+            if relation.concrete:
+                needed.append(relation.name)
+            continue
+        if name in extra:
+            needed.extend(extra[name])
+            continue
+        if field.source == '*':
+            continue
+        model_field = _model_field(meta.model, field.source)
+        if model_field is None or not model_field.concrete:
+            return None
+        needed.append(model_field.name)
+    return list(dict.fromkeys(needed))
+
+
+def paging_columns(view):
+    """
+    Return the columns the view's paginator reads from every row.
+
+    Cursor pagination takes its position from the ordering columns of the
+    last row, so they are selected even when ``?fields=`` leaves them out.
+    """
+    ordering = getattr(getattr(view, 'paginator', None), 'cursor_ordering', None) or ()
+    return [column.lstrip('-') for column in ordering] + ['pk']
+
+
+def _model_field(model, source):
+    """Return the model field named by a single-hop ``source``, or None."""
+    if '.' in source:
+        return None
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+class SparseFieldsMixin:
+    """Serializer mixin applying ``?fields=`` and ``?expand=`` from the request in its context."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        names, expand = requested(self.context.get('request'), type(self))
+        if names is not None:
+            for name in set(self.fields) - set(names):
+                self.fields.pop(name)
+        for name in expand:
+            self.fields[name] = self.Meta.expandable_fields[name]()
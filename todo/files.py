@@ -0,0 +1,165 @@
+"""
+Streaming upload and download of attachments and profile pictures.
+
+Uploads are read from the raw request body in chunks, hashed on the way to a
+temporary file and capped at ``TODO_MAX_UPLOAD_BYTES``, so a large upload is
+never held in memory. Downloads stream from storage and honour single
+``Range`` requests (and ``If-Range``) with 206 responses. Stored names are
+content hashes (see ``todo.storage``), which makes them strong ETags.
+
+Uploaded files are untrusted: downloads are always sent as attachments,
+sandboxed, and with their type only when it is in ``INLINE_TYPES``, so an
+uploaded HTML or SVG file cannot run script on the API's origin.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.temp import NamedTemporaryFile
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .conditional import not_modified_response
+from .storage import content_hash
+
+CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Types downloads keep; any other file is sent as application/octet-stream.
+INLINE_TYPES = {'application/pdf', 'image/gif', 'image/jpeg', 'image/png', 'image/webp', 'text/plain'}
+
+
+def max_upload_bytes():
+    """Largest accepted upload, in bytes."""
+    return getattr(settings, 'TODO_MAX_UPLOAD_BYTES', 20 * 1024 * 1024)
+
+
+def upload_filename(request):
+    """Return the client's file name from ``?filename=`` or ``Content-Disposition``."""
+    name = request.query_params.get('filename')
+    if not name:
+        match = re.search(r'filename="?([^";]+)"?', request.headers.get('Content-Disposition', ''))
+        name = match.group(1) if match else ''
+    return os.path.basename(name.strip())
+
+
+def receive_upload(request):
+    """
+    Stream the raw request body into a temporary ``File``.
+
+    Returns ``(file, None)``, or ``(None, error response)`` when the body is
+    empty, unnamed or larger than ``max_upload_bytes()``. The file carries
+    its ``content_hash`` so storage does not read it again.
+    """
+    limit = max_upload_bytes()
+    too_large = Response({'error': f'Uploads are limited to {limit} bytes.'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+    name = upload_filename(request)
+    if not name:
+        return None, Response({'error': 'Name the file with ?filename= or Content-Disposition.'}, status=400)
+    try:
+        if int(request.headers.get('Content-Length') or 0) > limit:
+            return None, too_large
+    except ValueError:
+        return None, Response({'error': 'Invalid Content-Length.'}, status=400)
+    stream = request.stream
+    if stream is None:
+        return None, Response({'error': 'The request body is empty.'}, status=400)
+    digest = hashlib.sha256()
+    size = 0
+    temporary = NamedTemporaryFile(suffix='.upload')
+    while chunk := stream.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > limit:
+            temporary.close()
+            return None, too_large
+        digest.update(chunk)
+        temporary.write(chunk)
+    if not size:
+        temporary.close()
+        return None, Response({'error': 'The request body is empty.'}, status=400)
+    temporary.seek(0)
+    upload = File(temporary, name=name)
+    upload.content_hash = digest.hexdigest()
+    return upload, None
+
+
+def parse_range(header, size):
+    """Return ``(start, end)`` (inclusive) for a single byte range, None to ignore it, or ``'invalid'``."""
+    match = RANGE_RE.match(header.strip())
+    if not match or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            return 'invalid'
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return 'invalid'
+    return start, end
+
+
+def iter_file(storage, name, start, length):
+    """Yield ``length`` bytes of stored file ``name`` from ``start`` in chunks."""
+    with storage.open(name, 'rb') as handle:
+        handle.seek(start)
+        while length > 0:
+            chunk = handle.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def content_type(name):
+    """Return the type to serve stored file ``name`` as."""
+    guessed = mimetypes.guess_type(name)[0]
+    return guessed if guessed in INLINE_TYPES else 'application/octet-stream'
+
+
+def file_response(request, storage, name, cache_control='private, no-cache', filename=None):
+    """
+    Stream stored file ``name``, honouring conditional and single-range requests.
+
+    ``filename`` is offered to the client (default: the stored name).
+    Responds 200, 206, 304 or 416.
+    """
+    digest = content_hash(name)
+    etag = quote_etag(digest) if digest else None
+    if etag:
+        response = not_modified_response(request, etag, None)
+        if response is not None:
+            return response
+    size = storage.size(name)
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    if 'Range' in request.headers and (if_range is None or (etag and if_range == etag)):
+        byte_range = parse_range(request.headers['Range'], size)
+    if byte_range == 'invalid':
+        response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        response.headers['Content-Range'] = f'bytes */{size}'
+        return response
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        iter_file(storage, name, start, end - start + 1),
+        status=status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK,
+        content_type=content_type(name),
+    )
+    response.headers['Content-Length'] = str(end - start + 1)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Content-Disposition'] = content_disposition_header(True, filename or os.path.basename(name))
+    response.headers['Content-Security-Policy'] = 'sandbox'
+    response.headers['X-Content-Type-Options'] = 'nosniff'
+    response.headers['Cache-Control'] = cache_control
+    if byte_range:
+        response.headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+    if etag:
+        response.headers['ETag'] = etag
+    return response
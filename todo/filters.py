@@ -0,0 +1,42 @@
+"""FilterSets for the todo API."""
+
+import django_filters
+
+from . import overdue, tagging
+from .models import Task
+from .overdue import MAX_DUE_WITHIN_DAYS
+
+
+class TaskFilter(django_filters.FilterSet):
+    """
+    Task filters.
+
+    ``?tags=a,b`` keeps tasks tagged with every listed tag, ``?tags_any=a,b``
+    tasks tagged with at least one; both match normalized tags exactly.
+    ``?overdue=true`` keeps open tasks past their due date (``false`` the
+    others) and ``?due_within=2`` open tasks due in the next two days.
+    """
+    tags = django_filters.CharFilter(method='filter_tags', label="Tagged with all of these comma-separated tags")
+    tags_any = django_filters.CharFilter(method='filter_tags', label="Tagged with any of these comma-separated tags")
+    overdue = django_filters.BooleanFilter(method='filter_overdue', label="Open and past the due date")
+    due_within = django_filters.NumberFilter(
+        method='filter_due_within', min_value=0, max_value=MAX_DUE_WITHIN_DAYS,
+        label="Open and due within this many days",
+    )
+
+    class Meta:
+        model = Task
+        fields = ['status', 'employee', 'due_date', 'title']
+
+    def filter_tags(self, queryset, name, value):
+        """Filter by tag through the ``TaskTag`` index."""
+        return tagging.filter_tasks(queryset, [value], match_all=name == 'tags')
+
+    def filter_overdue(self, queryset, name, value):
+        """Keep overdue tasks, or with ``false`` every other task."""
+        matching = overdue.overdue(queryset)
+        return matching if value else queryset.exclude(pk__in=matching.values('pk'))
+
+    def filter_due_within(self, queryset, name, value):
+        """Keep open tasks due between now and ``value`` days from now."""
+        return overdue.due_within(queryset, value)
@@ -0,0 +1,240 @@
+"""
+Pygments rendering helpers for snippets.
+
+Rendered HTML is stored in a dedicated Django cache keyed on a hash of
+everything that affects the output, so identical snippets share one entry.
+Lexers and formatters are built once per language and per
+``(style, linenos, full)`` and reused; Pygments keeps no per-call state on
+either. Body-only HTML leaves out the stylesheet, which is served once per
+style by ``style_css``.
+"""
+
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+import pygments
+from django.conf import settings
+from django.core.cache import caches
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from . import compression, metrics
+
+CACHE_KEY_PREFIX = 'snippet-html'
+
+
+class RenderCacheStats:
+    """Thread-safe hit/miss counters for the highlight render cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        """Count one cache lookup."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self):
+        """Reset both counters to zero."""
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        """Return a snapshot of the counters."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+stats = RenderCacheStats()
+
+
+def get_render_cache():
+    """Return the cache backend used for rendered snippet HTML."""
+    return caches[getattr(settings, 'SNIPPET_HIGHLIGHT_CACHE', 'default')]
+
+
+def render_key(code, language, style, linenos):
+    """Return the content-addressed cache key for a rendering."""
+    digest = hashlib.sha256()
+    for part in (pygments.__version__, language, style, str(bool(linenos)), code):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return f'{CACHE_KEY_PREFIX}:{digest.hexdigest()}'
+
+
+class PooledHtmlFormatter(HtmlFormatter):
+    """``HtmlFormatter`` that generates each stylesheet once per instance."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._style_defs = {}
+
+    def get_style_defs(self, arg=None):
+        key = arg if arg is None or isinstance(arg, str) else tuple(arg)
+        if key not in self._style_defs:
+            self._style_defs[key] = super().get_style_defs(arg)
+        return self._style_defs[key]
+
+
+@lru_cache(maxsize=None)
+def get_lexer(language):
+    """Return the shared lexer for ``language``."""
+    return get_lexer_by_name(language)
+
+
+@lru_cache(maxsize=None)
+def get_formatter(style, linenos, full=False):
+    """Return the shared HTML formatter for ``style``/``linenos``."""
+    return PooledHtmlFormatter(style=style, full=full, linenos=bool(linenos))
+
+
+@lru_cache(maxsize=None)
+def style_css(style):
+    """Return the stylesheet for body-only HTML rendered with ``style``."""
+    return get_formatter(style, False).get_style_defs('.highlight')
+
+
+def render_html(code, language, style, linenos):
+    """Render ``code`` to a full HTML document with Pygments (uncached)."""
+    with metrics.phase('pygments'):
+        return highlight(code, get_lexer(language), get_formatter(style, linenos, full=True))
+
+
+def render_body_html(code, language, style, linenos):
+    """Render ``code`` to an HTML fragment without the inline stylesheet."""
+    with metrics.phase('pygments'):
+        return highlight(code, get_lexer(language), get_formatter(style, linenos))
+
+
+def render_stored_columns(row):
+    """
+    Render one ``(pk, code, language, style, linenos)`` row for storage.
+
+    Returns ``(pk, key, full_html, body_html)``. Module-level so it can be
+    shipped to a process pool.
+    """
+    pk, code, language, style, linenos = row
+    return (
+        pk,
+        render_key(code, language, style, linenos),
+        render_html(code, language, style, linenos),
+        render_body_html(code, language, style, linenos),
+    )
+
+
+def renders_inline(code):
+    """
+    Whether ``code`` is short enough to render on the request path.
+
+    Longer snippets are rendered by ``manage.py render_snippets --worker``.
+    """
+    return len(code) <= getattr(settings, 'SNIPPET_INLINE_RENDER_MAX_CHARS', 20000)
+
+
+def pending_retry_after():
+    """Seconds clients should wait before asking again for a rendering still pending."""
+    return getattr(settings, 'SNIPPET_PENDING_RETRY_AFTER', 5)
+
+
+def cached_render_html(code, language, style, linenos, full=True, render_missing=True):
+    """
+    Render ``code`` through the render cache; ``full=False`` for body-only HTML.
+
+    With ``render_missing=False`` a cache miss returns None instead of rendering.
+    """
+    cache = get_render_cache()
+    key = render_key(code, language, style, linenos)
+    if not full:
+        key = f'{key}:body'
+    html = cache.get(key)
+    stats.record(html is not None)
+    if html is None and render_missing:
+        html = (render_html if full else render_body_html)(code, language, style, linenos)
+        cache.set(key, html)
+    return html
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """
+    Return the shared, bounded executor used for off-loop rendering.
+
+    Sized by ``SNIPPET_RENDER_POOL_SIZE``; ``SNIPPET_RENDER_POOL_KIND`` selects
+    ``'thread'`` (default) or ``'process'`` workers.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = getattr(settings, 'SNIPPET_RENDER_POOL_SIZE', 4)
+            if getattr(settings, 'SNIPPET_RENDER_POOL_KIND', 'thread') == 'process':
+                _pool = ProcessPoolExecutor(max_workers=size)
+            else:
+                _pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix='snippet-render')
+        return _pool
+
+
+async def arender_html(code, language, style, linenos, full=True, render_missing=True):
+    """
+    Render ``code`` through the render cache, rendering misses in the pool.
+
+    With ``render_missing=False`` a cache miss returns None instead of rendering.
+    """
+    cache = get_render_cache()
+    key = render_key(code, language, style, linenos)
+    if not full:
+        key = f'{key}:body'
+    html = await cache.aget(key)
+    stats.record(html is not None)
+    if html is None and render_missing:
+        loop = asyncio.get_running_loop()
+        render = render_html if full else render_body_html
+        html = await loop.run_in_executor(render_pool(), render, code, language, style, linenos)
+        await cache.aset(key, html)
+    return html
+
+
+def encoded_html(key, html, encoding):
+    """
+    Return ``html`` compressed with ``encoding``, cached next to its rendering.
+
+    ``key`` is the rendering's cache key (with ``:body`` for body-only HTML).
+    Renderings never change under a key, so each is compressed once, at the
+    highest level.
+    """
+    cache = get_render_cache()
+    encoded_key = f'{key}:{encoding}'
+    data = cache.get(encoded_key)
+    if data is None:
+        data = compression.compress(html.encode('utf-8'), encoding, level=compression.PRECOMPRESS_LEVEL)
+        cache.set(encoded_key, data)
+    return data
+
+
+async def aencoded_html(key, html, encoding):
+    """Async counterpart of ``encoded_html``."""
+    cache = get_render_cache()
+    encoded_key = f'{key}:{encoding}'
+    data = await cache.aget(encoded_key)
+    if data is None:
+        data = compression.compress(html.encode('utf-8'), encoding, level=compression.PRECOMPRESS_LEVEL)
+        await cache.aset(encoded_key, data)
+    return data
+
+
+def evict(key):
+    """Drop a rendering (full and body-only, plain and compressed) from the cache."""
+    keys = [key, f'{key}:body']
+    get_render_cache().delete_many(keys + [f'{k}:{encoding}' for k in keys for encoding in compression.ENCODINGS])
@@ -0,0 +1,265 @@
+"""
+Streaming bulk import of employees, tasks and snippets from CSV or NDJSON.
+
+Records are read one line at a time, converted with the model fields'
+``to_python`` and validators, and inserted with ``bulk_create`` in batches,
+each batch in its own transaction, so memory use does not depend on the size
+of the file. Employee emails (and the ``id`` column of imported tasks, for
+snippets that refer to them) are resolved through in-memory maps instead of
+one query per row.
+
+Tasks go through ``TaskQuerySet.bulk_create``, which keeps employee counters
+and tag links in step. Snippets are inserted without rendering; the
+``render_snippets --worker`` process picks them up as pending.
+"""
+
+import csv
+import datetime
+import json
+import os
+from contextlib import contextmanager
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.utils import timezone
+
+from . import models, search
+
+DEFAULT_BATCH_SIZE = 2000
+MAX_REPORTED_ERRORS = 20
+FORMATS = {'.csv': 'csv', '.ndjson': 'ndjson', '.jsonl': 'ndjson', '.json': 'ndjson'}
+
+EMPLOYEE_IMPORT_FIELDS = ['name', 'email', 'birth_date', 'bio', 'is_active', 'salary', 'department']
+TASK_IMPORT_FIELDS = ['title', 'description', 'completed', 'due_date', 'priority', 'tags', 'status']
+SNIPPET_IMPORT_FIELDS = ['code', 'language', 'style', 'linenos']
+BOOLEAN_STRINGS = {'true': True, 'yes': True, 'false': False, 'no': False}
+
+
+class RecordError(ValueError):
+    """A record that cannot be imported."""
+
+
+def detect_format(path):
+    """Return ``'csv'`` or ``'ndjson'`` from the extension of ``path``, or None."""
+    return FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def read_records(handle, import_format):
+    """Yield ``(record number, dict)`` for each CSV row or NDJSON line of ``handle``."""
+    if import_format == 'csv':
+        yield from enumerate(csv.DictReader(handle), start=1)
+        return
+    for number, line in enumerate(handle, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as error:
+            record = RecordError(f"Invalid JSON: {error}")
+        yield number, record
+
+
+def text(record, key):
+    """Return ``record[key]`` as a stripped string ('' when missing)."""
+    value = record.get(key)
+    return '' if value is None else str(value).strip()
+
+
+def batches(records, size):
+    """Split an iterator into lists of at most ``size`` items."""
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+class Converter:
+    """Turn raw record values into model field values, validating them."""
+
+    def __init__(self, model, field_names):
+        self.fields = [model._meta.get_field(name) for name in field_names]
+        self.choices = {
+            field.name: {str(key) for key, _ in field.flatchoices}
+            for field in self.fields if field.choices
+        }
+
+    def convert(self, record):
+        """Return the field values present in ``record``; raise ``RecordError`` if any is invalid."""
+        if isinstance(record, RecordError):
+            raise record
+        values = {}
+        for field in self.fields:
+            raw = record.get(field.name)
+            if isinstance(raw, str):
+                raw = raw.strip()
+                if isinstance(field, BooleanField):
+                    raw = BOOLEAN_STRINGS.get(raw.lower(), raw)
+            if raw in ('', None):
+                if field.null:
+                    values[field.name] = None
+                elif field.blank and not field.has_default():
+                    values[field.name] = ''
+                elif not field.has_default():
+                    raise RecordError(f"{field.name}: This field is required.")
+                continue
+            try:
+                value = field.to_python(raw)
+                field.run_validators(value)
+            except ValidationError as error:
+                raise RecordError(f"{field.name}: {' '.join(error.messages)}")
+            if field.name in self.choices and str(value) not in self.choices[field.name]:
+                raise RecordError(f"{field.name}: {value!r} is not a valid choice.")
+            if isinstance(value, datetime.datetime) and settings.USE_TZ and timezone.is_naive(value):
+                value = timezone.make_aware(value)
+            values[field.name] = value
+        return values
+
+
+class ImportState:
+    """Maps shared by the steps of one import, and their counts."""
+
+    def __init__(self):
+        self.emails = dict(models.Employee.objects.values_list('email', 'id').iterator())
+        self.task_ids = {}
+        self.results = {}
+
+    def result(self, kind):
+        """Return the ``{'imported', 'skipped', 'errors'}`` counts of ``kind``."""
+        return self.results.setdefault(kind, {'imported': 0, 'skipped': 0, 'errors': 0, 'messages': []})
+
+    def error(self, kind, number, message):
+        """Count a rejected record, keeping the first few messages."""
+        result = self.result(kind)
+        result['errors'] += 1
+        if len(result['messages']) < MAX_REPORTED_ERRORS:
+            result['messages'].append(f"{kind} record {number}: {message}")
+
+
+def import_employees(records, state, batch_size=DEFAULT_BATCH_SIZE):
+    """Insert employees; emails already present (in the table or the file) are skipped."""
+    converter = Converter(models.Employee, EMPLOYEE_IMPORT_FIELDS)
+    result = state.result('employees')
+    for batch in batches(records, batch_size):
+        employees = []
+        for number, record in batch:
+            try:
+                values = converter.convert(record)
+            except RecordError as error:
+                state.error('employees', number, error)
+                continue
+            if values['email'] in state.emails:
+                result['skipped'] += 1
+                continue
+            state.emails[values['email']] = None
+            employees.append(models.Employee(**values))
+        with transaction.atomic():
+            models.Employee.objects.bulk_create(employees)
+        if employees and employees[0].pk is None:
+            # The backend does not return primary keys from bulk inserts.
+            state.emails.update(
+                models.Employee.objects.filter(email__in=[employee.email for employee in employees]).values_list('email', 'id')
+            )
+        else:
+            state.emails.update((employee.email, employee.pk) for employee in employees)
+        result['imported'] += len(employees)
+
+
+def import_tasks(records, state, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert tasks, assigned by ``employee_email`` (or an existing ``employee_id``).
+
+    The ``id`` column, when present, is remembered so snippets imported in the
+    same run can refer to tasks by their source id.
+    """
+    converter = Converter(models.Task, TASK_IMPORT_FIELDS)
+    employee_ids = {pk for pk in state.emails.values() if pk is not None}
+    result = state.result('tasks')
+    for batch in batches(records, batch_size):
+        tasks, source_ids = [], []
+        for number, record in batch:
+            try:
+                values = converter.convert(record)
+                values['employee_id'] = resolve_employee(record, state.emails, employee_ids)
+            except RecordError as error:
+                state.error('tasks', number, error)
+                continue
+            tasks.append(models.Task(**values))
+            source_ids.append(text(record, 'id'))
+        models.Task.objects.bulk_create(tasks)
+        for source_id, task in zip(source_ids, tasks):
+            if source_id and task.pk is not None:
+                state.task_ids[source_id] = task.pk
+        result['imported'] += len(tasks)
+
+
+def resolve_employee(record, emails, employee_ids):
+    """Return the employee id a task record is assigned to, or None if unassigned."""
+    email = text(record, 'employee_email')
+    if email:
+        if emails.get(email) is None:
+            raise RecordError(f"employee_email: No employee with email {email!r}.")
+        return emails[email]
+    raw = text(record, 'employee_id')
+    if not raw:
+        return None
+    if not raw.isdigit() or int(raw) not in employee_ids:
+        raise RecordError(f"employee_id: No employee with id {raw!r}.")
+    return int(raw)
+
+
+def import_snippets(records, state, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Insert snippets for the task in their ``task_id`` column.
+
+    A task id imported in this run is translated to the new task; otherwise it
+    must be an existing task. Snippets are stored unrendered (pending).
+    """
+    converter = Converter(models.Snippet, SNIPPET_IMPORT_FIELDS)
+    result = state.result('snippets')
+    for batch in batches(records, batch_size):
+        converted = []
+        for number, record in batch:
+            try:
+                values = converter.convert(record)
+            except RecordError as error:
+                state.error('snippets', number, error)
+                continue
+            raw = text(record, 'task_id')
+            converted.append((number, values, state.task_ids.get(raw, raw)))
+        candidates = [task_id for _, _, task_id in converted if str(task_id).isdigit()]
+        existing = set(models.Task.objects.filter(pk__in=candidates).values_list('pk', flat=True))
+        snippets = []
+        for number, values, task_id in converted:
+            if not str(task_id).isdigit() or int(task_id) not in existing:
+                state.error('snippets', number, f"task_id: No task with id {task_id!r}.")
+                continue
+            snippets.append(models.Snippet(task_id=int(task_id), **values))
+        with transaction.atomic():
+            models.Snippet.objects.bulk_create(snippets)
+        result['imported'] += len(snippets)
+
+
+IMPORTERS = {'employees': import_employees, 'tasks': import_tasks, 'snippets': import_snippets}
+
+
+@contextmanager
+def deferred_indexes(model_list):
+    """
+    Drop the declared indexes of ``model_list`` and suspend the search index.
+
+    Both are rebuilt on exit, once, instead of being maintained row by row.
+    """
+    indexes = [(model, index) for model in model_list for index in model._meta.indexes]
+    with connection.schema_editor() as editor:
+        for model, index in indexes:
+            editor.remove_index(model, index)
+    backend = search.get_backend()
+    backend.suspend()
+    try:
+        yield
+    finally:
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                editor.add_index(model, index)
+        backend.reindex()
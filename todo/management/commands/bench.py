@@ -0,0 +1,66 @@
+"""Benchmark every API endpoint through the test client."""
+
+import json
+import platform
+import resource
+import subprocess
+
+import django
+from django.core.management.base import BaseCommand
+
+from todo.benchmarking import bench_api, seed, test_database
+
+
+def git_revision():
+    """Return the current commit hash, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True, timeout=5,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, then drive every router list/detail "
+        "endpoint and the snippet highlight view through the test client. "
+        "Reports throughput, latency percentiles, queries per request and "
+        "peak memory as JSON, so runs can be compared across commits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', type=int, default=100, help="Number of employees to seed.")
+        parser.add_argument('--tasks', type=int, default=1000, help="Number of tasks to seed.")
+        parser.add_argument('--snippets', type=int, default=100, help="Number of snippets to seed.")
+        parser.add_argument('--requests', type=int, default=200, help="Measured requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=20, help="Unmeasured requests per endpoint first.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the synthetic data.")
+        parser.add_argument(
+            '--endpoint', action='append', dest='endpoints',
+            help="Only benchmark this URL name (e.g. task-list); repeatable.",
+        )
+        parser.add_argument('-o', '--output', help="Write the JSON report to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        with test_database():
+            volumes = seed(
+                employees=options['employees'], tasks=options['tasks'],
+                snippets=options['snippets'], seed_value=options['seed'],
+            )
+            endpoints = bench_api(requests=options['requests'], warmup=options['warmup'], only=options['endpoints'])
+        report = {
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'seed': options['seed'],
+            'volumes': volumes,
+            'endpoints': endpoints,
+            'max_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
@@ -0,0 +1,75 @@
+"""Measure the authentication cost of a request for each scheme."""
+
+import base64
+import json
+
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import BasicAuthentication, SessionAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from todo.authentication import CachedBasicAuthentication, CachedTokenAuthentication
+from todo.benchmarking import summarize, test_database, timed
+
+
+class Command(BaseCommand):
+    help = (
+        "Time authenticating one request with session, Basic and token "
+        "credentials, through DRF's classes and the cached ones, and report "
+        "latency and queries per request as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help="Requests per scheme.")
+        parser.add_argument(
+            '--hashed-repeat', type=int, default=5,
+            help="Requests for uncached Basic auth, which hashes the password every time.",
+        )
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        report = {}
+        with test_database():
+            user = User.objects.create_user('bench', password='bench-password')
+            token = Token.objects.create(user=user)
+            client = Client()
+            client.force_login(user)
+            factory = APIRequestFactory()
+            basic = 'Basic ' + base64.b64encode(b'bench:bench-password').decode()
+            session_cookie = f'{client.cookies.output(header="", sep=";").strip()}'
+
+            def session_request():
+                request = factory.get('/api/', HTTP_COOKIE=session_cookie)
+                SessionMiddleware(lambda r: None).process_request(request)
+                AuthenticationMiddleware(lambda r: None).process_request(request)
+                return request
+
+            cases = [
+                ('session', SessionAuthentication, session_request, repeat),
+                ('basic', BasicAuthentication, lambda: factory.get('/api/', HTTP_AUTHORIZATION=basic), options['hashed_repeat']),
+                ('basic_cached', CachedBasicAuthentication, lambda: factory.get('/api/', HTTP_AUTHORIZATION=basic), repeat),
+                ('token', TokenAuthentication, lambda: factory.get('/api/', HTTP_AUTHORIZATION=f'Token {token.key}'), repeat),
+                ('token_cached', CachedTokenAuthentication, lambda: factory.get('/api/', HTTP_AUTHORIZATION=f'Token {token.key}'), repeat),
+            ]
+            cache.clear()
+            for name, authentication_class, make_request, count in cases:
+                authenticator = authentication_class()
+
+                def authenticate():
+                    result = authenticator.authenticate(Request(make_request()))
+                    # Permission checks read these, as IsAdminOrReadOnly does.
+                    return result[0].is_authenticated and result[0].is_superuser
+
+                authenticate()
+                with CaptureQueriesContext(connection) as captured:
+                    authenticate()
+                report[name] = {'latency': summarize(timed(authenticate, count)), 'queries': len(captured)}
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,79 @@
+"""Measure JSON rendering and response compression cost and savings."""
+
+import json
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from todo import compression
+from todo.benchmarking import seed, summarize, test_database
+from todo.fastjson import FastJSONRenderer
+from todo.models import Snippet, Task
+from todo.serializers import TaskSerializer
+
+
+def cpu_timed(func, repeat):
+    """Call ``func`` ``repeat`` times and return the CPU time of each call in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        samples.append((time.process_time() - start) * 1000)
+    return samples
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database, then compare the stdlib and orjson JSON "
+        "renderers and report response sizes and CPU time per request for "
+        "each content coding on the task list and snippet highlight endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help="Tasks rendered by the renderer comparison.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per endpoint and coding.")
+
+    def handle(self, *args, **options):
+        rows, requests = options['rows'], options['requests']
+        encodings = ['identity', 'gzip'] + (['br'] if compression.brotli is not None else [])
+        report = {'renderers': {}, 'endpoints': {}}
+        with test_database():
+            seed(employees=max(rows // 10, 1), tasks=rows, snippets=10)
+            request = Request(APIRequestFactory().get('/api/'))
+            data = TaskSerializer(
+                Task.objects.select_related('employee')[:rows], many=True, context={'request': request},
+            ).data
+            for name, renderer in (('json', JSONRenderer()), ('orjson', FastJSONRenderer())):
+                report['renderers'][name] = {
+                    'bytes': len(renderer.render(data)),
+                    'cpu_ms': summarize(cpu_timed(lambda: renderer.render(data), 20)),
+                }
+            report['renderers']['identical_output'] = JSONRenderer().render(data) == FastJSONRenderer().render(data)
+
+            client = Client()
+            client.force_login(User.objects.create(username='bench'))
+            snippet = Snippet.objects.order_by('pk').first()
+            endpoints = [
+                ('task-list', reverse('task-list')),
+                ('snippet-highlight', reverse('snippet-highlight', args=[snippet.pk])),
+            ]
+            for name, path in endpoints:
+                results = {}
+                for encoding in encodings:
+                    client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                    response = client.get(path, HTTP_ACCEPT_ENCODING=encoding)
+                    results[encoding] = {
+                        'content_encoding': response.get('Content-Encoding', 'identity'),
+                        'bytes': len(response.content),
+                        'cpu_ms': summarize(
+                            cpu_timed(lambda: client.get(path, HTTP_ACCEPT_ENCODING=encoding), requests)
+                        ),
+                    }
+                report['endpoints'][name] = {'path': path, 'codings': results}
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,79 @@
+"""Benchmark the filtered list queries with and without the model indexes."""
+
+import json
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from todo.benchmarking import seed, summarize, test_database, timed
+from todo.models import Employee, Snippet, Task
+
+
+def filter_cases(rng):
+    """Return ``(name, queryset factory)`` pairs mirroring the viewset filters."""
+    employee_ids = list(Employee.objects.values_list('id', flat=True))
+    titles = list(Task.objects.values_list('title', flat=True)[:1000])
+    now = timezone.now()
+    return [
+        ('task:status', lambda: Task.objects.filter(status=rng.choice(['TODO', 'INPROGRESS', 'DONE']))),
+        ('task:employee', lambda: Task.objects.filter(employee_id=rng.choice(employee_ids))),
+        ('task:title', lambda: Task.objects.filter(title=rng.choice(titles))),
+        ('task:employee+status', lambda: Task.objects.filter(employee_id=rng.choice(employee_ids), status='TODO')),
+        ('task:status+due_date', lambda: Task.objects.filter(status='INPROGRESS', due_date__lt=now)),
+        ('task:open+due_date', lambda: Task.objects.filter(completed=False, due_date__lt=now - timedelta(days=30))),
+        ('employee:department', lambda: Employee.objects.filter(department=rng.choice(['HR', 'ENG', 'MKT']))),
+        ('employee:name', lambda: Employee.objects.filter(name=f'Employee {rng.randrange(len(employee_ids))}')),
+        ('snippet:language', lambda: Snippet.objects.filter(language='python')),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and report p50/p99 of each filtered list "
+        "query (page + COUNT) without and with the model indexes, as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1_000_000, help="Number of tasks to seed.")
+        parser.add_argument('--employees', type=int, default=1000, help="Number of employees to seed.")
+        parser.add_argument('--snippets', type=int, default=10_000, help="Number of snippets to seed.")
+        parser.add_argument('--repeat', type=int, default=50, help="Runs per filter combination.")
+        parser.add_argument('--page-size', type=int, default=10, help="Rows fetched per query.")
+
+    def handle(self, *args, **options):
+        with test_database():
+            self.stderr.write(f"Seeding {options['tasks']} tasks...")
+            seed(employees=options['employees'], tasks=options['tasks'], snippets=options['snippets'])
+            if connection.vendor in ('sqlite', 'postgresql'):
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+            indexes = [(model, index) for model in (Employee, Task, Snippet) for index in model._meta.indexes]
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.remove_index(model, index)
+            before = self.run_cases(options)
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.add_index(model, index)
+            after = self.run_cases(options)
+        report = {
+            name: {'before': before[name], 'after': after[name]}
+            for name in before
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def run_cases(self, options):
+        """Time every filter combination; return summaries keyed by name."""
+        rng = random.Random(0)
+        page_size = options['page_size']
+        results = {}
+        for name, make_queryset in filter_cases(rng):
+            def run():
+                queryset = make_queryset()
+                queryset.count()
+                list(queryset[:page_size])
+            results[name] = summarize(timed(run, options['repeat']))
+        return results
@@ -0,0 +1,49 @@
+"""Microbenchmark the snippet render path."""
+
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from todo import highlighting
+from todo.benchmarking import summarize, timed
+
+
+def constructed_render(code, language, style, linenos, full):
+    """Render building a new lexer and formatter per call (the previous path)."""
+    return highlight(code, get_lexer_by_name(language), HtmlFormatter(style=style, full=full, linenos=linenos))
+
+
+def pooled_render(code, language, style, linenos, full):
+    """Render with the shared lexer and formatter instances."""
+    render = highlighting.render_html if full else highlighting.render_body_html
+    return render(code, language, style, linenos)
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering a small and a large Python snippet with per-call and "
+        "pooled lexers/formatters, in full and body-only mode, and report "
+        "timings and response sizes as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200, help="Renders per case.")
+        parser.add_argument('--style', default='friendly', help="Pygments style.")
+        parser.add_argument('--linenos', action='store_true', help="Render line numbers.")
+
+    def handle(self, *args, **options):
+        source = Path(highlighting.__file__).read_text(encoding='utf-8')
+        samples = {'small': '\n'.join(source.splitlines()[:10]), 'large': source}
+        style, linenos, repeat = options['style'], options['linenos'], options['repeat']
+        report = {'style': style, 'linenos': linenos, 'stylesheet_bytes': len(highlighting.style_css(style))}
+        for name, code in samples.items():
+            for mode, full in (('full', True), ('body', False)):
+                case = {'bytes': len(pooled_render(code, 'python', style, linenos, full))}
+                for path, render in (('constructed', constructed_render), ('pooled', pooled_render)):
+                    case[path] = summarize(timed(lambda: render(code, 'python', style, linenos, full), repeat))
+                report[f'{name}_{mode}'] = case
+        self.stdout.write(json.dumps(report, indent=2))
@@ -0,0 +1,57 @@
+"""Compare the serializer and fast reader paths on the same rows."""
+
+import json
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from todo.benchmarking import seed, summarize, test_database, timed
+from todo.models import Employee, Task
+from todo.query_planning import apply_plan
+from todo.readers import EmployeeReader, TaskReader
+from todo.serializers import EmployeeSerializer, TaskSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and time rendering N tasks and employees "
+        "through the serializers and through the fast readers, as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000, help="Rows rendered per run.")
+        parser.add_argument('--repeat', type=int, default=5, help="Runs per path.")
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        renderer = JSONRenderer()
+        report = {}
+        with test_database():
+            seed(employees=rows, tasks=rows * 3)
+            request = Request(APIRequestFactory().get('/api/'))
+            cases = [
+                ('tasks', Task, TaskSerializer, TaskReader),
+                ('employees', Employee, EmployeeSerializer, EmployeeReader),
+            ]
+            for name, model, serializer_class, reader_class in cases:
+                queryset = model.objects.all()[:rows]
+
+                def serializer_path():
+                    planned = apply_plan(model.objects.all(), serializer_class)[:rows]
+                    data = serializer_class(planned, many=True, context={'request': request}).data
+                    return renderer.render(data)
+
+                def reader_path():
+                    reader = reader_class(request)
+                    return renderer.render(reader.represent(reader.values(queryset)))
+
+                identical = serializer_path() == reader_path()
+                report[name] = {
+                    'rows': rows,
+                    'identical_output': identical,
+                    'serializer': summarize(timed(serializer_path, repeat)),
+                    'reader': summarize(timed(reader_path, repeat)),
+                }
+        self.stdout.write(json.dumps(report, indent=2))
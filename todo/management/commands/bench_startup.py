@@ -0,0 +1,50 @@
+"""Measure process start-up time and memory of `manage.py check`."""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from todo.benchmarking import summarize
+
+
+def run_check(env):
+    """Run `manage.py check` once; return (wall milliseconds, peak RSS in KiB)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(settings.BASE_DIR / 'manage.py'), 'check'],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    _, status, rusage = os.wait4(process.pid, 0)
+    elapsed = (time.perf_counter() - start) * 1000
+    exit_code = os.waitstatus_to_exitcode(status)
+    if exit_code:
+        raise RuntimeError(f"manage.py check exited with {exit_code}")
+    return elapsed, rusage.ru_maxrss
+
+
+class Command(BaseCommand):
+    help = (
+        "Run `manage.py check` repeatedly with the precomputed Pygments catalog "
+        "and with live registry enumeration (the previous behaviour), and report "
+        "wall time and peak RSS of each as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=10, help="Runs per mode.")
+
+    def handle(self, *args, **options):
+        report = {}
+        for mode in ('live', 'catalog'):
+            env = {**os.environ, 'TODO_PYGMENTS_CATALOG': mode}
+            times, rss = [], []
+            for _ in range(options['repeat']):
+                elapsed, max_rss = run_check(env)
+                times.append(elapsed)
+                rss.append(max_rss)
+            report[mode] = {'wall': summarize(times), 'max_rss_kib': max(rss)}
+        self.stdout.write(json.dumps(report, indent=2))
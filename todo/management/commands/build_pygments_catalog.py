@@ -0,0 +1,25 @@
+"""Regenerate the precomputed Pygments language/style catalog."""
+
+import json
+
+from django.core.management.base import BaseCommand
+
+from todo.catalog import CATALOG_PATH, build_catalog
+
+
+class Command(BaseCommand):
+    help = "Enumerate the installed Pygments lexers and styles into todo/pygments_catalog.json."
+
+    def handle(self, *args, **options):
+        catalog = build_catalog()
+        # One entry per line keeps diffs readable when Pygments is upgraded.
+        sections = [f' "pygments_version": {json.dumps(catalog["pygments_version"])}']
+        for key in ('languages', 'styles'):
+            entries = ',\n'.join(f'  {json.dumps(entry, ensure_ascii=False)}' for entry in catalog[key])
+            sections.append(f' "{key}": [\n{entries}\n ]')
+        with open(CATALOG_PATH, 'w', encoding='utf-8') as catalog_file:
+            catalog_file.write('{\n' + ',\n'.join(sections) + '\n}\n')
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(catalog['languages'])} languages and {len(catalog['styles'])} styles "
+            f"for Pygments {catalog['pygments_version']} to {CATALOG_PATH}."
+        ))
@@ -0,0 +1,48 @@
+"""Move existing uploads to content-hash names, sharing duplicate files."""
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from todo.models import Employee, Task
+from todo.storage import content_hash, file_hash
+
+FILE_FIELDS = [(Task, 'attachment'), (Employee, 'profile_picture')]
+
+
+class Command(BaseCommand):
+    help = (
+        "Store every attachment and profile picture not yet under a content-hash "
+        "name as a hashed file, repoint the rows, and optionally delete the old files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--delete-originals', action='store_true', help="Delete the old files once no row uses them.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report what would change.")
+
+    def handle(self, *args, **options):
+        moved = saved_bytes = 0
+        for model, field in FILE_FIELDS:
+            names = (
+                model.objects.exclude(**{field: ''}).exclude(**{f'{field}__isnull': True})
+                .values_list(field, flat=True).distinct().iterator()
+            )
+            for name in names:
+                if content_hash(name) or not default_storage.exists(name):
+                    continue
+                size = default_storage.size(name)
+                if options['dry_run']:
+                    self.stdout.write(f"Would move {name} ({size} bytes)")
+                    continue
+                with default_storage.open(name, 'rb') as handle:
+                    content = File(handle, name=name)
+                    content.content_hash = file_hash(content)
+                    if default_storage.exists(default_storage.hashed_name(name, content.content_hash)):
+                        saved_bytes += size
+                    new_name = default_storage.save(name, content)
+                model.objects.filter(**{field: name}).update(**{field: new_name})
+                moved += 1
+                self.stdout.write(f"{name} -> {new_name}")
+                if options['delete_originals'] and new_name != name:
+                    default_storage.delete(name)
+        self.stdout.write(f"Moved {moved} file(s); {saved_bytes} bytes were duplicates.")
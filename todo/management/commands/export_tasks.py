@@ -0,0 +1,49 @@
+"""Stream every task, optionally filtered, as NDJSON or CSV."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django_filters.rest_framework import DjangoFilterBackend
+
+from todo.exports import DEFAULT_CHUNK_SIZE, ENCODERS, TASK_EXPORT_FIELDS, export_lines
+from todo.models import Task
+from todo.views import TaskViewSet
+
+
+class Command(BaseCommand):
+    help = (
+        "Export tasks as NDJSON or CSV with constant memory. Accepts the same "
+        "filters as /api/tasks/, e.g. --filter status=DONE --filter employee=3."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(ENCODERS), default='ndjson', help="Output format.")
+        parser.add_argument('--output', '-o', help="Write to this file instead of stdout.")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched per database round trip.")
+        parser.add_argument('--filter', action='append', default=[], metavar='FIELD=VALUE', help="Filter as on /api/tasks/.")
+
+    def handle(self, *args, **options):
+        queryset = self.filtered_queryset(options['filter'])
+        lines = export_lines(queryset, TASK_EXPORT_FIELDS, options['format'], options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
+
+    def filtered_queryset(self, filters):
+        """Apply ``FIELD=VALUE`` filters through the TaskViewSet filterset."""
+        data = {}
+        for item in filters:
+            field, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid filter {item!r}, expected FIELD=VALUE.")
+            data[field] = value
+        queryset = Task.objects.all()
+        filterset_class = DjangoFilterBackend().get_filterset_class(TaskViewSet(), queryset)
+        unknown = set(data) - set(filterset_class.base_filters)
+        if unknown:
+            raise CommandError(f"Unknown filters: {', '.join(sorted(unknown))}.")
+        filterset = filterset_class(data, queryset=queryset)
+        if not filterset.is_valid():
+            raise CommandError(f"Invalid filters: {dict(filterset.errors)}")
+        return filterset.qs
@@ -0,0 +1,65 @@
+"""Bulk import employees, tasks and snippets from CSV or NDJSON files."""
+
+import time
+from contextlib import nullcontext
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from todo.imports import (DEFAULT_BATCH_SIZE, IMPORTERS, ImportState, deferred_indexes, detect_format,
+                          read_records)
+from todo.models import Snippet, Task, TaskTag
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream CSV or NDJSON files of employees, tasks and snippets into the "
+        "database with batched bulk inserts. Tasks name their employee by "
+        "employee_email (or employee_id); snippets name their task by task_id, "
+        "which may be an id from the --tasks file. Files are imported in the "
+        "order employees, tasks, snippets."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--employees', metavar='FILE', help="Employees file.")
+        parser.add_argument('--tasks', metavar='FILE', help="Tasks file.")
+        parser.add_argument('--snippets', metavar='FILE', help="Snippets file.")
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help="File format (default: from the extension).")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows per INSERT batch and transaction.")
+        parser.add_argument('--atomic', action='store_true', help="Import everything in one transaction.")
+        parser.add_argument(
+            '--defer-indexes', action='store_true',
+            help="Drop the task/snippet/tag indexes and search triggers during the load and rebuild them once after.",
+        )
+
+    def handle(self, *args, **options):
+        files = [(kind, options[kind]) for kind in IMPORTERS if options[kind]]
+        if not files:
+            raise CommandError("Pass at least one of --employees, --tasks or --snippets.")
+        formats = {}
+        for kind, path in files:
+            formats[kind] = options['format'] or detect_format(path)
+            if formats[kind] is None:
+                raise CommandError(f"Cannot tell the format of {path}; pass --format.")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive.")
+        indexes = deferred_indexes([Task, Snippet, TaskTag]) if options['defer_indexes'] else nullcontext()
+        state = ImportState()
+        with indexes, transaction.atomic() if options['atomic'] else nullcontext():
+            for kind, path in files:
+                started = time.perf_counter()
+                try:
+                    with open(path, encoding='utf-8', newline='') as handle:
+                        IMPORTERS[kind](read_records(handle, formats[kind]), state, options['batch_size'])
+                except OSError as error:
+                    raise CommandError(f"Cannot read {path}: {error}")
+                self.report(kind, state.result(kind), time.perf_counter() - started)
+
+    def report(self, kind, result, elapsed):
+        """Write the counts of one file, and its first rejected records."""
+        for message in result['messages']:
+            self.stderr.write(message)
+        self.stdout.write(
+            f"{kind}: {result['imported']} imported, {result['skipped']} skipped, {result['errors']} rejected "
+            f"in {elapsed:.1f}s ({result['imported'] / max(elapsed, 1e-9):.0f} rows/s)"
+        )
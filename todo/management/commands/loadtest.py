@@ -0,0 +1,97 @@
+"""Drive a running server with many concurrent keep-alive connections."""
+
+import asyncio
+import json
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+from todo.benchmarking import summarize
+
+
+async def fetch(reader, writer, host, path):
+    """Send one GET over an open connection and return the status code."""
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: {host}\r\nAccept: application/json\r\n\r\n'.encode('latin-1'))
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {key.strip().lower(): value.strip() for key, _, value in (line.partition(':') for line in lines[1:] if line)}
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    if headers.get('connection', '').lower() == 'close':
+        raise ConnectionResetError
+    return status
+
+
+async def client(url, deadline, latencies, statuses):
+    """Issue requests over one connection until ``deadline``, reconnecting on close."""
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    connection = None
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(parts.hostname, parts.port or 80)
+            status = await fetch(*connection, parts.netloc, path)
+        except (OSError, asyncio.IncompleteReadError):
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            statuses['error'] = statuses.get('error', 0) + 1
+            await asyncio.sleep(0.05)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[status] = statuses.get(status, 0) + 1
+    if connection is not None:
+        connection[1].close()
+
+
+async def run(url, concurrency, duration):
+    """Run ``concurrency`` clients against ``url`` for ``duration`` seconds."""
+    latencies, statuses = [], {}
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(client(url, deadline, latencies, statuses) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        'url': url,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'requests_per_second': round(len(latencies) / elapsed, 1),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'latency': summarize(latencies) if latencies else None,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers and report throughput and latency as JSON. "
+        "To compare WSGI and ASGI, start e.g. `gunicorn -w 4 --threads 8 "
+        "todoproject.wsgi` on :8000 and `uvicorn --workers 4 todoproject.asgi:application` "
+        "on :8001, then pass --target wsgi=http://127.0.0.1:8000/api/tasks/ "
+        "--target asgi=http://127.0.0.1:8001/api/async/tasks/."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True, metavar='NAME=URL', help="Endpoint to load, repeatable.")
+        parser.add_argument('--concurrency', type=int, default=500, help="Concurrent keep-alive connections.")
+        parser.add_argument('--duration', type=float, default=30.0, help="Seconds per target.")
+
+    def handle(self, *args, **options):
+        report = {}
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or not url.startswith('http://'):
+                raise CommandError(f"Invalid target {target!r}, expected NAME=http://HOST:PORT/PATH.")
+            self.stderr.write(f"Loading {name} ({url}) with {options['concurrency']} connections...")
+            report[name] = asyncio.run(run(url, options['concurrency'], options['duration']))
+        self.stdout.write(json.dumps(report, indent=2))
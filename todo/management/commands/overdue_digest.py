@@ -0,0 +1,24 @@
+"""Materialize the per-employee overdue task digests."""
+
+from django.core.management.base import BaseCommand
+
+from todo import overdue
+
+
+class Command(BaseCommand):
+    help = (
+        "Update the per-employee overdue task digests with the tasks that "
+        "became overdue since the previous run; run it periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every employee's digest.")
+
+    def handle(self, *args, **options):
+        summary = overdue.refresh_digests(full=options['full'])
+        since = summary['since'].isoformat() if summary['since'] else 'the beginning'
+        self.stdout.write(
+            f"{summary['newly_overdue']} task(s) became overdue since {since}; "
+            f"recomputed {summary['recomputed']} employee(s), {summary['digests']} with overdue tasks, "
+            f"cleared {summary['cleared']}."
+        )
@@ -0,0 +1,12 @@
+"""Rebuild the full-text search index."""
+
+from django.core.management.base import BaseCommand
+
+from todo.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the task/snippet full-text search index of the configured search backend."
+
+    def handle(self, *args, **options):
+        self.stdout.write(get_backend().reindex())
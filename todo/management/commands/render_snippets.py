@@ -0,0 +1,102 @@
+"""Render and store the highlighted HTML of snippets."""
+
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from todo import highlighting
+from todo.models import Snippet
+
+ROW_FIELDS = ('pk', 'code', 'language', 'style', 'linenos')
+
+logger = logging.getLogger(__name__)
+
+
+def render_row(row):
+    """
+    Render one row with ``highlighting.render_stored_columns``.
+
+    Returns ``(result, None)``, or ``(None, error message)`` if the row cannot
+    be rendered (e.g. an unknown language), so one bad snippet does not abort
+    the whole batch.
+    """
+    try:
+        return highlighting.render_stored_columns(row), None
+    except Exception as exc:
+        return None, f'{type(exc).__name__}: {exc}'
+
+
+class Command(BaseCommand):
+    help = (
+        "Back-fill the stored highlighted HTML of snippets in batches, or with "
+        "--worker keep rendering pending snippets as they are saved."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Snippets rendered per batch.")
+        parser.add_argument('--processes', type=int, default=None, help="Size of the render process pool (default: CPU count).")
+        parser.add_argument('--all', action='store_true', help="Re-render every snippet, not only pending ones.")
+        parser.add_argument('--worker', action='store_true', help="Keep polling for pending snippets instead of exiting.")
+        parser.add_argument('--poll-interval', type=float, default=2.0, help="Seconds between polls in worker mode.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.processes = options['processes'] or os.cpu_count() or 1
+        # Render key of each snippet that failed to render; it stays pending
+        # and is retried only once an edit changes its key.
+        self.failed = {}
+        self.rendered = 0
+        with ProcessPoolExecutor(max_workers=self.processes) as pool:
+            if options['worker']:
+                self.stdout.write("Waiting for pending snippets...")
+                pending, last_pk = Snippet.objects.filter(rendered_key=''), 0
+                while True:
+                    # Sweep the pending snippets in pk order, so ones that
+                    # keep failing cannot crowd out the rest.
+                    batch = self.render_batch(pool, pending.filter(pk__gt=last_pk), batch_size)
+                    if batch:
+                        last_pk = batch[-1]
+                    else:
+                        last_pk = 0
+                        time.sleep(options['poll_interval'])
+            queryset = Snippet.objects.all() if options['all'] else Snippet.objects.filter(rendered_key='')
+            last_pk = 0
+            while batch := self.render_batch(pool, queryset.filter(pk__gt=last_pk), batch_size):
+                last_pk = batch[-1]
+                self.stdout.write(f"Rendered {self.rendered} snippets")
+        if self.failed:
+            self.stderr.write(f"Skipped {len(self.failed)} snippets that failed to render: {sorted(self.failed)}")
+        self.stdout.write(self.style.SUCCESS(f"Done: {self.rendered} snippets rendered."))
+
+    def render_batch(self, pool, queryset, batch_size):
+        """
+        Render the next batch of ``queryset`` in pk order and store it; return
+        the pks of the batch. Snippets that fail to render are logged, recorded
+        in ``failed`` and left pending; unchanged ones are not tried again.
+        """
+        rows = list(queryset.order_by('pk').values_list(*ROW_FIELDS)[:batch_size])
+        keys = {row[0]: highlighting.render_key(*row[1:]) for row in rows}
+        todo = [row for row in rows if self.failed.get(row[0]) != keys[row[0]]]
+        if not todo:
+            return [row[0] for row in rows]
+        chunksize = max(1, len(todo) // (self.processes * 4))
+        results = pool.map(render_row, todo, chunksize=chunksize)
+        now = timezone.now()
+        with transaction.atomic():
+            for (pk, code, language, style, linenos), (result, error) in zip(todo, results):
+                if error is not None:
+                    logger.warning("Could not render snippet %s: %s", pk, error)
+                    self.failed[pk] = keys[pk]
+                    continue
+                self.failed.pop(pk, None)
+                _, key, full_html, body_html = result
+                # Only store the rendering if the snippet was not edited meanwhile.
+                self.rendered += Snippet.objects.filter(
+                    pk=pk, code=code, language=language, style=style, linenos=linenos,
+                ).update(highlighted_html=full_html, highlighted_body=body_html, rendered_key=key, updated=now)
+        return [row[0] for row in rows]
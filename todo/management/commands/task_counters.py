@@ -0,0 +1,31 @@
+"""Rebuild or verify the per-employee task counters."""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from todo import counters
+from todo.models import Employee, Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every employee's task counters from the task table, or with "
+        "--verify report the employees whose counters drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only report drift; exit non-zero if any.")
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            wrong = counters.drift()
+            for employee_id, fields in sorted(wrong.items()):
+                details = ', '.join(f'{field} {stored} != {actual}' for field, (stored, actual) in fields.items())
+                self.stdout.write(f"Employee {employee_id}: {details}")
+            if wrong:
+                raise CommandError(f"{len(wrong)} employee(s) have wrong task counters.")
+            self.stdout.write("Task counters are correct.")
+            return
+        with transaction.atomic():
+            updated = counters.rebuild(Employee, Task)
+        self.stdout.write(f"Rebuilt task counters of {updated} employee(s).")
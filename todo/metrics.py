@@ -0,0 +1,295 @@
+"""
+Request-level performance metrics.
+
+``MetricsMiddleware`` times every request and, through a database execute
+wrapper installed on each new connection, counts its queries and their
+time. Phases inside a request are timed with ``phase()``: response
+rendering (``render``), fast-reader serialization (``serialize``) and
+Pygments highlighting (``pygments``). Everything is kept in in-process
+histograms exposed in the Prometheus text format by ``MetricsView``
+(``/api/metrics/``); each worker process reports its own numbers.
+
+Requests slower than ``TODO_SLOW_REQUEST_SECONDS`` are logged on the
+``todo.metrics.slow`` logger together with their slowest SQL statements.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+slow_logger = logging.getLogger('todo.metrics.slow')
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+SLOWEST_QUERIES_KEPT = 5
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with labels, rendered in Prometheus format."""
+
+    def __init__(self, name, documentation, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        """Record one observation for the label values ``labels``."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def reset(self):
+        """Forget every observation."""
+        with self._lock:
+            self._series.clear()
+
+    def samples(self, labels):
+        """Return ``(bucket counts, sum, count)`` for ``labels``, or None."""
+        with self._lock:
+            series = self._series.get(tuple(labels))
+            return None if series is None else (list(series[0]), series[1], series[2])
+
+    def expose(self):
+        """Return the metric in the Prometheus text exposition format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, [list(data[0]), data[1], data[2]]) for labels, data in self._series.items())
+        for labels, (counts, total, count) in series:
+            pairs = list(zip(self.labelnames, labels))
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{format_labels([*pairs, ("le", bound)])} {bucket_count}')
+            lines.append(f'{self.name}_bucket{format_labels([*pairs, ("le", "+Inf")])} {count}')
+            lines.append(f'{self.name}_sum{format_labels(pairs)} {total}')
+            lines.append(f'{self.name}_count{format_labels(pairs)} {count}')
+        return '\n'.join(lines)
+
+
+class Counter:
+    """Thread-safe monotonically increasing counter with labels, rendered in Prometheus format."""
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        """Add ``amount`` to the series for the label values ``labels``."""
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def reset(self):
+        """Forget every count."""
+        with self._lock:
+            self._values.clear()
+
+    def value(self, labels):
+        """Return the count for ``labels``."""
+        with self._lock:
+            return self._values.get(tuple(labels), 0)
+
+    def expose(self):
+        """Return the metric in the Prometheus text exposition format."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            series = sorted(self._values.items())
+        for labels, value in series:
+            lines.append(f'{self.name}{format_labels(list(zip(self.labelnames, labels)))} {value}')
+        return '\n'.join(lines)
+
+
+def format_labels(pairs):
+    """Format ``(name, value)`` pairs as an exposition-format label set."""
+    if not pairs:
+        return ''
+    escaped = [
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    ]
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+REQUEST_SECONDS = Histogram(
+    'todo_request_duration_seconds', 'Request latency by endpoint.', ['method', 'view', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'todo_request_queries', 'Database queries per request.', ['method', 'view'], QUERY_COUNT_BUCKETS,
+)
+REQUEST_QUERY_SECONDS = Histogram(
+    'todo_request_query_seconds', 'Database time per request.', ['method', 'view'],
+)
+PHASE_SECONDS = Histogram(
+    'todo_phase_seconds', 'Time per request spent in render, serialize and pygments phases.', ['phase', 'view'],
+)
+HISTOGRAMS = [REQUEST_SECONDS, REQUEST_QUERIES, REQUEST_QUERY_SECONDS, PHASE_SECONDS]
+
+
+def register(histogram):
+    """Add a histogram (or ``Counter``) to those ``expose()`` renders."""
+    if histogram not in HISTOGRAMS:
+        HISTOGRAMS.append(histogram)
+    return histogram
+
+
+def expose():
+    """Return every registered metric in the Prometheus text format."""
+    return '\n'.join(histogram.expose() for histogram in HISTOGRAMS) + '\n'
+
+
+class RequestRecord:
+    """Queries and phase timings collected for the request being served."""
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.slowest = []
+        self.phases = {}
+
+    def add_query(self, sql, seconds):
+        """Count one query, keeping the slowest few statements."""
+        self.queries += 1
+        self.query_seconds += seconds
+        entry = (seconds, self.queries, sql)
+        if len(self.slowest) < SLOWEST_QUERIES_KEPT:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def add_phase(self, name, seconds):
+        """Accumulate time spent in phase ``name``."""
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+
+current_record = ContextVar('todo_metrics_record', default=None)
+
+
+def record_queries(execute, sql, params, many, context):
+    """Execute wrapper timing every query of an instrumented request."""
+    record = current_record.get()
+    if record is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record.add_query(sql, time.perf_counter() - start)
+
+
+@receiver(connection_created, dispatch_uid='todo.metrics')
+def install_execute_wrapper(sender, connection, **kwargs):
+    """Install ``record_queries`` on every new database connection."""
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_queries)
+
+
+def install_on_open_connections():
+    """Install ``record_queries`` on connections opened before this module was loaded."""
+    for connection in connections.all(initialized_only=True):
+        install_execute_wrapper(None, connection)
+
+
+@contextmanager
+def phase(name):
+    """Add the time spent in the block to phase ``name`` of the current request."""
+    record = current_record.get()
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.add_phase(name, time.perf_counter() - start)
+
+
+def view_label(request):
+    """Low-cardinality name of the endpoint that served ``request``."""
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match.route) if match else 'unmatched'
+
+
+class MetricsMiddleware:
+    """Record latency, query and phase metrics for every request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        install_on_open_connections()
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        record, token, start = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_record.reset(token)
+        self.finish(request, response, record, start)
+        return response
+
+    async def __acall__(self, request):
+        record, token, start = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_record.reset(token)
+        self.finish(request, response, record, start)
+        return response
+
+    def start(self):
+        """Begin recording a request."""
+        record = RequestRecord()
+        return record, current_record.set(record), time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """Time the rendering of DRF and template responses."""
+        record = current_record.get()
+        if record is not None:
+            start = time.perf_counter()
+            response.add_post_render_callback(lambda _: record.add_phase('render', time.perf_counter() - start))
+        return response
+
+    def finish(self, request, response, record, start):
+        """Observe the request's metrics and log it if slow."""
+        elapsed = time.perf_counter() - start
+        method, view = request.method, view_label(request)
+        REQUEST_SECONDS.observe(elapsed, method, view, str(response.status_code))
+        REQUEST_QUERIES.observe(record.queries, method, view)
+        REQUEST_QUERY_SECONDS.observe(record.query_seconds, method, view)
+        for name, seconds in record.phases.items():
+            PHASE_SECONDS.observe(seconds, name, view)
+        threshold = getattr(settings, 'TODO_SLOW_REQUEST_SECONDS', 1.0)
+        if threshold is not None and elapsed >= threshold:
+            statements = '\n'.join(
+                f'  {seconds * 1000:.1f} ms: {sql[:500]}' for seconds, _, sql in sorted(record.slowest, reverse=True)
+            )
+            slow_logger.warning(
+                "Slow request %s %s (%s) -> %s in %.1f ms, %d queries in %.1f ms, phases %s\n%s",
+                method, request.get_full_path(), view, response.status_code, elapsed * 1000,
+                record.queries, record.query_seconds * 1000,
+                {name: round(seconds * 1000, 1) for name, seconds in record.phases.items()}, statements,
+            )
+
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.3 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0005_snippet'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snippet',
+            name='highlighted_html',
+            field=models.TextField(blank=True, editable=False, help_text='Stored full HTML rendering of the code.'),
+        ),
+        migrations.AddField(
+            model_name='snippet',
+            name='highlighted_body',
+            field=models.TextField(blank=True, editable=False, help_text='Stored HTML rendering without the inline stylesheet.'),
+        ),
+        migrations.AddField(
+            model_name='snippet',
+            name='rendered_key',
+            field=models.CharField(blank=True, editable=False, help_text='Render key of the stored HTML; empty while rendering is pending.', max_length=80),
+        ),
+    ]
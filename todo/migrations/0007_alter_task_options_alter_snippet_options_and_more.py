@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 10:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0006_snippet_highlighted_html_snippet_highlighted_body_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='task',
+            options={'ordering': ['created_at', 'id']},
+        ),
+        migrations.AlterModelOptions(
+            name='snippet',
+            options={'ordering': ['created', 'id'], 'verbose_name': 'Snippet', 'verbose_name_plural': 'Snippets'},
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['created_at', 'id'], name='task_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='snippet',
+            index=models.Index(fields=['created', 'id'], name='snippet_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.3 on 2026-10-18 13:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0008_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snippet',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Snippet last update timestamp.'),
+            preserve_default=False,
+        ),
+    ]
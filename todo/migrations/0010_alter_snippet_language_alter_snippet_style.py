@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 14:31
+
+import todo.catalog
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0009_snippet_updated'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='snippet',
+            name='language',
+            field=models.CharField(choices=todo.catalog.language_choices, default='python', help_text='Programming language of the snippet.', max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='snippet',
+            name='style',
+            field=models.CharField(choices=todo.catalog.style_choices, default='friendly', help_text='Style for code highlighting.', max_length=100),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.3 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+def fill_counters(apps, schema_editor):
+    from todo import counters
+
+    counters.rebuild(apps.get_model('todo', 'Employee'), apps.get_model('todo', 'Task'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0010_alter_snippet_language_alter_snippet_style'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='todo_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of assigned tasks to do.'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='inprogress_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of assigned tasks in progress.'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='done_count',
+            field=models.IntegerField(default=0, editable=False, help_text='Number of assigned tasks done.'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.3 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def split_tags(apps, schema_editor):
+    """Link each task to the Tag rows of its tag string, leaving the string as entered."""
+    from todo import tagging
+
+    Task = apps.get_model('todo', 'Task')
+    Tag = apps.get_model('todo', 'Tag')
+    TaskTag = apps.get_model('todo', 'TaskTag')
+    tasks = Task.objects.exclude(tags='').only('id', 'tags').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(tasks.filter(pk__gt=last_pk)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        names = {task.pk: tagging.parse(task.tags) for task in batch}
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in {name for parsed in names.values() for name in parsed}],
+            ignore_conflicts=True,
+        )
+        ids = dict(Tag.objects.filter(name__in={name for parsed in names.values() for name in parsed}).values_list('name', 'id'))
+        TaskTag.objects.bulk_create(
+            [TaskTag(task_id=pk, tag_id=ids[name]) for pk, parsed in names.items() for name in parsed],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0011_employee_task_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Normalized (trimmed, lower-case) tag name.', max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.ForeignKey(help_text='Tag.', on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='todo.tag')),
+                ('task', models.ForeignKey(help_text='Tagged task.', on_delete=django.db.models.deletion.CASCADE, related_name='task_tags', to='todo.task')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='tag_set',
+            field=models.ManyToManyField(blank=True, help_text='Normalized tags, kept in step with ``tags``.', related_name='tasks', through='todo.TaskTag', to='todo.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='tasktag',
+            index=models.Index(fields=['tag', 'task'], name='tasktag_tag_task_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasktag',
+            constraint=models.UniqueConstraint(fields=('task', 'tag'), name='tasktag_task_tag_uniq'),
+        ),
+        migrations.RunPython(split_tags, migrations.RunPython.noop),
+    ]
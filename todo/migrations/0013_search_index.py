@@ -0,0 +1,16 @@
+# Generated by Django 5.2.3 on 2026-10-18 17:05
+
+from django.db import migrations
+
+from todo.search import drop_sqlite_index, install_sqlite_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0012_tag_tasktag_task_tag_set'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_sqlite_index, drop_sqlite_index),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.3 on 2026-10-18 18:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0013_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Checkpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Job name.', max_length=100, unique=True)),
+                ('reached_at', models.DateTimeField(help_text='Time up to which the job has processed its input.')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OverdueDigest',
+            fields=[
+                ('employee', models.OneToOneField(help_text='Employee the digest is about.', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='overdue_digest', serialize=False, to='todo.employee')),
+                ('overdue_count', models.PositiveIntegerField(default=0, help_text='Open tasks past their due date.')),
+                ('newly_overdue_count', models.PositiveIntegerField(default=0, help_text='Open tasks that became overdue since the previous run.')),
+                ('oldest_due_date', models.DateTimeField(blank=True, help_text='Earliest due date among the overdue tasks.', null=True)),
+                ('computed_at', models.DateTimeField(help_text='When the digest was computed.')),
+            ],
+        ),
+    ]
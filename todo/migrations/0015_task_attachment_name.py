@@ -0,0 +1,24 @@
+# Generated by Django 5.2.3 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+from todo.search import install_sqlite_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('todo', '0014_overduedigest_checkpoint'),
+    ]
+
+    # SQLite rebuilds todo_task to change its columns, dropping the search
+    # triggers; reinstall them afterwards, in either direction.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, install_sqlite_index),
+        migrations.AddField(
+            model_name='task',
+            name='attachment_name',
+            field=models.CharField(blank=True, help_text="Client's file name of the attachment, sent back on download.", max_length=255),
+        ),
+        migrations.RunPython(install_sqlite_index, migrations.RunPython.noop),
+    ]
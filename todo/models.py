@@ -1,8 +1,6 @@
-from django.db import models
-from pygments import highlight
-from pygments.formatters.html import HtmlFormatter
-from pygments.lexers import get_all_lexers, get_lexer_by_name
-from pygments.styles import get_all_styles
+from django.db import models, transaction
+
+from . import catalog, counters, highlighting, tagging
 
 # Task status constants
 TASK_STATUS_TODO = 'TODO'
@@ -13,10 +11,20 @@ TASK_STATUS_CHOICES = [
     (TASK_STATUS_INPROGRESS, 'In Progress'),
     (TASK_STATUS_DONE, 'Done'),
 ]
+# Employee counter field maintained for each status (see ``todo.counters``)
+TASK_STATUS_COUNTER_FIELDS = {
+    TASK_STATUS_TODO: 'todo_count',
+    TASK_STATUS_INPROGRESS: 'inprogress_count',
+    TASK_STATUS_DONE: 'done_count',
+}
 
-LEXERS = [item for item in get_all_lexers() if item[1]]
-LANGUAGE_CHOICES = sorted([(item[1][0], item[0]) for item in LEXERS])
-STYLE_CHOICES = sorted([(item, item) for item in get_all_styles()])
+def __getattr__(name):
+    """Build the Pygments choice lists lazily; see ``todo.catalog``."""
+    if name == 'LANGUAGE_CHOICES':
+        return catalog.language_choices()
+    if name == 'STYLE_CHOICES':
+        return catalog.style_choices()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 class Employee(models.Model):
     """Model representing an employee in the company."""
@@ -33,11 +41,79 @@ class Employee(models.Model):
         default='ENG',
         help_text="Department of the employee."
     )
+    todo_count = models.IntegerField(default=0, editable=False, help_text="Number of assigned tasks to do.")
+    inprogress_count = models.IntegerField(default=0, editable=False, help_text="Number of assigned tasks in progress.")
+    done_count = models.IntegerField(default=0, editable=False, help_text="Number of assigned tasks done.")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['department'], name='employee_department_idx'),
+            models.Index(fields=['birth_date'], name='employee_birth_date_idx'),
+            models.Index(fields=['name'], name='employee_name_idx'),
+        ]
 
     def __str__(self):
         """String for representing the Employee object."""
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        Save the employee without its task counters, unless ``update_fields`` names them.
+
+        The counters are maintained with ``F()`` updates by task writes; writing
+        back the values of an instance loaded earlier would undo those.
+        """
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in TASK_STATUS_COUNTER_FIELDS.values()
+            ]
+        super().save(*args, **kwargs)
+
+class TaskQuerySet(models.QuerySet):
+    """Task queryset whose bulk writes keep employee counters and tag links in step."""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Insert tasks, count them for their employees and link their tags, atomically."""
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            conflicts = kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts')
+            if conflicts:
+                # Which rows were inserted is unknown; recount the employees involved.
+                counters.rebuild(Employee, Task, {task.employee_id for task in objs})
+            else:
+                counters.move([(None, counters.state(task)) for task in created])
+            tagging.sync([task for task in created if task.tags], replace=bool(conflicts))
+        return created
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Update tasks, moving employee counters and relinking tags as needed, atomically."""
+        objs = list(objs)
+        fields = list(fields)
+        with transaction.atomic(using=self.db):
+            old = {}
+            if {'employee', 'employee_id', 'status'} & set(fields):
+                old = {
+                    pk: (employee_id, status)
+                    for pk, employee_id, status in self.model.objects.select_for_update()
+                    .filter(pk__in=[task.pk for task in objs])
+                    .values_list('pk', 'employee_id', 'status')
+                }
+            updated = super().bulk_update(objs, fields, *args, **kwargs)
+            if old:
+                counters.move([(old.get(task.pk), counters.state(task)) for task in objs])
+            if 'tags' in fields:
+                tagging.sync(objs)
+        return updated
+
+    def delete(self):
+        """Delete tasks and uncount them, one counter UPDATE per (employee, status) change, atomically."""
+        with transaction.atomic(using=self.db):
+            counts = self.order_by().values_list('employee', 'status').annotate(count=models.Count('pk'))
+            counters.apply({(employee_id, status): -count for employee_id, status, count in counts})
+            return super().delete()
+
 class Task(models.Model):
     """Model representing a task assigned to an employee."""
     employee = models.ForeignKey(Employee, related_name='tasks', on_delete=models.CASCADE, null=True, blank=True, help_text="Employee assigned to the task.")
@@ -49,7 +125,9 @@ class Task(models.Model):
     due_date = models.DateTimeField(null=True, blank=True, help_text="Due date for the task.")
     priority = models.IntegerField(default=1, help_text="Priority of the task (1-5).")
     attachment = models.FileField(upload_to='attachments/', null=True, blank=True, help_text="Related file attachment.")
+    attachment_name = models.CharField(max_length=255, blank=True, help_text="Client's file name of the attachment, sent back on download.")
     tags = models.CharField(max_length=255, blank=True, help_text='Comma-separated tags')
+    tag_set = models.ManyToManyField('Tag', through='TaskTag', related_name='tasks', blank=True, help_text="Normalized tags, kept in step with ``tags``.")
     status = models.CharField(
         max_length=20,
         choices=TASK_STATUS_CHOICES,
@@ -57,27 +135,194 @@ class Task(models.Model):
         help_text="Current status of the task."
     )
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='task_created_id_idx'),
+            models.Index(fields=['employee', 'status'], name='task_employee_status_idx'),
+            models.Index(fields=['status', 'due_date'], name='task_status_due_idx'),
+            models.Index(fields=['title'], name='task_title_idx'),
+            models.Index(fields=['due_date'], condition=models.Q(completed=False), name='task_open_due_idx'),
+            models.Index(fields=['employee', 'due_date'], condition=models.Q(completed=False), name='task_open_employee_due_idx'),
+        ]
+
     def __str__(self):
         """String for representing the Task object."""
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        Save the task.
+
+        In the same transaction, moves it between employee counters and relinks
+        its tags if they changed. With ``update_fields``, only the written
+        employee and status count.
+        """
+        update_fields = kwargs.get('update_fields')
+        written = set(update_fields) if update_fields is not None else None
+        with transaction.atomic(using=kwargs.get('using')):
+            old = old_tags = None
+            if not self._state.adding:
+                stored = (
+                    Task.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list('employee_id', 'status', 'tags')
+                    .first()
+                )
+                if stored is not None:
+                    old, old_tags = stored[:2], stored[2]
+            super().save(*args, **kwargs)
+            new = counters.state(self)
+            if old is not None and written is not None:
+                new = (
+                    self.employee_id if written & {'employee', 'employee_id'} else old[0],
+                    self.status if 'status' in written else old[1],
+                )
+            counters.move([(old, new)])
+            if (update_fields is None or 'tags' in update_fields) and self.tags != (old_tags or ''):
+                tagging.sync([self])
+
+    def delete(self, *args, **kwargs):
+        """Delete the task and uncount it as stored, atomically."""
+        with transaction.atomic(using=kwargs.get('using')):
+            stored = Task.objects.select_for_update().filter(pk=self.pk).values_list('employee_id', 'status').first()
+            deleted = super().delete(*args, **kwargs)
+            counters.move([(stored, None)])
+        return deleted
+
+class Tag(models.Model):
+    """A normalized task tag."""
+    name = models.CharField(max_length=255, unique=True, help_text="Normalized (trimmed, lower-case) tag name.")
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        """String for representing the Tag object."""
+        return self.name
+
+class TaskTag(models.Model):
+    """Link between a task and one of its tags."""
+    task = models.ForeignKey(Task, related_name='task_tags', on_delete=models.CASCADE, help_text="Tagged task.")
+    tag = models.ForeignKey(Tag, related_name='task_tags', on_delete=models.CASCADE, help_text="Tag.")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'tag'], name='tasktag_task_tag_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['tag', 'task'], name='tasktag_tag_task_idx'),
+        ]
+
+class OverdueDigest(models.Model):
+    """An employee's overdue open tasks, materialized by ``manage.py overdue_digest`` (see ``todo.overdue``)."""
+    employee = models.OneToOneField(Employee, primary_key=True, related_name='overdue_digest', on_delete=models.CASCADE, help_text="Employee the digest is about.")
+    overdue_count = models.PositiveIntegerField(default=0, help_text="Open tasks past their due date.")
+    newly_overdue_count = models.PositiveIntegerField(default=0, help_text="Open tasks that became overdue since the previous run.")
+    oldest_due_date = models.DateTimeField(null=True, blank=True, help_text="Earliest due date among the overdue tasks.")
+    computed_at = models.DateTimeField(help_text="When the digest was computed.")
+
+    def __str__(self):
+        """String for representing the OverdueDigest object."""
+        return f"{self.employee_id}: {self.overdue_count} overdue"
+
+class Checkpoint(models.Model):
+    """How far an incremental job has got, by job name."""
+    name = models.CharField(max_length=100, unique=True, help_text="Job name.")
+    reached_at = models.DateTimeField(help_text="Time up to which the job has processed its input.")
+
+    def __str__(self):
+        """String for representing the Checkpoint object."""
+        return f"{self.name} @ {self.reached_at}"
+
 class Snippet(models.Model):
     """Model representing a code snippet related to a task."""
     task = models.ForeignKey('Task', related_name='snippets', on_delete=models.CASCADE, help_text="Task related to this snippet.")
     code = models.TextField(help_text="The code content of the snippet.")
-    language = models.CharField(choices=LANGUAGE_CHOICES, default='python', max_length=100, help_text="Programming language of the snippet.")
-    style = models.CharField(choices=STYLE_CHOICES, default='friendly', max_length=100, help_text="Style for code highlighting.")
+    language = models.CharField(choices=catalog.language_choices, default='python', max_length=100, help_text="Programming language of the snippet.")
+    style = models.CharField(choices=catalog.style_choices, default='friendly', max_length=100, help_text="Style for code highlighting.")
     linenos = models.BooleanField(default=False, help_text="Show line numbers in the highlighted code?")
     created = models.DateTimeField(auto_now_add=True, help_text="Snippet creation timestamp.")
+    updated = models.DateTimeField(auto_now=True, help_text="Snippet last update timestamp.")
+    highlighted_html = models.TextField(blank=True, editable=False, help_text="Stored full HTML rendering of the code.")
+    highlighted_body = models.TextField(blank=True, editable=False, help_text="Stored HTML rendering without the inline stylesheet.")
+    rendered_key = models.CharField(max_length=80, blank=True, editable=False, help_text="Render key of the stored HTML; empty while rendering is pending.")
+
+    RENDERED_FIELDS = ['highlighted_html', 'highlighted_body', 'rendered_key']
 
     class Meta:
-        ordering = ['created']
+        ordering = ['created', 'id']
+        indexes = [
+            models.Index(fields=['created', 'id'], name='snippet_created_id_idx'),
+            models.Index(fields=['language', 'created'], name='snippet_language_created_idx'),
+            models.Index(fields=['task', 'created'], name='snippet_task_created_idx'),
+        ]
         verbose_name = "Snippet"
         verbose_name_plural = "Snippets"
 
+    def save(self, *args, **kwargs):
+        """
+        Save the snippet, refreshing the stored HTML if the content changed.
+
+        Snippets longer than ``SNIPPET_INLINE_RENDER_MAX_CHARS`` are left
+        pending for the ``render_snippets --worker`` process instead.
+        """
+        key = self.render_key
+        stale_key = self.rendered_key
+        if key != stale_key:
+            if highlighting.renders_inline(self.code):
+                self.highlighted_html = highlighting.cached_render_html(self.code, self.language, self.style, self.linenos)
+                self.highlighted_body = highlighting.render_body_html(self.code, self.language, self.style, self.linenos)
+                self.rendered_key = key
+            else:
+                self.highlighted_html = self.highlighted_body = self.rendered_key = ''
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, *self.RENDERED_FIELDS}
+        super().save(*args, **kwargs)
+        if stale_key and stale_key != key:
+            highlighting.evict(stale_key)
+
+    def delete(self, *args, **kwargs):
+        """Delete the snippet and evict its cached rendering."""
+        highlighting.evict(self.render_key)
+        return super().delete(*args, **kwargs)
+
+    @property
+    def render_key(self):
+        """Content-addressed cache key of the highlighted HTML."""
+        return highlighting.render_key(self.code, self.language, self.style, self.linenos)
+
+    @property
+    def stored_highlighted(self):
+        """The stored HTML if it matches the current content, else None."""
+        if self.rendered_key and self.rendered_key == self.render_key:
+            return self.highlighted_html
+        return None
+
     @property
     def highlighted(self):
-        """Returns the highlighted HTML representation of the code snippet."""
-        lexer = get_lexer_by_name(self.language)
-        formatter = HtmlFormatter(style=self.style, full=True, linenos=self.linenos)
-        return highlight(self.code, lexer, formatter)
\ No newline at end of file
+        """
+        Returns the highlighted HTML representation of the code snippet.
+
+        None while a snippet too long to render inline waits for the render
+        worker, unless its rendering is cached.
+        """
+        stored = self.stored_highlighted
+        if stored is not None:
+            return stored
+        return highlighting.cached_render_html(
+            self.code, self.language, self.style, self.linenos, render_missing=highlighting.renders_inline(self.code),
+        )
+
+    @property
+    def highlighted_fragment(self):
+        """Body-only highlighted HTML, styled by ``highlighting.style_css(self.style)``; None like ``highlighted``."""
+        if self.rendered_key and self.rendered_key == self.render_key:
+            return self.highlighted_body
+        return highlighting.cached_render_html(
+            self.code, self.language, self.style, self.linenos, full=False,
+            render_missing=highlighting.renders_inline(self.code),
+        )
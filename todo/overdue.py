@@ -0,0 +1,106 @@
+"""
+Overdue and due-soon tasks.
+
+A task is overdue when it is open (not ``completed``) and its ``due_date`` has
+passed. ``overdue()`` and ``due_within()`` express that in SQL, served by the
+partial ``(due_date) WHERE NOT completed`` indexes, and back the ``?overdue=``
+and ``?due_within=`` task filters.
+
+``refresh_digests()`` (``manage.py overdue_digest``, run periodically)
+materializes one ``OverdueDigest`` row per employee with overdue tasks. It is
+incremental: the ``overdue_digest`` ``Checkpoint`` holds the time of the
+previous run, and only employees with a task whose due date passed since then,
+or who already had a digest, are recomputed. Digests of employees with nothing
+overdue any more are deleted. A due date moved into the past, or an overdue
+task reassigned to an employee without a digest, shows up at that employee's
+next crossing or on a ``--full`` run.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from . import models
+
+CHECKPOINT = 'overdue_digest'
+CHUNK_SIZE = 500
+# Largest ``due_within`` accepted; far beyond it ``timedelta`` overflows.
+MAX_DUE_WITHIN_DAYS = 36500
+
+
+def overdue(queryset, now=None):
+    """Open tasks of ``queryset`` due before ``now``."""
+    return queryset.filter(completed=False, due_date__lt=now or timezone.now())
+
+
+def due_within(queryset, days, now=None):
+    """Open tasks of ``queryset`` due in the next ``days`` days (not yet overdue)."""
+    now = now or timezone.now()
+    return queryset.filter(completed=False, due_date__gte=now, due_date__lt=now + timedelta(days=float(days)))
+
+
+def is_overdue(task, now=None):
+    """Whether ``task`` is overdue; the Python counterpart of ``overdue()``."""
+    return bool(task.due_date and not task.completed and task.due_date < (now or timezone.now()))
+
+
+def per_employee(queryset):
+    """Return ``{employee_id: (count, earliest due date)}`` for ``queryset``."""
+    rows = queryset.exclude(employee=None).values('employee').annotate(
+        count=Count('id'), oldest=Min('due_date'),
+    ).order_by()
+    return {row['employee']: (row['count'], row['oldest']) for row in rows}
+
+
+def refresh_digests(now=None, full=False):
+    """
+    Bring the ``OverdueDigest`` rows up to ``now`` and move the checkpoint.
+
+    ``full`` recomputes every employee instead of those affected since the
+    previous run. Returns a summary of the run.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        checkpoint = models.Checkpoint.objects.filter(name=CHECKPOINT).first()
+        since = checkpoint.reached_at if checkpoint else None
+        crossed = overdue(models.Task.objects.all(), now)
+        if since is not None:
+            crossed = crossed.filter(due_date__gte=since)
+        newly = {employee_id: count for employee_id, (count, _) in per_employee(crossed).items()}
+        existing = set(models.OverdueDigest.objects.values_list('employee_id', flat=True))
+        if full or since is None:
+            current = per_employee(overdue(models.Task.objects.all(), now))
+            affected = existing | set(current)
+        else:
+            affected = sorted(existing | set(newly))
+            current = {}
+            for start in range(0, len(affected), CHUNK_SIZE):
+                chunk = affected[start:start + CHUNK_SIZE]
+                current.update(per_employee(overdue(models.Task.objects.filter(employee__in=chunk), now)))
+        models.OverdueDigest.objects.bulk_create(
+            [
+                models.OverdueDigest(
+                    employee_id=employee_id, overdue_count=count, newly_overdue_count=newly.get(employee_id, 0),
+                    oldest_due_date=oldest, computed_at=now,
+                )
+                for employee_id, (count, oldest) in current.items()
+            ],
+            batch_size=CHUNK_SIZE,
+            update_conflicts=True,
+            unique_fields=['employee'],
+            update_fields=['overdue_count', 'newly_overdue_count', 'oldest_due_date', 'computed_at'],
+        )
+        cleared = sorted(set(affected) - set(current))
+        for start in range(0, len(cleared), CHUNK_SIZE):
+            models.OverdueDigest.objects.filter(employee__in=cleared[start:start + CHUNK_SIZE]).delete()
+        models.Checkpoint.objects.update_or_create(name=CHECKPOINT, defaults={'reached_at': now})
+    return {
+        'since': since,
+        'until': now,
+        'newly_overdue': sum(newly.values()),
+        'recomputed': len(affected),
+        'digests': len(current),
+        'cleared': len(cleared),
+    }
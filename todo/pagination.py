@@ -0,0 +1,203 @@
+"""
+Pagination for the todo app.
+
+List endpoints keep page-number pagination by default. Clients paging through
+large tables can switch to keyset (cursor) pagination with
+``?pagination=cursor`` and then follow the ``next`` links, which seek on all
+the ordering columns (``(created_at, id) > (x, y)``) instead of scanning past
+an OFFSET. ``?count=false`` skips the ``COUNT(*)`` query in page-number mode.
+"""
+
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.template import loader
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class RowValueCursorPagination(CursorPagination):
+    """
+    ``CursorPagination`` seeking on every ordering column.
+
+    DRF's cursor holds the value of the first ordering column only, filters on
+    it and skips the rows sharing it with an OFFSET, which degrades to offset
+    scans when many rows share a timestamp (bulk imports). Here the cursor
+    position holds the values of all ordering columns, which must be unique
+    together, and a page starts at ``(a, b) > (x, y)``, written as
+    ``a >= x AND (a > x OR (a = x AND b > y))`` so the composite index serves
+    the seek. Positions never tie, so the cursor offset stays 0.
+    """
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            values.append(str(instance[name] if isinstance(instance, dict) else getattr(instance, name)))
+        return json.dumps(values)
+
+    def seek(self, position, reverse):
+        """Return the condition selecting the rows after ``position`` (before it if ``reverse``)."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        columns = [
+            (field.lstrip('-'), value, 'lt' if field.startswith('-') != reverse else 'gt')
+            for field, value in zip(self.ordering, values)
+        ]
+        condition = None
+        for name, value, lookup in reversed(columns):
+            after = Q(**{f'{name}__{lookup}': value})
+            condition = after if condition is None else after | (Q(**{name: value}) & condition)
+        name, value, lookup = columns[0]
+        return Q(**{f'{name}__{lookup}e': value}) & condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """DRF's ``paginate_queryset`` with the row-value seek in place of the first-column filter."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        offset, reverse, current_position = self.cursor or (0, False, None)
+        queryset = queryset.order_by(*(_reverse_ordering(self.ordering) if reverse else self.ordering))
+        if current_position is not None:
+            queryset = queryset.filter(self.seek(current_position, reverse))
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = results[:self.page_size]
+        following_position = None
+        if len(results) > len(self.page):
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        has_current = current_position is not None or offset > 0
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = has_current, following_position is not None
+            self.next_position, self.previous_position = current_position, following_position
+        else:
+            self.has_next, self.has_previous = following_position is not None, has_current
+            self.next_position, self.previous_position = following_position, current_position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in cursor mode and count-free pages.
+
+    Subclasses set ``cursor_ordering`` to the unique, indexed ordering the
+    cursor seeks on.
+    """
+    cursor_ordering = None
+    mode_query_param = 'pagination'
+    count_query_param = 'count'
+
+    def __init__(self):
+        self.cursor_paginator = None
+        self.count_free = False
+
+    def wants_cursor(self, request):
+        """Return True if the request asks for cursor pagination."""
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or CursorPagination.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate with a cursor, without a count, or by page number."""
+        if self.cursor_ordering and self.wants_cursor(request):
+            self.cursor_paginator = RowValueCursorPagination()
+            self.cursor_paginator.ordering = self.cursor_ordering
+            self.cursor_paginator.page_size = self.get_page_size(request)
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        if request.query_params.get(self.count_query_param, '').lower() in ('false', '0'):
+            return self.paginate_without_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def paginate_without_count(self, queryset, request):
+        """Return one page by fetching ``page_size + 1`` rows instead of counting."""
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        page_number = request.query_params.get(self.page_query_param, 1)
+        try:
+            self.page_number = int(page_number)
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message='Invalid page.'))
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and self.page_number > 1:
+            raise NotFound(self.invalid_page_message.format(page_number=self.page_number, message='That page contains no results'))
+        self.count_free = True
+        self.has_next = len(rows) > page_size
+        self.request = request
+        return rows[:page_size]
+
+    def get_paginated_response(self, data):
+        """Return the response envelope for the active pagination mode."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        if self.count_free:
+            return Response(OrderedDict([
+                ('next', self.get_next_link()),
+                ('previous', self.get_previous_link()),
+                ('results', data),
+            ]))
+        return super().get_paginated_response(data)
+
+    def get_next_link(self):
+        """Return the next page link, also for count-free pages."""
+        if not self.count_free:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        """Return the previous page link, also for count-free pages."""
+        if not self.count_free:
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_html_context(self):
+        """Delegate the browsable API page controls to the active mode."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_html_context()
+        if self.count_free:
+            return {'previous_url': self.get_previous_link(), 'next_url': self.get_next_link()}
+        return super().get_html_context()
+
+    def to_html(self):
+        """Render the browsable API page controls for the active mode."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        if self.count_free:
+            template = loader.get_template('rest_framework/pagination/previous_and_next.html')
+            return template.render(self.get_html_context())
+        return super().to_html()
+
+
+class TaskPagination(KeysetPagination):
+    """Pagination for tasks, seeking on ``(created_at, id)``."""
+    cursor_ordering = ('created_at', 'id')
+
+
+class SnippetPagination(KeysetPagination):
+    """Pagination for snippets, seeking on ``(created, id)``."""
+    cursor_ordering = ('created', 'id')
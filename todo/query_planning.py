@@ -0,0 +1,103 @@
+"""
+Derive select_related/prefetch_related calls from a serializer's fields.
+
+Relational fields are inspected directly. ``SerializerMethodField``s cannot be
+introspected, so serializers declare what they touch in ``Meta.eager_loading``,
+mapping the field name to a relation path or a ``Prefetch`` object.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+from . import fieldsets
+
+
+def _relation_for(model, source):
+    """Return the model field for the first hop of ``source``, or None."""
+    name = source.split('.')[0]
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def _needs_related_object(field):
+    """Return True if rendering ``field`` dereferences the related object."""
+    if isinstance(field, serializers.ManyRelatedField):
+        field = field.child_relation
+    if isinstance(field, serializers.RelatedField):
+        return not field.use_pk_only_optimization()
+    return isinstance(field, serializers.BaseSerializer)
+
+
+def plan_for(serializer_class, field_names=None, fields=None):
+    """
+    Return ``(select_related, prefetch_related)`` lookups for a serializer.
+
+    When ``field_names`` is given, only those fields are considered. ``fields``
+    replaces the serializer's own fields, e.g. those of a serializer pruned
+    and expanded by ``todo.fieldsets``; hints do not apply to expanded ones.
+    """
+    model = serializer_class.Meta.model
+    hints = getattr(serializer_class.Meta, 'eager_loading', {})
+    select, prefetch = [], []
+    if fields is None:
+        fields = serializer_class().fields
+    for name, field in fields.items():
+        if field.write_only or (field_names is not None and name not in field_names):
+            continue
+        if name in hints and not isinstance(field, serializers.BaseSerializer):
+            lookup = hints[name]
+            if isinstance(lookup, Prefetch):
+                prefetch.append(lookup)
+            else:
+                relation = _relation_for(model, lookup)
+                if relation is not None and relation.concrete and not relation.many_to_many:
+                    select.append(lookup)
+                else:
+                    prefetch.append(lookup)
+            continue
+        if not _needs_related_object(field) or field.source == '*':
+            continue
+        relation = _relation_for(model, field.source)
+        if relation is None or not relation.is_relation:
+            continue
+        if relation.many_to_one or (relation.one_to_one and relation.concrete):
+            select.append(field.source.replace('.', '__'))
+        else:
+            prefetch.append(field.source.replace('.', '__'))
+    return select, prefetch
+
+
+def apply_plan(queryset, serializer_class, field_names=None, fields=None):
+    """Apply the eager loading plan of ``serializer_class`` to ``queryset``."""
+    select, prefetch = plan_for(serializer_class, field_names, fields)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class QueryPlanMixin:
+    """
+    ViewSet mixin that eager-loads the relations its serializer renders.
+
+    With ``?fields=`` or ``?expand=`` (see ``todo.fieldsets``) the plan covers
+    only the requested fields, and only their columns are loaded.
+    """
+
+    def get_queryset(self):
+        """Return the base queryset with the serializer's loading plan applied."""
+        serializer_class = self.get_serializer_class()
+        names, expand = fieldsets.requested(getattr(self, 'request', None), serializer_class)
+        if names is None and not expand:
+            return apply_plan(super().get_queryset(), serializer_class)
+        fields = self.get_serializer().fields
+        queryset = apply_plan(super().get_queryset(), serializer_class, fields=fields)
+        if names is not None:
+            needed = fieldsets.columns(serializer_class, fields)
+            if needed is not None:
+                queryset = queryset.only(*needed, *fieldsets.paging_columns(self))
+        return queryset
@@ -0,0 +1,253 @@
+"""
+Fast read path for list and retrieve endpoints.
+
+A reader produces the same dicts as a ModelSerializer, field for field and in
+the same order, but from ``.values()`` rows instead of model instances. The
+serializer's fields are inspected once per request to build a plan: plain
+columns are copied through, hyperlinks are formatted from a URL template
+reversed once per request, and method fields are implemented by the reader
+from joined columns or one extra query per page.
+"""
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from rest_framework import serializers
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from . import fieldsets, highlighting, metrics
+from .models import Task
+from .serializers import EmployeeSerializer, SnippetSerializer, TaskSerializer
+
+URL_SENTINEL = '__lookup__'
+
+# Fields whose to_representation() returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+def url_template(view_name, lookup_url_kwarg, request, format=None):
+    """Reverse ``view_name`` once; return a function formatting it for a lookup value."""
+    url = reverse(view_name, kwargs={lookup_url_kwarg: URL_SENTINEL}, request=request, format=format)
+    prefix, _, suffix = str(url).rpartition(URL_SENTINEL)
+    return lambda value: f'{prefix}{value}{suffix}'
+
+
+class ValuesReader:
+    """
+    Build serializer-identical representations from ``.values()`` rows.
+
+    Subclasses set ``serializer_class`` and implement method fields (or
+    override any other field) as ``read_<field name>(row)``, listing the
+    columns they need in ``field_columns``.
+    """
+    serializer_class = None
+    field_columns = {}
+
+    def __init__(self, request, format=None):
+        self.request = request
+        self.format = format
+        self.columns = []
+        self.plan = []
+        serializer = self.serializer_class(context={'request': request, 'format': format})
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+            self.plan.append((name, self.getter_for(name, field)))
+        self.names = {name for name, _ in self.plan}
+
+    def add_column(self, column):
+        """Select ``column`` in the values query."""
+        if column not in self.columns:
+            self.columns.append(column)
+
+    def getter_for(self, name, field):
+        """Return a function producing the representation of ``field`` from a row."""
+        if isinstance(field, serializers.SerializerMethodField) or hasattr(self, f'read_{name}'):
+            for column in self.field_columns.get(name, ()):
+                self.add_column(column)
+            return getattr(self, f'read_{name}')
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            self.add_column(field.lookup_field)
+            return self.hyperlink_getter(field, field.lookup_field)
+        if isinstance(field, serializers.HyperlinkedRelatedField):
+            column = f'{field.source}_id' if field.lookup_field == 'pk' else f'{field.source}__{field.lookup_field}'
+            self.add_column(column)
+            return self.hyperlink_getter(field, column)
+        column = field.source.replace('.', '__')
+        self.add_column(column)
+        if isinstance(field, serializers.FileField):
+            storage = self.serializer_class.Meta.model._meta.get_field(column).storage
+            build_absolute_uri = self.request.build_absolute_uri
+            return lambda row: build_absolute_uri(storage.url(row[column])) if row[column] else None
+        if type(field) in PASSTHROUGH_FIELDS:
+            return lambda row: row[column]
+        to_representation = field.to_representation
+        return lambda row: None if row[column] is None else to_representation(row[column])
+
+    def hyperlink_getter(self, field, column):
+        """Return a getter formatting ``column`` into ``field``'s URL."""
+        format = self.format
+        if format and field.format and field.format != format:
+            format = field.format
+        template = url_template(field.view_name, field.lookup_url_kwarg, self.request, format)
+        return lambda row: None if row[column] is None else template(row[column])
+
+    def values(self, queryset):
+        """Return ``queryset`` as a values queryset with the columns this reader needs."""
+        return queryset.select_related(None).prefetch_related(None).values(*self.columns)
+
+    def prepare(self, rows):
+        """Hook to load data for a page of rows with additional queries."""
+
+    async def aprepare(self, rows):
+        """Async counterpart of ``prepare``."""
+
+    def build(self, rows):
+        """Return the representations of prepared ``rows``."""
+        plan = self.plan
+        with metrics.phase('serialize'):
+            return [{name: getter(row) for name, getter in plan} for row in rows]
+
+    def represent(self, rows):
+        """Return the representations of ``rows``."""
+        rows = list(rows)
+        self.prepare(rows)
+        return self.build(rows)
+
+    async def arepresent(self, rows):
+        """Return the representations of an async-iterable values queryset."""
+        rows = [row async for row in rows]
+        await self.aprepare(rows)
+        return self.build(rows)
+
+
+class TaskReader(ValuesReader):
+    """Fast reader producing ``TaskSerializer`` output."""
+    serializer_class = TaskSerializer
+    field_columns = {'employee_info': ('employee_id', 'employee__name')}
+
+    def __init__(self, request, format=None):
+        self.employee_url = url_template('employee-detail', 'pk', request)
+        super().__init__(request, format)
+
+    def read_employee_info(self, row):
+        """Same as ``TaskSerializer.get_employee_info``."""
+        if row['employee_id'] is None:
+            return None
+        return {'name': row['employee__name'], 'url': self.employee_url(row['employee_id'])}
+
+
+class EmployeeReader(ValuesReader):
+    """Fast reader producing ``EmployeeSerializer`` output."""
+    serializer_class = EmployeeSerializer
+    field_columns = {'tasks': ('id',), 'profile_thumbnail': ('id', 'profile_picture')}
+
+    def __init__(self, request, format=None):
+        self.task_url = url_template('task-detail', 'pk', request)
+        self.picture_url = url_template('employee-picture', 'pk', request)
+        self.tasks_by_employee = {}
+        super().__init__(request, format)
+
+    def tasks_query(self, rows):
+        """Return the tasks of the employees in ``rows`` and reset the mapping."""
+        self.tasks_by_employee = {row['id']: [] for row in rows}
+        return Task.objects.filter(employee_id__in=list(self.tasks_by_employee)).values_list('employee_id', 'id', 'title')
+
+    def add_task(self, employee_id, task_id, title):
+        """Append one task to its employee's nested list."""
+        self.tasks_by_employee[employee_id].append({'name': title, 'url': self.task_url(task_id)})
+
+    def prepare(self, rows):
+        """Load the tasks of every employee on the page with one query, if rendered."""
+        if 'tasks' in self.names:
+            for task in self.tasks_query(rows):
+                self.add_task(*task)
+
+    async def aprepare(self, rows):
+        """Load the tasks of every employee on the page with one query, if rendered."""
+        if 'tasks' in self.names:
+            async for task in self.tasks_query(rows):
+                self.add_task(*task)
+
+    def read_tasks(self, row):
+        """Same as ``EmployeeSerializer.get_tasks``."""
+        return self.tasks_by_employee.get(row['id'], [])
+
+    def read_profile_thumbnail(self, row):
+        """Same as ``EmployeeSerializer.get_profile_thumbnail``."""
+        if not row['profile_picture']:
+            return None
+        return self.picture_url(row['id']) + '?size=small'
+
+
+class SnippetReader(ValuesReader):
+    """Fast reader producing ``SnippetSerializer`` output."""
+    serializer_class = SnippetSerializer
+    field_columns = {'highlighted': ('code', 'language', 'style', 'linenos', 'rendered_key', 'highlighted_html')}
+
+    def read_highlighted(self, row):
+        """Same as ``Snippet.stored_highlighted``."""
+        key = row['rendered_key']
+        if key and key == highlighting.render_key(row['code'], row['language'], row['style'], row['linenos']):
+            return row['highlighted_html']
+        return None
+
+
+class FastReadMixin:
+    """
+    ViewSet mixin serving list and retrieve through ``reader_class``.
+
+    Disabled with ``TODO_FAST_READERS = False`` in settings.
+    """
+    reader_class = None
+
+    def get_reader(self):
+        """Return a reader for this request, or None to use the serializer (also for ``?expand=``)."""
+        if self.reader_class is None or not getattr(settings, 'TODO_FAST_READERS', True):
+            return None
+        if fieldsets.requested(self.request, self.get_serializer_class())[1]:
+            return None
+        return self.reader_class(self.request, self.format_kwarg)
+
+    def list(self, request, *args, **kwargs):
+        """List through the reader, paginating the values queryset."""
+        reader = self.get_reader()
+        if reader is None:
+            return super().list(request, *args, **kwargs)
+        for column in fieldsets.paging_columns(self):
+            reader.add_column(column)
+        rows = reader.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(reader.represent(page))
+        return Response(reader.represent(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve through the reader with a single values query."""
+        reader = self.get_reader()
+        if reader is None or self.has_object_permissions():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            rows = reader.represent(reader.values(queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]}))[:1])
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if not rows:
+            raise Http404
+        return Response(rows[0])
+
+    def has_object_permissions(self):
+        """Return True if a permission class implements object-level checks."""
+        return any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
@@ -0,0 +1,97 @@
+"""
+Read replica routing.
+
+``ReplicaRouter`` (in ``DATABASE_ROUTERS``) sends reads of the todo app's
+models to one of the ``TODO_READ_REPLICAS`` aliases while ``reading()`` is
+active; every other read, and every write, goes to ``default``.
+``ReplicaReadMixin`` makes the API viewsets serve safe-method requests inside
+``reading()``.
+
+Replicas lag behind the primary, so a client that has just written is
+pinned to the primary for ``TODO_REPLICA_PIN_SECONDS`` by a cookie and reads
+its own writes. With no replicas configured everything uses ``default``.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'todo_db_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+read_from_replica = ContextVar('todo_read_from_replica', default=False)
+
+
+def replica_aliases():
+    """Return the configured read replica aliases."""
+    return getattr(settings, 'TODO_READ_REPLICAS', [])
+
+
+def pin_seconds():
+    """How long a client reads from the primary after writing."""
+    return getattr(settings, 'TODO_REPLICA_PIN_SECONDS', 5)
+
+
+def is_pinned(request):
+    """Whether ``request`` comes from a client that wrote recently."""
+    return PIN_COOKIE in request.COOKIES
+
+
+@contextmanager
+def reading(request):
+    """Route the reads made in the block to a replica if ``request`` may use one."""
+    token = read_from_replica.set(
+        bool(replica_aliases()) and request.method in SAFE_METHODS and not is_pinned(request)
+    )
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+def pin(response):
+    """Pin the client that received ``response`` to the primary for a while."""
+    if replica_aliases() and pin_seconds():
+        response.set_cookie(PIN_COOKIE, '1', max_age=pin_seconds(), httponly=True, samesite='Lax')
+    return response
+
+
+class ReplicaRouter:
+    """Database router sending reads inside ``reading()`` to a random replica."""
+
+    def db_for_read(self, model, **hints):
+        """Sessions, users and tokens are always read from the primary, which wrote them."""
+        if read_from_replica.get() and model._meta.app_label == 'todo':
+            aliases = replica_aliases()
+            if aliases:
+                return random.choice(aliases)
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Replicas hold the same data as the primary."""
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        """Only the primary is migrated; replicas follow it."""
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin serving safe requests from a read replica.
+
+    Successful writes pin the client to the primary (see ``pin()``).
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with reading(request):
+            response = super().dispatch(request, *args, **kwargs)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin(response)
+        return response
@@ -0,0 +1,17 @@
+"""Routers for the todo app."""
+
+from rest_framework.routers import DefaultRouter
+
+
+class BulkRouter(DefaultRouter):
+    """
+    DefaultRouter that also routes PATCH and DELETE on the list URL.
+
+    They map to ``bulk_update`` and ``bulk_destroy``, and are only exposed for
+    viewsets that implement them.
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, 'patch': 'bulk_update', 'delete': 'bulk_destroy'})
+        if route.name == '{basename}-list' else route
+        for route in DefaultRouter.routes
+    ]
@@ -0,0 +1,246 @@
+"""
+Full-text search over task titles/descriptions and snippet code.
+
+The search endpoint goes through a backend chosen by ``TODO_SEARCH_BACKEND``
+(a dotted path), or by database vendor when unset:
+
+* ``SQLiteFTSBackend`` queries FTS5 external-content tables over
+  ``todo_task`` and ``todo_snippet``. Triggers created by migration keep
+  them in sync with every write, bulk and raw SQL included. Results are
+  ranked with bm25, title matches weighing most.
+* ``DatabaseBackend`` works anywhere with ``icontains`` scans. It is meant
+  as the fallback for databases without a dedicated backend yet.
+
+Queries are whitespace-separated terms that must all match; a term ending
+in ``*`` matches as a prefix. Highlights are HTML-escaped text with matches
+wrapped in ``<mark>``.
+"""
+
+import html
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from . import models
+
+KINDS = ('task', 'snippet')
+MARK_START, MARK_END = '\x02', '\x03'
+
+TASK_TABLE = 'todo_task_fts'
+SNIPPET_TABLE = 'todo_snippet_fts'
+
+
+def parse_query(query):
+    """Split a query into ``(term, is_prefix)`` pairs."""
+    terms = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*')
+        if word:
+            terms.append((word, prefix))
+    return terms
+
+
+def marked_html(text):
+    """Escape ``text`` and turn the private match markers into ``<mark>`` tags."""
+    return html.escape(text or '').replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+class SearchBackend:
+    """Interface of the search backends."""
+
+    def suspend(self):
+        """Stop maintaining the index on writes until ``reindex()`` (for bulk loads)."""
+
+    def search(self, query, kinds=KINDS, limit=20, offset=0):
+        """
+        Return ``(count, hits)`` for ``query``, best first.
+
+        Each hit is a dict with ``type``, ``id``, ``score`` and
+        ``highlights`` plus ``title`` (tasks) or ``task_id``/``language``
+        (snippets).
+        """
+        raise NotImplementedError
+
+    def reindex(self):
+        """Rebuild the index from the tables; return a short summary."""
+        return "Nothing to reindex."
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Search through SQLite FTS5 tables kept in sync by triggers."""
+
+    INSTALL_SQL = [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {TASK_TABLE} USING fts5(
+            title, description, content='todo_task', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2')""",
+        f"""CREATE TRIGGER IF NOT EXISTS {TASK_TABLE}_ai AFTER INSERT ON todo_task BEGIN
+            INSERT INTO {TASK_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {TASK_TABLE}_ad AFTER DELETE ON todo_task BEGIN
+            INSERT INTO {TASK_TABLE}({TASK_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {TASK_TABLE}_au AFTER UPDATE OF title, description ON todo_task BEGIN
+            INSERT INTO {TASK_TABLE}({TASK_TABLE}, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO {TASK_TABLE}(rowid, title, description) VALUES (new.id, new.title, new.description);
+        END""",
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SNIPPET_TABLE} USING fts5(
+            code, content='todo_snippet', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2')""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SNIPPET_TABLE}_ai AFTER INSERT ON todo_snippet BEGIN
+            INSERT INTO {SNIPPET_TABLE}(rowid, code) VALUES (new.id, new.code);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SNIPPET_TABLE}_ad AFTER DELETE ON todo_snippet BEGIN
+            INSERT INTO {SNIPPET_TABLE}({SNIPPET_TABLE}, rowid, code) VALUES ('delete', old.id, old.code);
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {SNIPPET_TABLE}_au AFTER UPDATE OF code ON todo_snippet BEGIN
+            INSERT INTO {SNIPPET_TABLE}({SNIPPET_TABLE}, rowid, code) VALUES ('delete', old.id, old.code);
+            INSERT INTO {SNIPPET_TABLE}(rowid, code) VALUES (new.id, new.code);
+        END""",
+    ]
+    DROP_TRIGGERS_SQL = [
+        f'DROP TRIGGER IF EXISTS {table}_{suffix}' for table in (TASK_TABLE, SNIPPET_TABLE) for suffix in ('ai', 'ad', 'au')
+    ]
+    DROP_SQL = [
+        *DROP_TRIGGERS_SQL,
+        f'DROP TABLE IF EXISTS {TASK_TABLE}',
+        f'DROP TABLE IF EXISTS {SNIPPET_TABLE}',
+    ]
+
+    @staticmethod
+    def match_expression(query):
+        """Build an FTS5 MATCH expression with every term quoted, so input is never FTS syntax."""
+        parts = []
+        for term, prefix in parse_query(query):
+            quoted = '"{}"'.format(term.replace('"', '""'))
+            parts.append(f'{quoted}*' if prefix else quoted)
+        return ' '.join(parts)
+
+    def search(self, query, kinds=KINDS, limit=20, offset=0):
+        expression = self.match_expression(query)
+        if not expression:
+            return 0, []
+        marks = f"'{MARK_START}', '{MARK_END}'"
+        statements = {
+            'task': (
+                f"""SELECT rowid, -bm25({TASK_TABLE}, 10.0, 1.0), title,
+                    highlight({TASK_TABLE}, 0, {marks}), snippet({TASK_TABLE}, 1, {marks}, '…', 16)
+                FROM {TASK_TABLE} WHERE {TASK_TABLE} MATCH %s ORDER BY 2 DESC LIMIT %s""",
+                lambda row: {
+                    'type': 'task', 'id': row[0], 'score': row[1], 'title': row[2],
+                    'highlights': {'title': marked_html(row[3]), 'description': marked_html(row[4])},
+                },
+            ),
+            'snippet': (
+                f"""SELECT f.rowid, -bm25({SNIPPET_TABLE}), s.task_id, s.language,
+                    snippet({SNIPPET_TABLE}, 0, {marks}, '…', 16)
+                FROM {SNIPPET_TABLE} f JOIN todo_snippet s ON s.id = f.rowid
+                WHERE {SNIPPET_TABLE} MATCH %s ORDER BY 2 DESC LIMIT %s""",
+                lambda row: {
+                    'type': 'snippet', 'id': row[0], 'score': row[1], 'task_id': row[2], 'language': row[3],
+                    'highlights': {'code': marked_html(row[4])},
+                },
+            ),
+        }
+        tables = {'task': TASK_TABLE, 'snippet': SNIPPET_TABLE}
+        count, hits = 0, []
+        with connection.cursor() as cursor:
+            for kind in kinds:
+                sql, to_hit = statements[kind]
+                cursor.execute(f'SELECT count(*) FROM {tables[kind]} WHERE {tables[kind]} MATCH %s', [expression])
+                count += cursor.fetchone()[0]
+                cursor.execute(sql, [expression, offset + limit])
+                hits.extend(to_hit(row) for row in cursor.fetchall())
+        hits.sort(key=lambda hit: -hit['score'])
+        for hit in hits:
+            hit['score'] = round(hit['score'], 4)
+        return count, hits[offset:offset + limit]
+
+    def suspend(self):
+        with connection.cursor() as cursor:
+            for statement in self.DROP_TRIGGERS_SQL:
+                cursor.execute(statement)
+
+    def reindex(self):
+        with connection.cursor() as cursor:
+            for statement in self.INSTALL_SQL:
+                cursor.execute(statement)
+            for table in (TASK_TABLE, SNIPPET_TABLE):
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {table}({table}) VALUES ('optimize')")
+        return f"Rebuilt {TASK_TABLE} and {SNIPPET_TABLE}."
+
+
+class DatabaseBackend(SearchBackend):
+    """Portable ``icontains`` search; newest first, scored by weighted term occurrences."""
+
+    def highlight(self, text, terms):
+        """Mark case-insensitive occurrences of ``terms`` in ``text``."""
+        if not text:
+            return ''
+        pattern = re.compile('|'.join(re.escape(term) for term, _ in terms), re.IGNORECASE)
+        return marked_html(pattern.sub(lambda match: f'{MARK_START}{match.group(0)}{MARK_END}', text))
+
+    def search(self, query, kinds=KINDS, limit=20, offset=0):
+        terms = parse_query(query)
+        if not terms:
+            return 0, []
+        task_filter, snippet_filter = Q(), Q()
+        for term, _ in terms:
+            task_filter &= Q(title__icontains=term) | Q(description__icontains=term)
+            snippet_filter &= Q(code__icontains=term)
+        count, hits = 0, []
+        if 'task' in kinds:
+            tasks = models.Task.objects.filter(task_filter).order_by('-pk')
+            count += tasks.count()
+            for pk, title, description in tasks.values_list('pk', 'title', 'description')[:offset + limit]:
+                score = sum(10 * title.lower().count(term.lower()) + description.lower().count(term.lower()) for term, _ in terms)
+                hits.append({
+                    'type': 'task', 'id': pk, 'score': score, 'title': title,
+                    'highlights': {'title': self.highlight(title, terms), 'description': self.highlight(description, terms)},
+                })
+        if 'snippet' in kinds:
+            snippets = models.Snippet.objects.filter(snippet_filter).order_by('-pk')
+            count += snippets.count()
+            for pk, task_id, language, code in snippets.values_list('pk', 'task_id', 'language', 'code')[:offset + limit]:
+                hits.append({
+                    'type': 'snippet', 'id': pk, 'score': sum(code.lower().count(term.lower()) for term, _ in terms),
+                    'task_id': task_id, 'language': language, 'highlights': {'code': self.highlight(code, terms)},
+                })
+        hits.sort(key=lambda hit: -hit['score'])
+        return count, hits[offset:offset + limit]
+
+
+@lru_cache(maxsize=None)
+def get_backend():
+    """Return the configured search backend instance."""
+    path = getattr(settings, 'TODO_SEARCH_BACKEND', None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == 'sqlite':
+        return SQLiteFTSBackend()
+    return DatabaseBackend()
+
+
+def install_sqlite_index(apps, schema_editor):
+    """Migration step creating (and filling) the FTS5 tables on SQLite."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLiteFTSBackend.INSTALL_SQL:
+        schema_editor.execute(statement)
+    for table in (TASK_TABLE, SNIPPET_TABLE):
+        schema_editor.execute(f"INSERT INTO {table}({table}) VALUES ('rebuild')")
+
+
+def drop_sqlite_index(apps, schema_editor):
+    """Migration step dropping the FTS5 tables and triggers on SQLite."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in SQLiteFTSBackend.DROP_SQL:
+        schema_editor.execute(statement)
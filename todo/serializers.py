@@ -1,12 +1,37 @@
-from datetime import date
+import os
+
+from django.db.models import Prefetch
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 
+from . import files, overdue
+from .bulk import PrefetchedHyperlinkedRelatedField
+from .fieldsets import SparseFieldsMixin
 from .models import Employee, Snippet, Task
 
-class EmployeeSerializer(serializers.HyperlinkedModelSerializer):
+def validate_upload_size(value):
+    """Reject uploads larger than ``TODO_MAX_UPLOAD_BYTES``."""
+    if value is not None and getattr(value, 'size', 0) > files.max_upload_bytes():
+        raise serializers.ValidationError(f"Files are limited to {files.max_upload_bytes()} bytes.")
+    return value
+
+class EmployeeSummarySerializer(serializers.HyperlinkedModelSerializer):
+    """Nested employee representation for ``?expand=employee``."""
+    class Meta:
+        model = Employee
+        fields = ['url', 'id', 'name', 'email', 'department']
+
+class TaskSummarySerializer(serializers.HyperlinkedModelSerializer):
+    """Nested task representation for ``?expand=task`` and ``?expand=tasks``."""
+    class Meta:
+        model = Task
+        fields = ['url', 'id', 'title', 'status', 'due_date', 'completed']
+
+class EmployeeSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """Serializer for Employee model."""
     tasks = serializers.SerializerMethodField()
+    profile_thumbnail = serializers.SerializerMethodField()
     class Meta:
         model = Employee
         fields = [
@@ -16,12 +41,23 @@ class EmployeeSerializer(serializers.HyperlinkedModelSerializer):
             'email',
             'birth_date',
             'profile_picture',
+            'profile_thumbnail',
             'bio',
             'is_active',
             'salary',
             'department',
             'tasks',
+            'todo_count',
+            'inprogress_count',
+            'done_count',
         ]
+        eager_loading = {
+            'tasks': Prefetch('tasks', queryset=Task.objects.only('id', 'title', 'employee')),
+        }
+        field_columns = {'tasks': (), 'profile_thumbnail': ('profile_picture',)}
+        expandable_fields = {
+            'tasks': lambda: TaskSummarySerializer(many=True, read_only=True),
+        }
     def get_tasks(self, obj):
         """Return a list of tasks for the employee."""
         request = self.context.get('request')
@@ -33,6 +69,17 @@ class EmployeeSerializer(serializers.HyperlinkedModelSerializer):
             for task in obj.tasks.all()
         ]
 
+    def get_profile_thumbnail(self, obj):
+        """Return the URL of the small profile picture thumbnail, if there is a picture."""
+        if not obj.profile_picture:
+            return None
+        request = self.context.get('request')
+        return reverse('employee-picture', args=[obj.pk], request=request) + '?size=small'
+
+    def validate_profile_picture(self, value):
+        """Validate the size of the uploaded picture."""
+        return validate_upload_size(value)
+
     def validate_email(self, value):
         """Validate that the email is a company email address."""
         if not value.endswith('@yourcompany.com'):
@@ -45,9 +92,9 @@ class EmployeeSerializer(serializers.HyperlinkedModelSerializer):
             raise serializers.ValidationError("Salary cannot be negative.")
         return value
 
-class TaskSerializer(serializers.HyperlinkedModelSerializer):
+class TaskSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """Serializer for Task model."""
-    employee = serializers.HyperlinkedRelatedField(
+    employee = PrefetchedHyperlinkedRelatedField(
         queryset=Employee.objects.all(),
         view_name='employee-detail'
     )
@@ -71,6 +118,11 @@ class TaskSerializer(serializers.HyperlinkedModelSerializer):
             'tags',
             'status',
         ]
+        eager_loading = {'employee_info': 'employee'}
+        field_columns = {'employee_info': ('employee', 'employee__name')}
+        expandable_fields = {
+            'employee': lambda: EmployeeSummarySerializer(read_only=True),
+        }
  
     def get_employee_info(self, obj):
         """Return employee info for the task."""
@@ -83,11 +135,21 @@ class TaskSerializer(serializers.HyperlinkedModelSerializer):
         return None
 
     def validate_due_date(self, value):
-        """Validate that the due date is not in the past."""
-        if value and value < date.today():
+        """Validate that the due date is not before today (in the current time zone)."""
+        if value and timezone.localdate(value) < timezone.localdate():
             raise serializers.ValidationError("Due date cannot be in the past.")
         return value
 
+    def validate_attachment(self, value):
+        """Validate the size of the uploaded attachment."""
+        return validate_upload_size(value)
+
+    def validate(self, attrs):
+        """Remember the client's name of an uploaded attachment."""
+        if 'attachment' in attrs:
+            attrs['attachment_name'] = os.path.basename(attrs['attachment'].name) if attrs['attachment'] else ''
+        return attrs
+
     def validate_priority(self, value):
         """Validate that the priority is between 1 and 5."""
         if not (1 <= value <= 5):
@@ -100,14 +162,11 @@ class TaskSerializer(serializers.HyperlinkedModelSerializer):
 
     def get_is_overdue(self, obj):
         """Return True if the task is overdue and not completed."""
-        from datetime import datetime
-        if obj.due_date and not obj.completed:
-            return obj.due_date < datetime.now()
-        return False
+        return overdue.is_overdue(obj)
 
-class SnippetSerializer(serializers.HyperlinkedModelSerializer):
+class SnippetSerializer(SparseFieldsMixin, serializers.HyperlinkedModelSerializer):
     """Serializer for Snippet model."""
-    highlighted = serializers.ReadOnlyField()
+    highlighted = serializers.ReadOnlyField(source='stored_highlighted')
     class Meta:
         model = Snippet
         fields = [
@@ -121,4 +180,8 @@ class SnippetSerializer(serializers.HyperlinkedModelSerializer):
             'created',
             'highlighted',
         ]
+        field_columns = {'highlighted': ('code', 'language', 'style', 'linenos', 'rendered_key', 'highlighted_html')}
+        expandable_fields = {
+            'task': lambda: TaskSummarySerializer(read_only=True),
+        }
         
\ No newline at end of file
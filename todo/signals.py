@@ -0,0 +1,45 @@
+"""Signal receivers of the todo app, connected in ``TodoConfig.ready``."""
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, thumbnails
+from .models import Employee
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Employee, dispatch_uid='todo.profile_thumbnails')
+def employee_saved(sender, instance, update_fields=None, **kwargs):
+    """Generate thumbnails of a newly saved profile picture once the transaction commits."""
+    if instance.profile_picture and (update_fields is None or 'profile_picture' in update_fields):
+        name = instance.profile_picture.name
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+
+
+@receiver(post_save, sender=User, dispatch_uid='todo.auth_cache_user_saved')
+@receiver(post_delete, sender=User, dispatch_uid='todo.auth_cache_user_deleted')
+def user_changed(sender, instance, **kwargs):
+    """Drop a changed user from the authentication cache, again once the change is visible."""
+    authentication.revoke_user(instance.pk)
+    transaction.on_commit(lambda: authentication.revoke_user(instance.pk))
+
+
+@receiver(m2m_changed, sender=User.groups.through, dispatch_uid='todo.auth_cache_user_groups')
+@receiver(m2m_changed, sender=User.user_permissions.through, dispatch_uid='todo.auth_cache_user_permissions')
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop users whose groups or permissions changed from the authentication cache."""
+    if not action.startswith('post_'):
+        return
+    pks = (pk_set or ()) if reverse else [instance.pk]
+    for pk in pks:
+        authentication.revoke_user(pk)
+
+
+@receiver(post_delete, sender=Token, dispatch_uid='todo.auth_cache_token_deleted')
+def token_deleted(sender, instance, **kwargs):
+    """Stop accepting a deleted token at once."""
+    authentication.revoke_token(instance.key)
@@ -0,0 +1,84 @@
+"""
+Content-addressed file storage.
+
+Uploads are stored as ``<upload_to>/<sha256><ext>``, so the same file
+uploaded twice is written once and both rows point at it. Because a name
+always holds the same bytes, the hash doubles as a strong ETag.
+"""
+
+import hashlib
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def file_hash(content):
+    """Return the SHA-256 hex digest of a Django ``File``, rewinding it afterwards."""
+    digest = hashlib.sha256()
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    if hasattr(content, 'seek'):
+        content.seek(0)
+    return digest.hexdigest()
+
+
+def content_hash(name):
+    """
+    Return the immutable identity of a stored ``name``, or None.
+
+    That is the hash stem, with any ``_<variant>`` suffix of derived files.
+    """
+    stem = os.path.splitext(os.path.basename(name or ''))[0]
+    digest = stem.partition('_')[0]
+    if len(digest) == 64 and all(char in '0123456789abcdef' for char in digest):
+        return stem
+    return None
+
+
+class ContentHashStorage(FileSystemStorage):
+    """``FileSystemStorage`` naming files by the SHA-256 of their content."""
+
+    def hashed_name(self, name, digest):
+        """Return the content-addressed name for ``name`` with ``digest``."""
+        directory, basename = os.path.split(name)
+        extension = os.path.splitext(basename)[1].lower()
+        return os.path.join(directory, f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        """
+        Store ``content`` under its hash name, unless that file already exists.
+
+        ``content.content_hash`` is used when set (streamed uploads hash while
+        receiving), otherwise the content is hashed here.
+        """
+        if name is None:
+            name = content.name
+        digest = getattr(content, 'content_hash', None) or file_hash(content)
+        name = self.hashed_name(name, digest)
+        if self.exists(name):
+            return name
+        return super().save(name, content, max_length=max_length)
+
+    def save_as(self, name, content):
+        """Store ``content`` under exactly ``name`` (for files derived from a hashed one)."""
+        return self._save(name, content)
+
+    def get_available_name(self, name, max_length=None):
+        """Keep hash names as they are; a concurrent writer stores the same bytes."""
+        return name
+
+    def _save(self, name, content):
+        """
+        Write to a unique temporary name, then rename into place.
+
+        Readers never see a partial file, and concurrent uploads of the same
+        content simply replace it with identical bytes.
+        """
+        partial = super()._save(f'{name}.{uuid.uuid4().hex}.part', content)
+        os.replace(self.path(partial), self.path(name))
+        return name.replace('\\', '/')
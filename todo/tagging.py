@@ -0,0 +1,75 @@
+"""
+Normalized task tags.
+
+``Task.tags`` stays the comma-separated string the API reads and writes,
+stored as entered. Each tag in it is also a ``Tag`` row, under its normalized
+name (trimmed, lower-cased, de-duplicated), linked through ``TaskTag``, so
+filtering by tag is a case-insensitive, indexed join instead of a ``LIKE``
+scan. ``Task.save`` and the ``TaskQuerySet`` bulk methods keep the links in
+step with the string.
+"""
+
+from . import models
+
+SEPARATOR = ','
+
+
+def parse(value):
+    """Split a comma-separated tag string into normalized, unique names."""
+    names = []
+    for part in (value or '').split(SEPARATOR):
+        name = part.strip().lower()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def tag_ids(names, create=False):
+    """Return ``{name: Tag id}`` for ``names``, creating missing tags if asked."""
+    names = set(names)
+    if not names:
+        return {}
+    if create:
+        models.Tag.objects.bulk_create([models.Tag(name=name) for name in names], ignore_conflicts=True)
+    return dict(models.Tag.objects.filter(name__in=names).values_list('name', 'id'))
+
+
+def sync(tasks, replace=True):
+    """
+    Replace the tag links of saved ``tasks`` with those in their ``tags`` strings.
+
+    Runs a fixed number of queries for the whole batch. ``replace=False`` skips
+    deleting existing links, for tasks that were just inserted.
+    """
+    tasks = [task for task in tasks if task.pk is not None]
+    if not tasks:
+        return
+    wanted = {task.pk: parse(task.tags) for task in tasks}
+    ids = tag_ids({name for names in wanted.values() for name in names}, create=True)
+    if replace:
+        models.TaskTag.objects.filter(task_id__in=list(wanted)).delete()
+    models.TaskTag.objects.bulk_create(
+        models.TaskTag(task_id=task_id, tag_id=ids[name])
+        for task_id, names in wanted.items()
+        for name in names
+    )
+
+
+def filter_tasks(queryset, names, match_all=True):
+    """
+    Restrict a task queryset to tasks tagged with all (or any) of ``names``.
+
+    Each condition is a ``pk IN (SELECT task_id ...)`` subquery answered from
+    the ``(tag, task)`` index.
+    """
+    names = parse(SEPARATOR.join(names))
+    if not names:
+        return queryset
+    ids = tag_ids(names)
+    if match_all:
+        if len(ids) < len(names):
+            return queryset.none()
+        for tag_id in ids.values():
+            queryset = queryset.filter(pk__in=models.TaskTag.objects.filter(tag_id=tag_id).values('task_id'))
+        return queryset
+    return queryset.filter(pk__in=models.TaskTag.objects.filter(tag_id__in=list(ids.values())).values('task_id'))
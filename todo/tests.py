@@ -1,7 +1,42 @@
 """Test suite for the todo app."""
 
-from django.test import TestCase
-from .models import Employee
+import base64
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone as django_timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from . import (
+    authentication, benchmarking, catalog, compression, fastjson, files, highlighting, metrics, overdue, replicas,
+    search, thumbnails, throttling,
+)
+from .management.commands.render_snippets import Command as RenderSnippetsCommand
+from .models import Employee, OverdueDigest, Snippet, Tag, Task
 
 class EmployeeModelTest(TestCase):
     """Test the Employee model."""
@@ -9,3 +44,1061 @@ class EmployeeModelTest(TestCase):
         """__str__ should return the employee's name."""
         employee = Employee.objects.create(name='John Doe', email='john@yourcompany.com')
         self.assertEqual(str(employee), 'John Doe')
+
+class EmployeeTaskCountersTest(TestCase):
+    """Test the per-employee task counters."""
+    def setUp(self):
+        self.jane = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        self.john = Employee.objects.create(name='John', email='john@yourcompany.com')
+
+    def counts(self, employee):
+        employee.refresh_from_db()
+        return employee.todo_count, employee.inprogress_count, employee.done_count
+
+    def test_saves_bulk_writes_and_deletes(self):
+        """Creates, status changes, reassignments and deletes move the counters."""
+        task = Task.objects.create(title='One', employee=self.jane)
+        Task.objects.bulk_create(Task(title=f'Bulk {n}', employee=self.jane, status='DONE') for n in range(3))
+        self.assertEqual(self.counts(self.jane), (1, 0, 3))
+        task.status = 'INPROGRESS'
+        task.save()
+        self.assertEqual(self.counts(self.jane), (0, 1, 3))
+        task.employee = self.john
+        task.save()
+        self.assertEqual((self.counts(self.jane), self.counts(self.john)), ((0, 0, 3), (0, 1, 0)))
+        done = list(Task.objects.filter(status='DONE'))
+        for item in done:
+            item.status = 'TODO'
+        Task.objects.bulk_update(done, ['status'])
+        self.assertEqual(self.counts(self.jane), (3, 0, 0))
+        Task.objects.filter(employee=self.jane).delete()
+        task.delete()
+        self.assertEqual((self.counts(self.jane), self.counts(self.john)), ((0, 0, 0), (0, 0, 0)))
+
+    def test_bulk_delete_groups_counter_updates(self):
+        """Deleting many tasks issues one counter UPDATE per (employee, status) change."""
+        Task.objects.bulk_create(
+            Task(title=f'Task {n}', employee=(self.jane, self.john)[n % 2], status=('TODO', 'DONE')[n % 3 == 0])
+            for n in range(60)
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            Task.objects.filter(title__startswith='Task').delete()
+        counter_updates = [q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "todo_employee"')]
+        self.assertLessEqual(len(counter_updates), 2)
+        self.assertEqual((self.counts(self.jane), self.counts(self.john)), ((0, 0, 0), (0, 0, 0)))
+
+    def test_save_update_fields_moves_only_written_counters(self):
+        """``save(update_fields=...)`` moves the counters only for the fields it writes."""
+        task = Task.objects.create(title='One', employee=self.jane)
+        task.status = 'DONE'
+        task.employee = self.john
+        task.title = 'Renamed'
+        task.save(update_fields=['title'])
+        self.assertEqual((self.counts(self.jane), self.counts(self.john)), ((1, 0, 0), (0, 0, 0)))
+        task.save(update_fields=['status'])
+        self.assertEqual((self.counts(self.jane), self.counts(self.john)), ((0, 0, 1), (0, 0, 0)))
+        task.save(update_fields=['employee'])
+        self.assertEqual((self.counts(self.jane), self.counts(self.john)), ((0, 0, 0), (0, 0, 1)))
+
+    def test_stale_employee_save_keeps_counters(self):
+        """Saving an employee loaded before its tasks changed does not overwrite the counters."""
+        jane = Employee.objects.get(pk=self.jane.pk)
+        Task.objects.create(title='One', employee=self.jane)
+        jane.bio = 'Updated'
+        jane.save()
+        self.assertEqual(self.counts(self.jane), (1, 0, 0))
+        self.assertEqual(self.jane.bio, 'Updated')
+
+    def test_stats_endpoint_and_rebuild(self):
+        """The stats action reads the counters; the command repairs drift."""
+        Task.objects.create(title='One', employee=self.jane, status='DONE')
+        Task.objects.create(title='Two', employee=self.john)
+        data = self.client.get('/api/employees/stats/').json()
+        self.assertEqual(data['totals'], {'TODO': 1, 'INPROGRESS': 0, 'DONE': 1})
+        self.assertEqual([(row['name'], row['DONE']) for row in data['results']], [('Jane', 1), ('John', 0)])
+        Task.objects.update(status='INPROGRESS')
+        with self.assertRaises(CommandError):
+            call_command('task_counters', verify=True, stdout=StringIO())
+        call_command('task_counters', stdout=StringIO())
+        self.assertEqual(self.counts(self.jane), (0, 1, 0))
+        call_command('task_counters', verify=True, stdout=StringIO())
+
+class TaskTagTest(TestCase):
+    """Test normalized tags and the tag filters."""
+    def setUp(self):
+        self.both = Task.objects.create(title='Both', tags=' Urgent,backend, urgent ')
+        self.urgent = Task.objects.create(title='Urgent', tags='urgent')
+        Task.objects.bulk_create([Task(title='Frontend', tags='frontend')])
+
+    def test_tags_are_normalized_and_linked(self):
+        """The string is kept as entered and mirrored as normalized Tag links, also on change."""
+        self.both.refresh_from_db()
+        self.assertEqual(self.both.tags, ' Urgent,backend, urgent ')
+        self.assertEqual(self.client.get(f'/api/tasks/{self.both.pk}/').json()['tags'], ' Urgent,backend, urgent ')
+        self.assertEqual(sorted(self.both.tag_set.values_list('name', flat=True)), ['backend', 'urgent'])
+        self.both.tags = 'backend'
+        self.both.save()
+        self.assertEqual(list(self.both.tag_set.values_list('name', flat=True)), ['backend'])
+        self.assertEqual(Tag.objects.get(name='frontend').tasks.get().title, 'Frontend')
+
+    def test_filters_match_all_or_any(self):
+        """?tags= requires every tag, ?tags_any= at least one."""
+        def titles(query):
+            return [task['title'] for task in self.client.get(f'/api/tasks/?{query}').json()['results']]
+        self.assertEqual(titles('tags=urgent,backend'), ['Both'])
+        self.assertEqual(titles('tags=URGENT'), ['Both', 'Urgent'])
+        self.assertEqual(titles('tags=urgent,missing'), [])
+        self.assertEqual(titles('tags_any=backend,frontend'), ['Both', 'Frontend'])
+        self.assertEqual(titles('tags_any=urgent&status=TODO'), ['Both', 'Urgent'])
+
+class SearchTest(TestCase):
+    """Test full-text search over tasks and snippets."""
+    def setUp(self):
+        self.report = Task.objects.create(title='Quarterly report', description='Collect the <numbers>.')
+        self.other = Task.objects.create(title='Standup', description='Talk about the quarterly report.')
+        Snippet.objects.create(task=self.report, code='def render_report():\n    return totals')
+
+    def search(self, query):
+        return self.client.get('/api/search/', {'q': query}).json()
+
+    def test_ranked_prefix_and_highlighted(self):
+        """Title matches rank first, prefixes match and highlights are escaped."""
+        data = self.search('quart* report')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([hit['id'] for hit in data['results'] if hit['type'] == 'task'], [self.report.pk, self.other.pk])
+        self.assertEqual(data['results'][0]['highlights']['title'], '<mark>Quarterly</mark> <mark>report</mark>')
+        self.assertIn('&lt;<mark>numbers</mark>&gt;', self.search('numbers')['results'][0]['highlights']['description'])
+        snippet = self.client.get('/api/search/', {'q': 'totals', 'type': 'snippet'}).json()['results'][0]
+        self.assertTrue(snippet['task'].endswith(f'/api/tasks/{self.report.pk}/'))
+
+    def test_offset_is_clamped(self):
+        """Offsets beyond ``max_offset`` are clamped like page sizes, not ranked through."""
+        data = self.client.get('/api/search/', {'q': 'report', 'offset': 10 ** 12}).json()
+        self.assertEqual((data['count'], data['results'], data['next']), (3, [], None))
+        self.assertIn('offset=980', data['previous'])
+
+    def test_portable_backend(self):
+        """The icontains fallback finds and marks the same tasks."""
+        count, hits = search.DatabaseBackend().search('quart* report', kinds=('task',))
+        self.assertEqual((count, hits[0]['id']), (2, self.report.pk))
+        self.assertEqual(hits[0]['highlights']['title'], '<mark>Quart</mark>erly <mark>report</mark>')
+
+    def test_index_follows_writes(self):
+        """Updates, deletes and quoted input are handled by the triggers and quoting."""
+        self.other.title = 'Retro'
+        self.other.description = ''
+        self.other.save()
+        self.assertEqual(self.search('standup')['count'], 0)
+        self.report.delete()
+        self.assertEqual(self.search('report')['count'], 0)
+        self.assertEqual(self.search('"retro OR')['count'], 0)
+        self.assertEqual(self.search('retro')['count'], 1)
+        call_command('reindex_search', stdout=StringIO())
+        self.assertEqual(self.search('retro')['count'], 1)
+
+class FileTransferTest(TestCase):
+    """Test deduplicated storage, streaming transfers and thumbnails."""
+    def setUp(self):
+        media = tempfile.TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        self.enterContext(override_settings(MEDIA_ROOT=media.name))
+        self.client.force_login(User.objects.create_superuser('admin', password='secret'))
+        self.tasks = [Task.objects.create(title=f'Task {n}') for n in range(2)]
+
+    def upload(self, url, body, name):
+        return self.client.put(f'{url}?filename={name}', body, content_type='application/octet-stream')
+
+    def test_uploads_are_deduplicated_and_ranged(self):
+        """Identical uploads share one file; downloads honour Range and ETags."""
+        body = bytes(range(256)) * 10
+        for task in self.tasks:
+            self.assertEqual(self.upload(f'/api/tasks/{task.pk}/attachment/', body, 'notes.bin').status_code, 200)
+        names = {task.attachment.name for task in Task.objects.all()}
+        self.assertEqual(len(names), 1)
+        self.assertEqual(os.listdir(os.path.join(settings.MEDIA_ROOT, 'attachments')), [os.path.basename(names.pop())])
+        url = f'/api/tasks/{self.tasks[0].pk}/attachment/'
+        response = self.client.get(url, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), body[10:20])
+        self.assertEqual(response.headers['Content-Range'], f'bytes 10-19/{len(body)}')
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=5000-').status_code, 416)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response.headers['ETag']).status_code, 304)
+        with override_settings(TODO_MAX_UPLOAD_BYTES=100):
+            self.assertEqual(self.upload(url, body, 'big.bin').status_code, 413)
+
+    def test_downloads_cannot_run_script(self):
+        """Uploaded HTML is served as an octet-stream attachment under its client name."""
+        url = f'/api/tasks/{self.tasks[0].pk}/attachment/'
+        self.assertEqual(self.upload(url, b'<script>alert(1)</script>', 'x.html').status_code, 200)
+        self.client.logout()
+        response = self.client.get(url)
+        self.assertEqual(response.headers['Content-Type'], 'application/octet-stream')
+        self.assertEqual(response.headers['Content-Disposition'], 'attachment; filename="x.html"')
+        self.assertEqual(response.headers['Content-Security-Policy'], 'sandbox')
+        self.assertEqual(response.headers['X-Content-Type-Options'], 'nosniff')
+        self.assertEqual(files.content_type('attachments/report.pdf'), 'application/pdf')
+
+    def test_profile_thumbnails(self):
+        """Pictures get WebP thumbnails, served by size and linked from the serializer."""
+        employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        buffer = BytesIO()
+        Image.new('RGB', (640, 480), 'red').save(buffer, 'PNG')
+        url = f'/api/employees/{employee.pk}/picture/'
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(self.upload(url, buffer.getvalue(), 'me.png').status_code, 200)
+        self.assertEqual(len(callbacks), 1)
+        employee.refresh_from_db()
+        for name in thumbnails.generate(employee.profile_picture.name):
+            self.assertTrue(default_storage.exists(name))
+        response = self.client.get(f'{url}?size=small')
+        self.assertEqual(response.headers['Content-Type'], 'image/webp')
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+            self.assertEqual(image.size, (64, 48))
+        data = self.client.get(f'/api/employees/{employee.pk}/').json()
+        self.assertTrue(data['profile_thumbnail'].endswith(f'{url}?size=small'))
+
+    def test_non_images_are_refused_as_pictures(self):
+        """SVG, PDF and truncated uploads are not stored as profile pictures."""
+        employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        url = f'/api/employees/{employee.pk}/picture/'
+        svg = b'<svg xmlns="http://www.w3.org/2000/svg"><script>alert(1)</script></svg>'
+        buffer = BytesIO()
+        Image.new('RGB', (64, 64), 'red').save(buffer, 'PNG')
+        truncated = buffer.getvalue()[:-20]
+        for body, name in ((svg, 'me.svg'), (b'%PDF-1.4\n%%EOF', 'me.pdf'), (truncated, 'me.png')):
+            self.assertEqual(self.upload(url, body, name).status_code, 400, name)
+        employee.refresh_from_db()
+        self.assertFalse(employee.profile_picture)
+
+    def test_oversized_pictures_are_refused(self):
+        """Pictures above ``TODO_THUMBNAIL_MAX_PIXELS`` are rejected before decoding."""
+        employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        buffer = BytesIO()
+        Image.new('1', (4000, 4000)).save(buffer, 'PNG')
+        url = f'/api/employees/{employee.pk}/picture/'
+        with override_settings(TODO_THUMBNAIL_MAX_PIXELS=1000 * 1000):
+            response = self.upload(url, buffer.getvalue(), 'bomb.png')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('exceed', response.json()['error'])
+            employee.refresh_from_db()
+            self.assertFalse(employee.profile_picture)
+        # Stored before the limit was lowered: thumbnails are refused, not generated.
+        self.assertEqual(self.upload(url, buffer.getvalue(), 'bomb.png').status_code, 200)
+        employee.refresh_from_db()
+        with override_settings(TODO_THUMBNAIL_MAX_PIXELS=1000 * 1000):
+            self.assertEqual(self.client.get(f'{url}?size=small').status_code, 400)
+            with self.assertRaises(Image.DecompressionBombError):
+                thumbnails.generate(employee.profile_picture.name)
+
+class MetricsTest(TestCase):
+    """Test the request metrics middleware and endpoint."""
+    def setUp(self):
+        metrics.REQUEST_QUERIES.reset()
+        Task.objects.create(title='Task', employee=Employee.objects.create(name='Jane', email='jane@yourcompany.com'))
+
+    def test_records_queries_and_exposes_them(self):
+        """Query counts are recorded per view and exposed to staff only."""
+        self.client.get('/api/tasks/')
+        counts, _, requests = metrics.REQUEST_QUERIES.samples(['GET', 'task-list'])
+        self.assertEqual(requests, 1)
+        self.assertEqual(self.client.get('/api/metrics/').status_code, 403)
+        self.client.force_login(User.objects.create_superuser('admin', password='secret'))
+        response = self.client.get('/api/metrics/')
+        self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+        body = response.content.decode()
+        self.assertIn('todo_request_queries_count{method="GET",view="task-list"} 1', body)
+        self.assertIn('todo_phase_seconds_count{phase="serialize",view="task-list"}', body)
+
+    @override_settings(TODO_SLOW_REQUEST_SECONDS=0)
+    def test_slow_request_log_includes_sql(self):
+        """Slow requests are logged with their slowest statements."""
+        with self.assertLogs('todo.metrics.slow', 'WARNING') as logs:
+            self.client.get('/api/tasks/')
+        self.assertIn('FROM "todo_task"', logs.output[0])
+
+class ImportTasksTest(TestCase):
+    """Test the streaming bulk import command."""
+    def write(self, name, content):
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(content)
+        return path
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        Employee.objects.create(name='Existing', email='existing@yourcompany.com')
+
+    def test_import_resolves_references_and_counts(self):
+        """Emails and source task ids resolve, bad records are rejected and counters kept."""
+        employees = self.write('employees.csv', (
+            'name,email,department,is_active\n'
+            'Jane,jane@yourcompany.com,HR,true\n'
+            'Again,existing@yourcompany.com,ENG,false\n'
+            'Bad,not-an-email,ENG,true\n'
+        ))
+        tasks = self.write('tasks.ndjson', '\n'.join(json.dumps(record) for record in [
+            {'id': 10, 'title': 'Plan', 'employee_email': 'jane@yourcompany.com', 'status': 'DONE', 'tags': 'Ops, ops'},
+            {'id': 11, 'title': 'Ship', 'employee_email': 'existing@yourcompany.com', 'due_date': '2026-01-01T09:00:00'},
+            {'title': 'Lost', 'employee_email': 'nobody@yourcompany.com'},
+            {'title': 'Odd', 'status': 'MAYBE'},
+        ]))
+        snippets = self.write('snippets.csv', 'task_id,code,language\n10,print(1),python\n99999,x,python\n')
+        out, err = StringIO(), StringIO()
+        call_command('import_tasks', employees=employees, tasks=tasks, snippets=snippets, batch_size=2, stdout=out, stderr=err)
+        self.assertIn('employees: 1 imported, 1 skipped, 1 rejected', out.getvalue())
+        self.assertIn('tasks: 2 imported, 0 skipped, 2 rejected', out.getvalue())
+        self.assertIn('snippets: 1 imported, 0 skipped, 1 rejected', out.getvalue())
+        self.assertIn('nobody@yourcompany.com', err.getvalue())
+        jane = Employee.objects.get(email='jane@yourcompany.com')
+        self.assertEqual((jane.department, jane.done_count), ('HR', 1))
+        plan = Task.objects.get(title='Plan')
+        self.assertEqual(list(plan.tag_set.values_list('name', flat=True)), ['ops'])
+        self.assertIsNotNone(Task.objects.get(title='Ship').due_date.tzinfo)
+        snippet = Snippet.objects.get()
+        self.assertEqual((snippet.task, snippet.rendered_key), (plan, ''))
+
+class ImportDeferredIndexesTest(TransactionTestCase):
+    """Test importing with indexes dropped (schema changes need no open transaction)."""
+    def test_defer_indexes_restores_them(self):
+        """Indexes dropped for the load are recreated afterwards."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        tasks = os.path.join(directory.name, 'tasks.csv')
+        with open(tasks, 'w', encoding='utf-8') as handle:
+            handle.write('title,status\nOne,TODO\n')
+        call_command('import_tasks', tasks=tasks, defer_indexes=True, stdout=StringIO())
+        indexes = connection.introspection.get_constraints(connection.cursor(), Task._meta.db_table)
+        self.assertIn('task_status_due_idx', indexes)
+        self.assertEqual(search.get_backend().search('One')[0], 1)
+
+class ReplicaRoutingTest(TestCase):
+    """Test read replica routing and read-your-writes pinning."""
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        self.factory = RequestFactory()
+
+    @override_settings(TODO_READ_REPLICAS=['replica1'])
+    def test_safe_unpinned_requests_read_from_replicas(self):
+        """Only safe requests without the pin cookie read from a replica."""
+        with replicas.reading(self.factory.get('/api/tasks/')):
+            self.assertEqual(self.router.db_for_read(Task), 'replica1')
+            self.assertEqual(self.router.db_for_write(Task), 'default')
+        self.assertEqual(self.router.db_for_read(Task), 'default')
+        with replicas.reading(self.factory.post('/api/tasks/')):
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+        pinned = self.factory.get('/api/tasks/')
+        pinned.COOKIES[replicas.PIN_COOKIE] = '1'
+        with replicas.reading(pinned):
+            self.assertEqual(self.router.db_for_read(Task), 'default')
+
+    @override_settings(TODO_READ_REPLICAS=['default'])
+    def test_writes_pin_the_client(self):
+        """A successful write sets the pin cookie; reads do not."""
+        self.client.force_login(User.objects.create_user('writer', password='secret'))
+        self.assertNotIn(replicas.PIN_COOKIE, self.client.get('/api/tasks/').cookies)
+        employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        data = {'title': 'Pinned', 'employee': f'http://testserver/api/employees/{employee.pk}/'}
+        response = self.client.post('/api/tasks/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.cookies[replicas.PIN_COOKIE]['max-age'], settings.TODO_REPLICA_PIN_SECONDS)
+
+class SparseFieldsetTest(TestCase):
+    """Test ?fields= and ?expand= on the API viewsets."""
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        self.employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        self.task = Task.objects.create(title='Task', employee=self.employee)
+        Snippet.objects.create(task=self.task, code='print(1)')
+
+    def test_fields_prune_response_and_columns(self):
+        """Only requested fields are rendered and their columns selected, on both read paths."""
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(TODO_FAST_READERS=fast):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get('/api/snippets/?fields=id,task')
+                self.assertEqual(response.json()['results'], [{'id': self.task.snippets.get().pk, 'task': f'http://testserver/api/tasks/{self.task.pk}/'}])
+                self.assertFalse(any('highlighted_html' in query['sql'] for query in ctx.captured_queries))
+                response = self.client.get('/api/employees/?fields=name')
+                self.assertEqual(response.json()['results'], [{'name': 'Jane'}])
+
+    def test_expand_nests_related_objects_in_the_same_query(self):
+        """Expanded relations are nested and loaded without extra queries per row."""
+        Task.objects.create(title='Other', employee=self.employee)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/tasks/?fields=title&expand=employee')
+        results = response.json()['results']
+        self.assertEqual(results[0], {
+            'employee': {
+                'url': f'http://testserver/api/employees/{self.employee.pk}/', 'id': self.employee.pk,
+                'name': 'Jane', 'email': 'jane@yourcompany.com', 'department': 'ENG',
+            },
+            'title': 'Task',
+        })
+        self.assertEqual(len([query for query in ctx.captured_queries if 'FROM "todo_employee"' in query['sql']]), 0)
+        response = self.client.get(f'/api/employees/{self.employee.pk}/?fields=id&expand=tasks')
+        self.assertEqual([task['title'] for task in response.json()['tasks']], ['Task', 'Other'])
+
+    def test_fields_with_cursor_pagination(self):
+        """The cursor position is read even when ``?fields=`` leaves out the ordering columns."""
+        Task.objects.bulk_create([Task(title=f'Task {n}', employee=self.employee) for n in range(10)])
+        for fast in (True, False):
+            with self.subTest(fast=fast), override_settings(TODO_FAST_READERS=fast):
+                response = self.client.get('/api/tasks/?pagination=cursor&fields=id,title')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()['results'][0], {'id': self.task.pk, 'title': 'Task'})
+                response = self.client.get(response.json()['next'])
+                self.assertEqual([task['title'] for task in response.json()['results']], ['Task 9'])
+                for path in ('/api/employees/', '/api/snippets/'):
+                    response = self.client.get(f'{path}?pagination=cursor&fields=id')
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(list(response.json()['results'][0]), ['id'])
+
+    def test_unknown_names_are_rejected(self):
+        """Unknown fields or expansions answer 400 listing the valid names."""
+        response = self.client.get('/api/tasks/?fields=nope&expand=code')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.json())
+        self.assertEqual(response.json()['expand'], ['Cannot expand: code. Choose from: employee.'])
+        self.assertEqual(self.client.get('/api/async/tasks/?fields=nope').status_code, 400)
+
+class CompressionTest(TestCase):
+    """Test the orjson renderer, response compression and precompressed snippet HTML."""
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        self.employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com', salary='1234.50')
+
+    def test_fast_renderer_matches_json_renderer(self):
+        """orjson output is byte-identical, including dates, decimals and line separators."""
+        data = {
+            'when': datetime(2024, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc), 'day': date(2024, 1, 2),
+            'amount': Decimal('1.50'), 'text': 'a\u2028b\u2029é', 'items': [1, 2.5, None, True], 1: 'key',
+        }
+        self.assertEqual(fastjson.FastJSONRenderer().render(data), JSONRenderer().render(data))
+        response = self.client.get(f'/api/employees/{self.employee.pk}/')
+        self.assertEqual(response.json()['salary'], '1234.50')
+
+    @override_settings(TODO_COMPRESS_MIN_BYTES=200)
+    def test_middleware_compresses_large_text_responses(self):
+        """Large JSON is gzipped for clients accepting it; small and identity responses are not."""
+        Task.objects.bulk_create([Task(title=f'Task {n}', employee=self.employee) for n in range(10)])
+        plain = self.client.get('/api/tasks/')
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+        response = self.client.get('/api/tasks/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(response.content)), plain.json())
+        self.assertTrue(response['ETag'].startswith('W/'))
+        small = self.client.get('/api/tasks/?fields=id&page_size=1', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+    def test_async_streams_are_one_gzip_member(self):
+        """Async streaming responses are gzipped as one stream, flushed per chunk."""
+        chunks = [f'{{"n": {n}, "title": "Task {n}"}}\n'.encode() for n in range(50)]
+
+        async def stream():
+            for chunk in chunks:
+                yield chunk
+
+        async def collect():
+            return [part async for part in compression.agzip_sequence(stream())]
+
+        parts = async_to_sync(collect)()
+        decompressor = zlib.decompressobj(wbits=31)
+        data = b''
+        for part in parts[:-1]:
+            data += decompressor.decompress(part)
+        self.assertEqual(data, b''.join(chunks))
+        self.assertEqual(decompressor.decompress(parts[-1]), b'')
+        self.assertTrue(decompressor.eof)
+        self.assertEqual(decompressor.unused_data, b'')
+        # Far smaller than one member per chunk, since the chunks share one window.
+        self.assertLess(sum(map(len, parts)), sum(len(gzip.compress(chunk)) for chunk in chunks) // 2)
+
+    def test_highlight_serves_cached_compressed_html(self):
+        """Highlighted HTML is compressed once and served from the cache."""
+        task = Task.objects.create(title='Task', employee=self.employee)
+        snippet = Snippet.objects.create(task=task, code='\n'.join(f'print({n})' for n in range(50)))
+        plain = self.client.get(f'/api/snippets/{snippet.pk}/highlight/')
+        for _ in range(2):
+            response = self.client.get(f'/api/snippets/{snippet.pk}/highlight/', HTTP_ACCEPT_ENCODING='gzip')
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertIsNotNone(highlighting.get_render_cache().get(f'{snippet.render_key}:gzip'))
+        self.assertTrue(response['ETag'].startswith('W/"'))
+
+class OverdueTaskTest(TestCase):
+    """Test the overdue filters, due date validation and the overdue digests."""
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        self.now = django_timezone.now()
+        self.jane = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        self.john = Employee.objects.create(name='John', email='john@yourcompany.com')
+
+    def task(self, title, employee, due, completed=False):
+        return Task.objects.create(title=title, employee=employee, due_date=due, completed=completed)
+
+    def titles(self, query):
+        return sorted(task['title'] for task in self.client.get(f'/api/tasks/?{query}').json()['results'])
+
+    def test_overdue_and_due_within_filters(self):
+        """The filters select open tasks by due date in SQL."""
+        self.task('late', self.jane, self.now - timedelta(days=1))
+        self.task('late but done', self.jane, self.now - timedelta(days=1), completed=True)
+        self.task('soon', self.jane, self.now + timedelta(hours=12))
+        self.task('later', self.jane, self.now + timedelta(days=5))
+        self.task('undated', self.jane, None)
+        self.assertEqual(self.titles('overdue=true'), ['late'])
+        self.assertEqual(self.titles('overdue=false'), ['late but done', 'later', 'soon', 'undated'])
+        self.assertEqual(self.titles('due_within=1'), ['soon'])
+        self.assertEqual(self.client.get('/api/tasks/?due_within=-1').status_code, 400)
+        self.assertEqual(self.client.get('/api/tasks/?due_within=1e12').status_code, 400)
+        self.assertEqual(self.titles('due_within=36500'), ['later', 'soon'])
+
+    def test_due_date_validation_is_time_zone_aware(self):
+        """Due dates earlier today are accepted, yesterday's are rejected."""
+        employee_url = f'http://testserver/api/employees/{self.jane.pk}/'
+        for due, status in ((self.now, 201), (self.now - timedelta(days=1), 400)):
+            response = self.client.post('/api/tasks/', {'title': 'T', 'employee': employee_url, 'due_date': due.isoformat()})
+            self.assertEqual(response.status_code, status, response.content)
+
+    def test_digests_are_refreshed_incrementally(self):
+        """Each run counts the newly overdue tasks and recomputes only affected employees."""
+        first = self.task('first', self.jane, self.now - timedelta(days=2))
+        self.task('john', self.john, self.now - timedelta(days=1))
+        summary = overdue.refresh_digests(now=self.now)
+        self.assertEqual((summary['since'], summary['newly_overdue'], summary['digests']), (None, 2, 2))
+        self.task('crossing', self.jane, self.now + timedelta(hours=1))
+        Task.objects.filter(employee=self.john).update(completed=True)
+        later = self.now + timedelta(hours=2)
+        summary = overdue.refresh_digests(now=later)
+        self.assertEqual((summary['since'], summary['newly_overdue'], summary['cleared']), (self.now, 1, 1))
+        digest = OverdueDigest.objects.get()
+        self.assertEqual(
+            (digest.employee, digest.overdue_count, digest.newly_overdue_count, digest.oldest_due_date),
+            (self.jane, 2, 1, first.due_date),
+        )
+        summary = overdue.refresh_digests(now=later + timedelta(hours=1), full=True)
+        self.assertEqual((summary['newly_overdue'], summary['digests']), (0, 1))
+
+class CachedAuthenticationTest(TestCase):
+    """Test the cached Basic and token authentication and its revocation."""
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('service', password='secret')
+        self.factory = RequestFactory()
+
+    def authenticate(self, authentication_class, header):
+        return authentication_class().authenticate(Request(self.factory.get('/api/', HTTP_AUTHORIZATION=header)))
+
+    def basic(self, password):
+        return 'Basic ' + base64.b64encode(f'service:{password}'.encode()).decode()
+
+    def shared_cache(self):
+        """Settings pointing the auth cache at a file cache, shared like Redis would be."""
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location, ignore_errors=True)
+        return override_settings(
+            CACHES={**settings.CACHES, 'auth': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location}},
+            TODO_AUTH_CACHE='auth',
+        )
+
+    def test_basic_credentials_are_verified_once(self):
+        """Cached Basic credentials skip the hasher; a per-process cache still reads the user."""
+        self.assertEqual(self.authenticate(authentication.CachedBasicAuthentication, self.basic('secret'))[0], self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.authenticate(authentication.CachedBasicAuthentication, self.basic('secret'))[0], self.user)
+        # A change made by another process, which this process's cache never hears about.
+        User.objects.filter(pk=self.user.pk).update(password=make_password('changed'))
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(authentication.CachedBasicAuthentication, self.basic('secret'))
+        self.assertEqual(self.authenticate(authentication.CachedBasicAuthentication, self.basic('changed'))[0], self.user)
+
+    def test_shared_cache_skips_queries_until_revoked(self):
+        """With a shared cache, credentials cost no query and revocations apply at once."""
+        with self.shared_cache():
+            self.authenticate(authentication.CachedBasicAuthentication, self.basic('secret'))
+            with self.assertNumQueries(0):
+                self.authenticate(authentication.CachedBasicAuthentication, self.basic('secret'))
+            self.user.set_password('changed')
+            self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(authentication.CachedBasicAuthentication, self.basic('secret'))
+            token = Token.objects.create(user=self.user)
+            header = f'Token {token.key}'
+            self.authenticate(authentication.CachedTokenAuthentication, header)
+            with self.assertNumQueries(0):
+                user, auth = self.authenticate(authentication.CachedTokenAuthentication, header)
+            self.assertEqual((user, auth.key), (self.user, token.key))
+            self.user.is_active = False
+            self.user.save()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(authentication.CachedTokenAuthentication, header)
+            self.user.is_active = True
+            self.user.save()
+            self.authenticate(authentication.CachedTokenAuthentication, header)
+            token.delete()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate(authentication.CachedTokenAuthentication, header)
+
+class ThrottlingTest(TestCase):
+    """Test token-bucket rate limiting and render load shedding."""
+    def setUp(self):
+        cache.clear()
+        throttling.REJECTED.reset()
+        self.user = User.objects.create_user('reader', password='secret')
+        employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        self.snippet = Snippet.objects.create(task=Task.objects.create(title='Task', employee=employee), code='x = 1\n' * 2000)
+
+    @override_settings(TODO_THROTTLE_RATES={'anon': (2, 0.01)})
+    def test_anonymous_clients_get_a_bucket_per_address(self):
+        """Requests beyond the burst answer 429 with Retry-After and are counted."""
+        statuses = [self.client.get('/api/tasks/').status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+        response = self.client.get('/api/tasks/')
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        self.assertEqual(self.client.get('/api/tasks/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+        self.assertEqual(throttling.REJECTED.value(['throttled_anon']), 2)
+        self.assertIn('todo_rejected_requests_total{reason="throttled_anon"} 2', metrics.expose())
+
+    def test_concurrent_requests_cannot_exceed_the_burst(self):
+        """Threads racing on one bucket get exactly ``burst`` tokens between them."""
+        bucket = throttling.TokenBucket('user', 'racer', 5, 0.0001)
+        barrier = threading.Barrier(20)
+        results = []
+
+        def take():
+            barrier.wait()
+            results.append(bucket.take()[0])
+
+        threads = [threading.Thread(target=take) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results.count(True), 5)
+
+    @override_settings(TODO_THROTTLE_RATES={'user': (4, 0.01)}, TODO_THROTTLE_CHARS_PER_TOKEN=4000)
+    def test_highlight_costs_grow_with_code_size(self):
+        """Highlighting 12000 characters costs 1 + 3 tokens, using up the burst."""
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(f'/api/snippets/{self.snippet.pk}/highlight/').status_code, 200)
+        self.assertEqual(self.client.get('/api/tasks/').status_code, 429)
+
+    @override_settings(TODO_RENDER_QUEUE_LIMIT=0)
+    def test_renders_beyond_the_limit_are_shed(self):
+        """Highlight requests are refused with 503 and Retry-After when no render slot is free."""
+        self.client.force_login(self.user)
+        response = self.client.get(f'/api/snippets/{self.snippet.pk}/highlight/')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        self.assertEqual(throttling.REJECTED.value(['overloaded']), 1)
+
+class BenchmarkTest(TestCase):
+    """Test the API benchmark harness."""
+    def test_bench_api_covers_every_endpoint(self):
+        """Every router endpoint and the highlight view are driven and reported."""
+        benchmarking.seed(employees=2, tasks=3, snippets=1)
+        report = benchmarking.bench_api(requests=2, warmup=0)
+        self.assertEqual(set(report), {
+            f'{basename}-{kind}' for basename in ('employee', 'task', 'snippet') for kind in ('list', 'detail')
+        } | {'snippet-highlight'})
+        for result in report.values():
+            self.assertEqual(result['statuses'], {'200': 2})
+            self.assertGreater(result['queries']['mean'], 0)
+            self.assertIn('p90_ms', result['latency'])
+            self.assertGreater(result['peak_memory_kib'], 0)
+
+class SnippetHighlightCacheTest(TestCase):
+    """Test the snippet render cache."""
+    def setUp(self):
+        highlighting.get_render_cache().clear()
+        highlighting.stats.reset()
+        self.task = Task.objects.create(title='Write docs')
+
+    def test_repeated_render_hits_cache(self):
+        """Rendering the same content twice should only render once."""
+        first = Snippet.objects.create(task=self.task, code='print(1)')
+        second = Snippet.objects.create(task=self.task, code='print(1)')
+        self.assertEqual(first.highlighted, second.highlighted)
+        self.assertEqual(highlighting.stats.as_dict(), {'hits': 1, 'misses': 1})
+
+    def test_save_evicts_previous_rendering(self):
+        """Saving new content should drop the stale cache entry."""
+        snippet = Snippet.objects.create(task=self.task, code='print(1)')
+        snippet.highlighted
+        snippet = Snippet.objects.get(pk=snippet.pk)
+        stale_key = snippet.render_key
+        snippet.code = 'print(2)'
+        snippet.save()
+        self.assertIsNone(highlighting.get_render_cache().get(stale_key))
+        self.assertIn('print', snippet.highlighted)
+
+class SnippetBodyModeTest(TestCase):
+    """Test pooled rendering, body-only highlighting and the style stylesheet."""
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        self.snippet = Snippet.objects.create(task=Task.objects.create(title='Task'), code='print(1)', style='monokai')
+
+    def test_pooled_instances_are_reused(self):
+        """Lexers and formatters are built once per key."""
+        self.assertIs(highlighting.get_lexer('python'), highlighting.get_lexer('python'))
+        self.assertIs(highlighting.get_formatter('monokai', True), highlighting.get_formatter('monokai', True))
+
+    def test_body_mode_links_stylesheet(self):
+        """?mode=body serves the stored fragment and links the per-style CSS."""
+        response = self.client.get(f'/api/snippets/{self.snippet.pk}/highlight/?mode=body')
+        self.assertEqual(response.content.decode(), self.snippet.highlighted_body)
+        self.assertIn('/api/snippets/styles/monokai.css', response.headers['Link'])
+        css = self.client.get('/api/snippets/styles/monokai.css')
+        self.assertEqual(css.content.decode(), highlighting.style_css('monokai'))
+        self.assertIn('max-age=31536000', css.headers['Cache-Control'])
+        self.assertEqual(self.client.get('/api/snippets/styles/nope.css').status_code, 404)
+        self.assertEqual(self.client.get(f'/api/snippets/{self.snippet.pk}/highlight/?mode=x').status_code, 400)
+
+class SnippetStoredHtmlTest(TestCase):
+    """Test the stored highlighted HTML columns."""
+    def setUp(self):
+        self.task = Task.objects.create(title='Write docs')
+
+    def test_small_snippet_rendered_on_save(self):
+        """Small snippets are rendered when saved."""
+        snippet = Snippet.objects.create(task=self.task, code='x = 1')
+        self.assertEqual(snippet.rendered_key, snippet.render_key)
+        self.assertIn('<html>', snippet.highlighted_html)
+        self.assertNotIn('<html>', snippet.highlighted_body)
+
+    @override_settings(SNIPPET_INLINE_RENDER_MAX_CHARS=3)
+    def test_large_snippet_left_for_render_command(self):
+        """Large snippets stay pending until render_snippets stores them."""
+        snippet = Snippet.objects.create(task=self.task, code='x = 1')
+        self.assertEqual(snippet.rendered_key, '')
+        self.assertIsNone(snippet.stored_highlighted)
+        call_command('render_snippets', processes=1, stdout=StringIO())
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.stored_highlighted, snippet.highlighted_html)
+        self.assertIn('<html>', snippet.highlighted_html)
+
+    @override_settings(SNIPPET_INLINE_RENDER_MAX_CHARS=3, SNIPPET_PENDING_RETRY_AFTER=7)
+    def test_pending_large_snippet_is_not_rendered_on_request(self):
+        """Highlight requests for a pending large snippet answer 503 until the worker stores it."""
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        snippet = Snippet.objects.create(task=self.task, code='pending_until_worker = 1')
+        highlighting.get_render_cache().clear()
+        for url in (f'/api/snippets/{snippet.pk}/highlight/', f'/api/async/snippets/{snippet.pk}/highlight/'):
+            for mode in ('full', 'body'):
+                response = self.client.get(f'{url}?mode={mode}')
+                self.assertEqual((response.status_code, response.headers['Retry-After']), (503, '7'), url)
+        self.assertIsNone(highlighting.get_render_cache().get(snippet.render_key))
+        call_command('render_snippets', processes=1, stdout=StringIO())
+        self.assertEqual(self.client.get(f'/api/snippets/{snippet.pk}/highlight/').status_code, 200)
+        self.assertEqual(self.client.get(f'/api/async/snippets/{snippet.pk}/highlight/').status_code, 200)
+
+    @override_settings(SNIPPET_INLINE_RENDER_MAX_CHARS=3)
+    def test_render_command_skips_unrenderable_snippets(self):
+        """A snippet that cannot be rendered is logged and skipped; the rest are stored."""
+        broken = Snippet.objects.create(task=self.task, code='x = 1')
+        Snippet.objects.filter(pk=broken.pk).update(language='no-such-language')
+        snippet = Snippet.objects.create(task=self.task, code='y = 2')
+        stderr = StringIO()
+        with self.assertLogs('todo.management.commands.render_snippets', 'WARNING') as logs:
+            call_command('render_snippets', processes=1, stdout=StringIO(), stderr=stderr)
+        self.assertIn(f'snippet {broken.pk}', logs.output[0])
+        self.assertIn(str(broken.pk), stderr.getvalue())
+        broken.refresh_from_db()
+        snippet.refresh_from_db()
+        self.assertEqual(broken.rendered_key, '')
+        self.assertEqual(snippet.rendered_key, snippet.render_key)
+
+    @override_settings(SNIPPET_INLINE_RENDER_MAX_CHARS=3)
+    def test_failed_snippet_is_retried_once_edited(self):
+        """The worker skips a snippet that failed until an edit changes its render key."""
+        broken = Snippet.objects.create(task=self.task, code='x = 1')
+        Snippet.objects.filter(pk=broken.pk).update(language='no-such-language')
+        command = RenderSnippetsCommand(stdout=StringIO(), stderr=StringIO())
+        command.processes, command.failed, command.rendered = 1, {}, 0
+        pending = Snippet.objects.filter(rendered_key='')
+        with ThreadPoolExecutor(1) as pool:
+            with self.assertLogs('todo.management.commands.render_snippets', 'WARNING'):
+                self.assertEqual(command.render_batch(pool, pending, 10), [broken.pk])
+            with self.assertNoLogs('todo.management.commands.render_snippets', 'WARNING'):
+                self.assertEqual(command.render_batch(pool, pending, 10), [broken.pk])
+            Snippet.objects.filter(pk=broken.pk).update(language='python')
+            command.render_batch(pool, pending, 10)
+        broken.refresh_from_db()
+        self.assertEqual((broken.rendered_key, command.failed, command.rendered), (broken.render_key, {}, 1))
+
+class QueryCountAssertionsMixin:
+    """Assertion helpers for pinning the number of queries an endpoint issues."""
+    def assertStableQueryCount(self, url, expected, grow):
+        """
+        Assert ``url`` issues ``expected`` queries, before and after ``grow()``
+        adds more rows, so the count does not depend on the data volume.
+        """
+        for attempt in range(2):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                len(ctx.captured_queries), expected,
+                '\n'.join(query['sql'] for query in ctx.captured_queries),
+            )
+            if attempt == 0:
+                grow()
+
+class ListEndpointQueryCountTest(QueryCountAssertionsMixin, TestCase):
+    """List endpoints should not issue a query per row."""
+    def create_employee_with_tasks(self, index, tasks=3):
+        employee = Employee.objects.create(name=f'Employee {index}', email=f'e{index}@yourcompany.com')
+        Task.objects.bulk_create(Task(employee=employee, title=f'Task {n}') for n in range(tasks))
+        return employee
+
+    def grow(self):
+        for index in range(2, 12):
+            self.create_employee_with_tasks(index)
+
+    def test_employee_list(self):
+        """COUNT, the page of employees and one prefetch of their tasks."""
+        self.create_employee_with_tasks(1)
+        self.assertStableQueryCount('/api/employees/', 3, self.grow)
+
+    def test_task_list(self):
+        """ETag aggregate, COUNT and the page of tasks joined to their employees."""
+        self.create_employee_with_tasks(1)
+        self.assertStableQueryCount('/api/tasks/', 3, self.grow)
+
+class TaskPaginationTest(TestCase):
+    """Test the cursor and count-free pagination modes."""
+    def setUp(self):
+        Task.objects.bulk_create(Task(title=f'Task {n}') for n in range(25))
+
+    def test_cursor_pagination_walks_every_task(self):
+        """Following cursor links should visit every task once, in order."""
+        url, seen = '/api/tasks/?pagination=cursor', []
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            seen += [task['id'] for task in data['results']]
+            url = data['next']
+        self.assertEqual(seen, list(Task.objects.values_list('id', flat=True)))
+
+    def test_cursor_seeks_past_equal_timestamps(self):
+        """Tasks sharing ``created_at`` are paged by ``(created_at, id)`` without OFFSET, both ways."""
+        Task.objects.update(created_at=django_timezone.now())
+        url, seen, pages = '/api/tasks/?pagination=cursor', [], []
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(url).json()
+            self.assertFalse(any('OFFSET' in query['sql'] for query in ctx.captured_queries))
+            seen += [task['id'] for task in data['results']]
+            pages.append(data)
+            url = data['next']
+        self.assertEqual(seen, list(Task.objects.order_by('id').values_list('id', flat=True)))
+        previous = self.client.get(pages[-1]['previous']).json()
+        self.assertEqual(previous['results'], pages[-2]['results'])
+        self.assertEqual(self.client.get('/api/tasks/?cursor=cD1nYXJiYWdl').status_code, 404)
+
+    def test_count_free_pages(self):
+        """?count=false should paginate without the total count."""
+        data = self.client.get('/api/tasks/?count=false&page=3').json()
+        self.assertNotIn('count', data)
+        self.assertEqual(len(data['results']), 5)
+        self.assertIsNone(data['next'])
+        self.assertIn('page=2', data['previous'])
+
+class TaskBulkEndpointTest(TestCase):
+    """Test list-shaped create, update and delete on /api/tasks/."""
+    def setUp(self):
+        user = User.objects.create_user('bulk', password='secret')
+        self.client.force_login(user)
+        self.employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        self.employee_url = f'http://testserver/api/employees/{self.employee.pk}/'
+
+    def test_bulk_create(self):
+        """A list body creates every task with a single employee lookup."""
+        items = [{'title': f'Task {n}', 'employee': self.employee_url} for n in range(20)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/tasks/', items, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(Task.objects.filter(employee=self.employee).count(), 20)
+        employee_lookups = [q for q in ctx.captured_queries if 'FROM "todo_employee"' in q['sql']]
+        self.assertEqual(len(employee_lookups), 1)
+
+    def test_bulk_create_reports_per_item_errors(self):
+        """An invalid item rejects the batch with errors aligned to the input."""
+        items = [
+            {'title': 'Fine', 'employee': self.employee_url},
+            {'title': 'Bad', 'employee': 'http://testserver/api/employees/999/'},
+        ]
+        response = self.client.post('/api/tasks/', items, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn('employee', errors[1])
+        self.assertFalse(Task.objects.exists())
+
+    def test_bulk_update_and_delete(self):
+        """PATCH and DELETE on the list URL update and remove batches."""
+        tasks = Task.objects.bulk_create(Task(title=f'Task {n}', employee=self.employee) for n in range(3))
+        items = [{'id': task.pk, 'status': 'DONE'} for task in tasks]
+        response = self.client.patch('/api/tasks/', items, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(Task.objects.filter(status='DONE').count(), 3)
+        response = self.client.delete('/api/tasks/', [task.pk for task in tasks[:2]], content_type='application/json')
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(list(Task.objects.values_list('pk', flat=True)), [tasks[2].pk])
+
+class TaskExportTest(TestCase):
+    """Test the streaming task export."""
+    def setUp(self):
+        Task.objects.create(title='Open', status='TODO')
+        Task.objects.create(title='Closed', status='DONE')
+
+    def test_ndjson_export_honours_filters(self):
+        """The export endpoint streams one JSON object per matching task."""
+        response = self.client.get('/api/tasks/export/?status=DONE')
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ['Closed'])
+
+    def test_csv_export_command(self):
+        """export_tasks writes a header and one CSV row per task."""
+        out = StringIO()
+        call_command('export_tasks', format='csv', stdout=out)
+        rows = list(csv.reader(StringIO(out.getvalue())))
+        self.assertEqual(rows[0][:3], ['id', 'employee_id', 'title'])
+        self.assertEqual([row[2] for row in rows[1:]], ['Open', 'Closed'])
+
+class FastReaderTest(TestCase):
+    """The fast read path must produce byte-identical JSON to the serializers."""
+    def setUp(self):
+        employee = Employee.objects.create(
+            name='Jane', email='jane@yourcompany.com', salary='1234.5', birth_date='1990-05-01',
+        )
+        Employee.objects.create(name='Idle', email='idle@yourcompany.com')
+        Task.objects.create(
+            title='Report', employee=employee, due_date='2030-01-01T09:30:00Z',
+            attachment='attachments/report.pdf', tags='a,b',
+        )
+        Task.objects.create(title='Unassigned')
+        Snippet.objects.create(task=Task.objects.first(), code='print("hi")', linenos=True)
+
+    def assertSameAsSerializer(self, url):
+        fast = self.client.get(url)
+        with self.settings(TODO_FAST_READERS=False):
+            slow = self.client.get(url)
+        self.assertEqual(fast.status_code, 200)
+        self.assertEqual(fast.content, slow.content)
+
+    def test_task_endpoints(self):
+        """Task list, format-suffixed list and detail match the serializer."""
+        self.assertSameAsSerializer('/api/tasks/')
+        self.assertSameAsSerializer('/api/tasks.json')
+        self.assertSameAsSerializer(f'/api/tasks/{Task.objects.first().pk}/')
+
+    def test_employee_endpoints(self):
+        """Employee list and detail match the serializer."""
+        self.assertSameAsSerializer('/api/employees/')
+        self.assertSameAsSerializer(f'/api/employees/{Employee.objects.first().pk}/')
+
+    def test_snippet_endpoints(self):
+        """Snippet list and detail match the serializer."""
+        self.assertSameAsSerializer('/api/snippets/')
+        self.assertSameAsSerializer(f'/api/snippets/{Snippet.objects.first().pk}/')
+
+class ConditionalGetTest(TestCase):
+    """Test ETag/Last-Modified handling on task and snippet endpoints."""
+    def setUp(self):
+        self.task = Task.objects.create(title='Poll me')
+        self.snippet = Snippet.objects.create(task=self.task, code='x = 1')
+
+    def assertRevalidates(self, url, last_modified=True):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertEqual('Last-Modified' in response.headers, last_modified)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def test_task_list_and_detail(self):
+        """Unchanged tasks revalidate; an update invalidates the list ETag."""
+        etag = self.assertRevalidates('/api/tasks/', last_modified=False)
+        self.assertRevalidates(f'/api/tasks/{self.task.pk}/')
+        Task.objects.create(title='New')
+        self.assertEqual(self.client.get('/api/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_list_ignores_if_modified_since_after_deletes(self):
+        """Deleting the newest row is not hidden behind If-Modified-Since."""
+        newest = Task.objects.create(title='Newest')
+        since = self.client.get(f'/api/tasks/{newest.pk}/')['Last-Modified']
+        newest.delete()
+        response = self.client.get('/api/tasks/', HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_snippet_highlight_skips_rendering(self):
+        """A 304 on the highlight view loads no snippet content."""
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        url = f'/api/snippets/{self.snippet.pk}/highlight/'
+        etag = self.assertRevalidates(url)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertFalse(any('"code"' in query['sql'] for query in ctx.captured_queries))
+        self.snippet.code = 'x = 2'
+        self.snippet.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+class AsyncReadEndpointTest(TestCase):
+    """The async read endpoints mirror the DRF list/retrieve responses."""
+    def setUp(self):
+        employee = Employee.objects.create(name='Jane', email='jane@yourcompany.com')
+        for n in range(12):
+            Task.objects.create(title=f'Task {n}', employee=employee, status='DONE' if n % 2 else 'TODO')
+        self.snippet = Snippet.objects.create(task=Task.objects.first(), code='x = 1')
+
+    def test_lists_match_sync_endpoints(self):
+        """Pages, filters and details match the DRF viewsets."""
+        for path in ('tasks/', 'tasks/?status=DONE', 'tasks/?page=2', 'employees/', 'snippets/'):
+            sync = self.client.get(f'/api/{path}').json()
+            asynchronous = self.client.get(f'/api/async/{path}').json()
+            self.assertEqual(asynchronous['count'], sync['count'])
+            self.assertEqual(asynchronous['results'], sync['results'])
+        task = Task.objects.last()
+        self.assertEqual(self.client.get(f'/api/async/tasks/{task.pk}/').json(), self.client.get(f'/api/tasks/{task.pk}/').json())
+        self.assertEqual(self.client.get('/api/async/tasks/999/').status_code, 404)
+
+    def test_highlight(self):
+        """The async highlight view returns the same HTML."""
+        self.client.force_login(User.objects.create_user('reader', password='secret'))
+        url = f'snippets/{self.snippet.pk}/highlight/'
+        self.assertEqual(self.client.get(f'/api/async/{url}').content, self.client.get(f'/api/{url}').content)
+        body = self.client.get(f'/api/async/{url}?mode=body')
+        self.assertEqual(body.content, self.client.get(f'/api/{url}?mode=body').content)
+        self.assertIn('rel="stylesheet"', body.headers['Link'])
+
+    def test_configured_authenticators_are_used(self):
+        """Basic and token clients are accepted; bad credentials are refused."""
+        user = User.objects.create_user('service', password='secret')
+        url = f'/api/async/snippets/{self.snippet.pk}/highlight/'
+        basic = 'Basic ' + base64.b64encode(b'service:secret').decode()
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=basic).status_code, 200)
+        token = Token.objects.create(user=user)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION=f'Token {token.key}').status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Token nope').status_code, 403)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_unsupported_pagination_modes_are_rejected(self):
+        """Cursor and count-free pages are only offered by the DRF endpoints."""
+        for query in ('pagination=cursor', 'cursor=abc', 'count=false'):
+            self.assertEqual(self.client.get(f'/api/async/tasks/?{query}').status_code, 400)
+
+class PygmentsCatalogTest(TestCase):
+    """Test the precomputed Pygments catalog."""
+    def test_catalog_file_is_current(self):
+        """The committed catalog matches the installed Pygments registry."""
+        self.assertEqual(catalog.load_catalog(), catalog.build_catalog())
+
+    def test_snippet_choices_come_from_catalog(self):
+        """Snippet.language validates against the catalog."""
+        field = Snippet._meta.get_field('language')
+        self.assertIn(('python', 'Python'), field.choices)
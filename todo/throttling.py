@@ -0,0 +1,189 @@
+"""
+Rate limiting and load shedding for the API.
+
+``TokenBucketThrottle`` (in ``DEFAULT_THROTTLE_CLASSES``) gives every user,
+or every client address for anonymous requests, a bucket of
+``TODO_THROTTLE_RATES[scope] = (burst, tokens per second)``. A request needs
+one token; expensive ones take more afterwards through ``charge()``, e.g.
+highlighting, which costs one more token per ``TODO_THROTTLE_CHARS_PER_TOKEN``
+characters of code. A client in debt waits until its bucket refills, so one
+scraper cannot crowd out everybody else.
+
+Buckets live in the ``TODO_THROTTLE_CACHE`` cache and are updated under a
+per-bucket lock taken with ``cache.add``, so concurrent requests of a client
+cannot spend the same tokens. With the default per-process ``LocMemCache``
+every worker process keeps its own buckets, so the effective limits are
+multiplied by the number of processes; point ``TODO_THROTTLE_CACHE`` at a
+shared cache (Redis, Memcached) to enforce them across processes.
+
+``render_slot()`` bounds the renders in progress in a process, including
+those queued for the render pool, to ``TODO_RENDER_QUEUE_LIMIT``; beyond it
+requests are refused with 503 and ``Retry-After`` instead of queueing behind
+the others. Rejections are counted in ``todo_rejected_requests_total``.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+from . import metrics
+
+REJECTED = metrics.register(metrics.Counter(
+    'todo_rejected_requests_total', 'Requests rejected by rate limiting or load shedding.', ['reason'],
+))
+
+
+LOCK_TIMEOUT = 1
+LOCK_WAIT = 0.05
+
+
+def get_cache():
+    """Return the cache holding the token buckets."""
+    return caches[getattr(settings, 'TODO_THROTTLE_CACHE', 'default')]
+
+
+@contextmanager
+def locked(key):
+    """
+    Hold the lock of ``key`` for a read-modify-write of it.
+
+    Locks expire after ``LOCK_TIMEOUT`` in case a holder dies; a request that
+    cannot get one within ``LOCK_WAIT`` proceeds without it rather than stall.
+    """
+    cache = get_cache()
+    lock = f'{key}:lock'
+    deadline = time.monotonic() + LOCK_WAIT
+    acquired = cache.add(lock, 1, timeout=LOCK_TIMEOUT)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(0.001)
+        acquired = cache.add(lock, 1, timeout=LOCK_TIMEOUT)
+    try:
+        yield
+    finally:
+        if acquired:
+            cache.delete(lock)
+
+
+def rates():
+    """Return ``{scope: (burst, tokens per second)}``; a missing scope is not throttled."""
+    return getattr(settings, 'TODO_THROTTLE_RATES', {})
+
+
+def code_cost(length):
+    """Extra tokens charged for highlighting ``length`` characters of code."""
+    return length / getattr(settings, 'TODO_THROTTLE_CHARS_PER_TOKEN', 5000)
+
+
+class TokenBucket:
+    """The token bucket of client ``ident`` in ``scope``, stored in the cache."""
+    timer = time.time
+
+    def __init__(self, scope, ident, burst, rate):
+        self.scope = scope
+        self.key = f'throttle:{scope}:{ident}'
+        self.burst = burst
+        self.rate = rate
+
+    def tokens(self, now):
+        """Return the tokens available at ``now``."""
+        state = get_cache().get(self.key)
+        if state is None:
+            return self.burst
+        tokens, stamp = state
+        return min(self.burst, tokens + (now - stamp) * self.rate)
+
+    def take(self, cost=1):
+        """
+        Take ``cost`` tokens if at least one is available.
+
+        Returns ``(allowed, seconds until one is)``.
+        """
+        with locked(self.key):
+            now = self.timer()
+            tokens = self.tokens(now)
+            if tokens >= 1:
+                self.save(tokens - cost, now)
+                return True, 0.0
+        REJECTED.inc(f'throttled_{self.scope}')
+        return False, (1 - tokens) / self.rate
+
+    def charge(self, cost):
+        """Take ``cost`` more tokens, going into debt (at most one burst) if need be."""
+        with locked(self.key):
+            now = self.timer()
+            self.save(max(-self.burst, self.tokens(now) - cost), now)
+
+    def save(self, tokens, now):
+        # Untouched buckets are full again after burst / rate seconds.
+        get_cache().set(self.key, (tokens, now), timeout=math.ceil((self.burst - tokens) / self.rate) + 1)
+
+
+def bucket_for(user, ident):
+    """Return the bucket of ``user``, or of client address ``ident`` if anonymous; None if unthrottled."""
+    scope, ident = ('user', user.pk) if user and user.is_authenticated else ('anon', ident)
+    if scope not in rates():
+        return None
+    burst, rate = rates()[scope]
+    return TokenBucket(scope, ident, burst, rate)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Throttle each user (scope ``user``) or client address (scope ``anon``) with a token bucket."""
+    wait_seconds = None
+
+    def allow_request(self, request, view):
+        bucket = bucket_for(request.user, self.get_ident(request))
+        if bucket is None:
+            return True
+        allowed, self.wait_seconds = bucket.take()
+        if allowed:
+            getattr(request, '_request', request).token_bucket = bucket
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+def charge(request, cost):
+    """Charge ``cost`` more tokens to the bucket that admitted ``request``."""
+    bucket = getattr(getattr(request, '_request', request), 'token_bucket', None)
+    if bucket is not None and cost > 0:
+        bucket.charge(cost)
+
+
+class Overloaded(APIException):
+    """Too many renders in progress; the client should retry shortly."""
+    status_code = 503
+    default_detail = 'The server is busy, try again shortly.'
+    default_code = 'overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = math.ceil(wait)
+
+
+_renders = 0
+_renders_lock = threading.Lock()
+
+
+@contextmanager
+def render_slot():
+    """Hold one of the ``TODO_RENDER_QUEUE_LIMIT`` render slots, or raise ``Overloaded``."""
+    global _renders
+    limit = getattr(settings, 'TODO_RENDER_QUEUE_LIMIT', None)
+    with _renders_lock:
+        if limit is not None and _renders >= limit:
+            REJECTED.inc('overloaded')
+            raise Overloaded(getattr(settings, 'TODO_RENDER_RETRY_AFTER', 1))
+        _renders += 1
+    try:
+        yield
+    finally:
+        with _renders_lock:
+            _renders -= 1
@@ -0,0 +1,126 @@
+"""
+Thumbnail variants of employee profile pictures.
+
+Variants are generated with Pillow in a small background pool after a
+picture is saved and stored next to it as ``<picture>_<size>.webp``. Since
+pictures are stored under content hashes, a variant never goes stale and
+identical pictures share their thumbnails.
+
+Only raster images in ``PICTURE_FORMATS`` are accepted as pictures. Those with
+more than ``TODO_THUMBNAIL_MAX_PIXELS`` pixels are refused before they are
+decoded: a small, highly compressed file can otherwise expand to gigabytes in
+memory (a decompression bomb).
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels of each variant.
+THUMBNAIL_SIZES = {'small': 64, 'medium': 256}
+# Formats accepted as profile pictures.
+PICTURE_FORMATS = {'GIF', 'JPEG', 'PNG', 'WEBP'}
+
+
+def max_pixels():
+    """Largest picture, in pixels, thumbnails are generated from."""
+    return getattr(settings, 'TODO_THUMBNAIL_MAX_PIXELS', 50_000_000)
+
+
+def check_pixels(image):
+    """Raise ``DecompressionBombError`` if the opened, not yet decoded ``image`` is too large."""
+    width, height = image.size
+    if width * height > max_pixels():
+        raise Image.DecompressionBombError(f'{width}x{height} pixels exceed the limit of {max_pixels()}.')
+
+
+def invalid_picture(handle):
+    """
+    Return why the file in ``handle`` is not an acceptable picture, or None.
+
+    It must be a ``PICTURE_FORMATS`` raster image that passes Pillow's
+    ``verify()`` and is not too large; only the header is checked for size,
+    nothing is decoded.
+    """
+    try:
+        with Image.open(handle) as image:
+            if image.format not in PICTURE_FORMATS:
+                return f"Pictures must be {', '.join(sorted(PICTURE_FORMATS))} images."
+            check_pixels(image)
+            image.verify()
+    except Image.DecompressionBombError as exc:
+        return str(exc)
+    except UnidentifiedImageError:
+        return 'The file is not an image.'
+    except Exception:
+        return 'The image is damaged.'
+    finally:
+        handle.seek(0)
+    return None
+
+
+def thumbnail_name(name, size):
+    """Return the storage name of the ``size`` variant of picture ``name``."""
+    return f'{os.path.splitext(name)[0]}_{size}.webp'
+
+
+def generate(name, storage=None):
+    """
+    Create the missing variants of picture ``name``; return their names.
+
+    ``storage`` must provide ``save_as`` (see ``todo.storage.ContentHashStorage``).
+    """
+    storage = storage or default_storage
+    missing = {size: thumbnail_name(name, size) for size in THUMBNAIL_SIZES if not storage.exists(thumbnail_name(name, size))}
+    if missing:
+        with storage.open(name, 'rb') as handle, Image.open(handle) as image:
+            check_pixels(image)
+            image = ImageOps.exif_transpose(image)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+            for size, variant in missing.items():
+                edge = THUMBNAIL_SIZES[size]
+                thumbnail = image.copy()
+                thumbnail.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                buffer = BytesIO()
+                thumbnail.save(buffer, 'WEBP', quality=80, method=4)
+                storage.save_as(variant, ContentFile(buffer.getvalue()))
+    return [thumbnail_name(name, size) for size in THUMBNAIL_SIZES]
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def thumbnail_pool():
+    """Return the shared executor thumbnails are generated in (``TODO_THUMBNAIL_POOL_SIZE`` threads)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'TODO_THUMBNAIL_POOL_SIZE', 2),
+                thread_name_prefix='thumbnails',
+            )
+        return _pool
+
+
+def log_failure(future):
+    """Log a failed background generation."""
+    if future.exception() is not None:
+        logger.error("Thumbnail generation failed", exc_info=future.exception())
+
+
+def schedule(name):
+    """Generate the variants of picture ``name`` in the background; return the future."""
+    future = thumbnail_pool().submit(generate, name)
+    future.add_done_callback(log_failure)
+    return future
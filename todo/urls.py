@@ -1,12 +1,13 @@
 """URL configuration for the todo app."""
 
 from django.urls import include, path
-from rest_framework.routers import DefaultRouter
-
-from .views import (EmployeeViewSet, SnippetHighlightView, SnippetViewSet, TaskViewSet, api_root)
+from .async_views import AsyncEmployeeView, AsyncSnippetHighlightView, AsyncSnippetView, AsyncTaskView
+from .routers import BulkRouter
+from .views import (EmployeeViewSet, MetricsView, SearchView, SnippetHighlightView, SnippetViewSet, TaskViewSet, api_root,
+                    snippet_style_css)
 
 # Set up DRF router
-router = DefaultRouter()
+router = BulkRouter()
 router.register(r'employees', EmployeeViewSet)
 router.register(r'tasks', TaskViewSet)
 router.register(r'snippets', SnippetViewSet)
@@ -14,6 +15,17 @@ router.register(r'snippets', SnippetViewSet)
 urlpatterns = [
     path('', api_root, name='api-root'),  # API root endpoint
     path('snippets/<int:pk>/highlight/', SnippetHighlightView.as_view(), name='snippet-highlight'),
+    path('snippets/styles/<slug:style>.css', snippet_style_css, name='snippet-style-css'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+    # Async (ASGI-native) read endpoints
+    path('async/employees/', AsyncEmployeeView.as_view(), name='async-employee-list'),
+    path('async/employees/<int:pk>/', AsyncEmployeeView.as_view(), name='async-employee-detail'),
+    path('async/tasks/', AsyncTaskView.as_view(), name='async-task-list'),
+    path('async/tasks/<int:pk>/', AsyncTaskView.as_view(), name='async-task-detail'),
+    path('async/snippets/', AsyncSnippetView.as_view(), name='async-snippet-list'),
+    path('async/snippets/<int:pk>/', AsyncSnippetView.as_view(), name='async-snippet-detail'),
+    path('async/snippets/<int:pk>/highlight/', AsyncSnippetHighlightView.as_view(), name='async-snippet-highlight'),
 ]
 
 # Include router-generated URLs
@@ -5,16 +5,31 @@ Follows company best practices for Django backend development.
 
 import logging
 
+import pygments
+from django.db.models import Sum
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, render
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.cache import cache_control
 from rest_framework import permissions, viewsets
-from rest_framework.decorators import api_view
+from rest_framework.decorators import action, api_view
 from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
-from rest_framework.renderers import StaticHTMLRenderer
+from rest_framework.renderers import BaseRenderer, StaticHTMLRenderer
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.views import APIView
 
-from .models import Employee, Snippet, Task
+from . import catalog, compression, files, highlighting, metrics, search, thumbnails, throttling
+from .bulk import BulkModelMixin
+from .conditional import ConditionalGetMixin, make_validators, not_modified_response, set_validators
+from .exports import EMPLOYEE_EXPORT_FIELDS, TASK_EXPORT_FIELDS, ExportMixin
+from .filters import TaskFilter
+from .models import TASK_STATUS_COUNTER_FIELDS, Employee, Snippet, Task
+from .pagination import SnippetPagination, TaskPagination
+from .query_planning import QueryPlanMixin
+from .readers import EmployeeReader, FastReadMixin, SnippetReader, TaskReader, url_template
+from .replicas import ReplicaReadMixin
 from .serializers import EmployeeSerializer, SnippetSerializer, TaskSerializer
 
 logger = logging.getLogger(__name__)
@@ -38,38 +53,264 @@ def api_root(request, format=None):
         'snippets': reverse('snippet-list', request=request, format=format),
     })
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ReplicaReadMixin, ExportMixin, FastReadMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """ViewSet for managing Employee objects."""
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
     permission_classes = [IsAdminOrReadOnly]
     filterset_fields = ['department', 'birth_date', 'name', 'email']
+    export_fields = EMPLOYEE_EXPORT_FIELDS
+    reader_class = EmployeeReader
 
-class TaskViewSet(viewsets.ModelViewSet):
-    """ViewSet for managing Task objects."""
+    @action(detail=True, methods=['get', 'put'])
+    def picture(self, request, pk=None):
+        """
+        Download (GET, ``?size=small|medium`` for a thumbnail) or stream-upload (PUT) the profile picture.
+
+        A thumbnail that is not generated yet is scheduled and the full picture served meanwhile.
+        Files that are not images, or too large to thumbnail, are refused with 400.
+        """
+        employee = self.get_object()
+        if request.method == 'PUT':
+            upload, error = files.receive_upload(request)
+            if error:
+                return error
+            with upload:
+                invalid = thumbnails.invalid_picture(upload)
+                if invalid:
+                    return Response({'error': invalid}, status=400)
+                employee.profile_picture.save(upload.name, upload, save=False)
+            employee.save(update_fields=['profile_picture'])
+            return Response(self.get_serializer(employee).data)
+        if not employee.profile_picture:
+            return Response({'error': 'Employee has no profile picture.'}, status=404)
+        size = request.query_params.get('size')
+        if size is not None and size not in thumbnails.THUMBNAIL_SIZES:
+            return Response({'error': f"size must be one of {', '.join(thumbnails.THUMBNAIL_SIZES)}."}, status=400)
+        storage, name = employee.profile_picture.storage, employee.profile_picture.name
+        if size:
+            variant = thumbnails.thumbnail_name(name, size)
+            if storage.exists(variant):
+                name = variant
+            else:
+                with storage.open(name, 'rb') as handle:
+                    invalid = thumbnails.invalid_picture(handle)
+                if invalid:
+                    return Response({'error': invalid}, status=400)
+                thumbnails.schedule(name)
+        return files.file_response(request, storage, name)
+
+    @action(detail=False)
+    def stats(self, request):
+        """
+        Task counts by status for the filtered employees, read from their counters.
+
+        Returns the totals and a page of per-employee counts.
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        totals = queryset.aggregate(**{status: Sum(field) for status, field in TASK_STATUS_COUNTER_FIELDS.items()})
+        page = self.paginate_queryset(queryset.values('id', 'name', *TASK_STATUS_COUNTER_FIELDS.values()))
+        employee_url = url_template('employee-detail', 'pk', request)
+        results = [
+            {
+                'id': row['id'],
+                'url': employee_url(row['id']),
+                'name': row['name'],
+                **{status: row[field] for status, field in TASK_STATUS_COUNTER_FIELDS.items()},
+            }
+            for row in page
+        ]
+        response = self.get_paginated_response(results)
+        response.data['totals'] = {status: total or 0 for status, total in totals.items()}
+        return response
+
+class TaskViewSet(ReplicaReadMixin, BulkModelMixin, ExportMixin, ConditionalGetMixin, FastReadMixin, QueryPlanMixin, viewsets.ModelViewSet):
+    """ViewSet for managing Task objects, with list-shaped bulk create/update/delete."""
     queryset = Task.objects.all()
     serializer_class = TaskSerializer
+    pagination_class = TaskPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filterset_fields = ['status', 'employee', 'due_date', 'title']
+    filterset_class = TaskFilter
+    export_fields = TASK_EXPORT_FIELDS
+    last_modified_field = 'updated_at'
+    reader_class = TaskReader
 
-class SnippetViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['get', 'put'])
+    def attachment(self, request, pk=None):
+        """Download (GET, with Range support) or stream-upload (PUT) the task's attachment."""
+        task = self.get_object()
+        if request.method == 'PUT':
+            upload, error = files.receive_upload(request)
+            if error:
+                return error
+            with upload:
+                task.attachment.save(upload.name, upload, save=False)
+            task.attachment_name = upload.name
+            task.save(update_fields=['attachment', 'attachment_name', 'updated_at'])
+            return Response(self.get_serializer(task).data)
+        if not task.attachment:
+            return Response({'error': 'Task has no attachment.'}, status=404)
+        return files.file_response(request, task.attachment.storage, task.attachment.name, filename=task.attachment_name)
+
+class SnippetViewSet(ReplicaReadMixin, ConditionalGetMixin, FastReadMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """ViewSet for managing Snippet objects."""
     queryset = Snippet.objects.all()
     serializer_class = SnippetSerializer
+    pagination_class = SnippetPagination
     permission_classes = [IsAuthenticatedOrReadOnly]
     filterset_fields = ['task', 'language', 'created']
+    last_modified_field = 'updated'
+    reader_class = SnippetReader
+
+HIGHLIGHT_MODES = ('full', 'body')
+
+def style_link(style):
+    """``Link`` header value pointing body-only HTML at its stylesheet."""
+    url = reverse('snippet-style-css', kwargs={'style': style})
+    return f'<{url}?v={pygments.__version__}>; rel="stylesheet"; type="text/css"'
+
+def highlight_response(request, html, key, headers=None):
+    """
+    Return highlighted ``html`` (cached under ``key``) as a response.
+
+    Clients accepting gzip or Brotli get the compressed bytes cached next to
+    the rendering instead of having the middleware compress it per request.
+    """
+    encoding = compression.choose_encoding(request)
+    if encoding is None or len(html) < compression.min_bytes():
+        return Response(html, headers=headers)
+    response = HttpResponse(
+        highlighting.encoded_html(key, html, encoding), content_type='text/html; charset=utf-8', headers=headers,
+    )
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+@cache_control(public=True, max_age=365 * 24 * 3600, immutable=True)
+def snippet_style_css(request, style):
+    """
+    Serve the stylesheet for body-only highlighted HTML in ``style``.
+
+    It only changes with the Pygments version, which the ``v`` query
+    parameter in ``style_link`` carries, so it is cached for a year.
+    """
+    if style not in dict(catalog.style_choices()):
+        raise Http404(f"Unknown style {style!r}.")
+    return HttpResponse(highlighting.style_css(style), content_type='text/css; charset=utf-8')
 
 class SnippetHighlightView(APIView):
-    """API view for returning highlighted HTML of a snippet."""
+    """
+    API view for returning highlighted HTML of a snippet.
+
+    ``?mode=body`` returns the HTML fragment without the inline stylesheet and
+    links the shared per-style stylesheet in a ``Link`` header. Snippets left
+    to the render worker answer 503 with ``Retry-After`` until it stores them.
+    """
     renderer_classes = [StaticHTMLRenderer]
     def get(self, request, pk, format=None):
-        """Return highlighted HTML for a snippet, or 404 if not found."""
+        """Return highlighted HTML for a snippet, 304 if unchanged, or 404 if not found."""
+        mode = request.query_params.get('mode', 'full')
+        if mode not in HIGHLIGHT_MODES:
+            return Response({'error': f"mode must be one of {', '.join(HIGHLIGHT_MODES)}."}, status=400)
+        updated = Snippet.objects.filter(pk=pk).values_list('updated', flat=True).first()
+        if updated is None:
+            logger.warning(f"Snippet with pk={pk} not found")
+            return Response({'error': 'Snippet not found.'}, status=404)
+        etag, last_modified = make_validators(request, updated)
+        response = not_modified_response(request, etag, last_modified)
+        if response is not None:
+            return response
         try:
             snippet = Snippet.objects.get(pk=pk)
-            return Response(snippet.highlighted)
         except Snippet.DoesNotExist:
             logger.warning(f"Snippet with pk={pk} not found")
             return Response({'error': 'Snippet not found.'}, status=404)
+        with throttling.render_slot():
+            html = snippet.highlighted_fragment if mode == 'body' else snippet.highlighted
+        if html is None:
+            return Response(
+                {'error': 'The snippet is being highlighted; retry later.'}, status=503,
+                headers={'Retry-After': str(highlighting.pending_retry_after())},
+            )
+        throttling.charge(request, throttling.code_cost(len(snippet.code)))
+        if mode == 'body':
+            response = highlight_response(
+                request, html, f'{snippet.render_key}:body', headers={'Link': style_link(snippet.style)},
+            )
+        else:
+            response = highlight_response(request, html, snippet.render_key)
+        set_validators(response, etag, last_modified)
+        if response.has_header('Content-Encoding'):
+            compression.mark_encoded(response, response['Content-Encoding'])
+        return response
+
+class SearchView(APIView):
+    """
+    Full-text search over tasks and snippets.
+
+    ``?q=`` holds whitespace-separated terms that must all match, ``term*``
+    matching as a prefix. ``?type=task`` or ``?type=snippet`` restricts the
+    kind; ``limit``/``offset`` page through the ranked hits. Both are
+    clamped, ``offset`` to ``max_offset``, since every search ranks
+    ``offset + limit`` hits.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    default_limit = 20
+    max_limit = 100
+    max_offset = 1000
+
+    def get(self, request, format=None):
+        """Return ranked hits with highlighted matches."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The q parameter is required.'}, status=400)
+        kind = request.query_params.get('type')
+        if kind is not None and kind not in search.KINDS:
+            return Response({'error': f"type must be one of {', '.join(search.KINDS)}."}, status=400)
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+            offset = min(int(request.query_params.get('offset', 0)), self.max_offset)
+            if limit < 1 or offset < 0:
+                raise ValueError
+        except ValueError:
+            return Response({'error': 'limit and offset must be non-negative integers.'}, status=400)
+        count, hits = search.get_backend().search(query, (kind,) if kind else search.KINDS, limit, offset)
+        urls = {
+            'task': url_template('task-detail', 'pk', request),
+            'snippet': url_template('snippet-detail', 'pk', request),
+        }
+        for hit in hits:
+            hit['url'] = urls[hit['type']](hit['id'])
+            if 'task_id' in hit:
+                hit['task'] = urls['task'](hit.pop('task_id'))
+        url = request.build_absolute_uri()
+        previous_url = None
+        if offset:
+            previous_url = replace_query_param(url, 'offset', max(offset - limit, 0)) if offset > limit else remove_query_param(url, 'offset')
+        return Response({
+            'count': count,
+            'next': replace_query_param(url, 'offset', offset + limit) if offset + limit < min(count, self.max_offset + 1) else None,
+            'previous': previous_url,
+            'results': hits,
+        })
+
+class PrometheusRenderer(BaseRenderer):
+    """Renders ``metrics.expose()`` output as-is."""
+    media_type = 'text/plain'
+    format = 'prometheus'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data.encode('utf-8') if isinstance(data, str) else data
+
+class MetricsView(APIView):
+    """Request metrics of this process in the Prometheus text format (staff only)."""
+    permission_classes = [IsAdminUser]
+    renderer_classes = [PrometheusRenderer]
+
+    def get(self, request, format=None):
+        """Return every registered histogram."""
+        return Response(metrics.expose())
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     """
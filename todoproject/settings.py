@@ -51,6 +51,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so its timings cover the whole stack (see todo/metrics.py).
+    'todo.metrics.MetricsMiddleware',
+    # Outside everything else, so it sees final bodies (see todo/compression.py).
+    'todo.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,9 +91,76 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open between requests, checking them before reuse.
+        # Under ASGI set DATABASE_CONN_MAX_AGE=0: each request runs ORM calls
+        # in worker threads that would otherwise each hold a connection.
+        'CONN_MAX_AGE': int(os.getenv('DATABASE_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # WAL lets readers proceed while a write is in progress; NORMAL
+            # sync is durable across application crashes in WAL mode.
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA temp_store=MEMORY;'
+                'PRAGMA cache_size=-20000;'
+                'PRAGMA mmap_size=134217728'
+            ),
+            # Take the write lock when a transaction starts, so concurrent
+            # writers wait (up to `timeout` seconds) instead of failing with
+            # "database is locked" when upgrading a read lock.
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
+# Read replicas, as comma-separated SQLite paths (e.g. LiteFS or Litestream
+# copies of the primary). Safe API requests read from them; see todo.replicas.
+for number, replica in enumerate(filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+TODO_READ_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+# Seconds a client reads from the primary after writing (read-your-writes).
+TODO_REPLICA_PIN_SECONDS = int(os.getenv('TODO_REPLICA_PIN_SECONDS', '5'))
+
+DATABASE_ROUTERS = ['todo.replicas.ReplicaRouter']
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Rendered snippet HTML, keyed on a hash of the snippet content.
+    # LocMemCache evicts least recently used entries past MAX_ENTRIES.
+    'highlight': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'snippet-highlight',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('SNIPPET_HIGHLIGHT_CACHE_SIZE', '5000')),
+        },
+    },
+}
+
+SNIPPET_HIGHLIGHT_CACHE = 'highlight'
+
+# Snippets longer than this are rendered by `manage.py render_snippets --worker`
+# rather than on the request path; until then highlight requests answer 503.
+SNIPPET_INLINE_RENDER_MAX_CHARS = int(os.getenv('SNIPPET_INLINE_RENDER_MAX_CHARS', '20000'))
+# Retry-After, in seconds, of highlight requests for snippets still pending.
+SNIPPET_PENDING_RETRY_AFTER = int(os.getenv('SNIPPET_PENDING_RETRY_AFTER', '5'))
+
+# Executor the async highlight view renders in ('thread' or 'process').
+SNIPPET_RENDER_POOL_KIND = os.getenv('SNIPPET_RENDER_POOL_KIND', 'thread')
+SNIPPET_RENDER_POOL_SIZE = int(os.getenv('SNIPPET_RENDER_POOL_SIZE', '4'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -127,6 +198,59 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded files are stored under content-hash names, so duplicate uploads
+# share one file (see todo/storage.py).
+STORAGES = {
+    'default': {
+        'BACKEND': 'todo.storage.ContentHashStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Requests at least this slow are logged with their slowest SQL on the
+# `todo.metrics.slow` logger.
+TODO_SLOW_REQUEST_SECONDS = float(os.getenv('TODO_SLOW_REQUEST_SECONDS', '1.0'))
+
+# Largest accepted attachment or profile picture, in bytes.
+TODO_MAX_UPLOAD_BYTES = int(os.getenv('TODO_MAX_UPLOAD_BYTES', str(20 * 1024 * 1024)))
+
+# Threads generating profile picture thumbnails in the background.
+TODO_THUMBNAIL_POOL_SIZE = int(os.getenv('TODO_THUMBNAIL_POOL_SIZE', '2'))
+
+# Largest profile picture, in pixels, accepted and thumbnailed; larger ones
+# (likely decompression bombs) are refused before being decoded.
+TODO_THUMBNAIL_MAX_PIXELS = int(os.getenv('TODO_THUMBNAIL_MAX_PIXELS', '50000000'))
+
+# Seconds verified Basic credentials, tokens and their users stay cached
+# (see todo/authentication.py); 0 checks them on every request.
+TODO_AUTH_CACHE_SECONDS = int(os.getenv('TODO_AUTH_CACHE_SECONDS', '60'))
+# Cache alias holding them. Revocations reach every worker only if it is a
+# shared backend (Redis, Memcached, database); with the per-process LocMemCache
+# only password hashing is skipped and each request still reads the user.
+TODO_AUTH_CACHE = 'default'
+
+# Token buckets per user and per anonymous client address: (burst, tokens
+# per second). Requests take one token; highlighting takes one more per
+# TODO_THROTTLE_CHARS_PER_TOKEN characters of code (see todo/throttling.py).
+TODO_THROTTLE_RATES = {
+    'anon': (float(os.getenv('TODO_THROTTLE_ANON_BURST', '60')), float(os.getenv('TODO_THROTTLE_ANON_RATE', '1'))),
+    'user': (float(os.getenv('TODO_THROTTLE_USER_BURST', '300')), float(os.getenv('TODO_THROTTLE_USER_RATE', '5'))),
+}
+TODO_THROTTLE_CHARS_PER_TOKEN = 5000
+# Cache alias holding the buckets. LocMemCache keeps them per process, so the
+# limits apply per worker; use a shared cache to enforce them globally.
+TODO_THROTTLE_CACHE = 'default'
+
+# Renders in progress or queued per process before highlight requests are
+# refused with 503 and Retry-After.
+TODO_RENDER_QUEUE_LIMIT = int(os.getenv('TODO_RENDER_QUEUE_LIMIT', '16'))
+TODO_RENDER_RETRY_AFTER = 1
+
+# Text responses shorter than this are not compressed.
+TODO_COMPRESS_MIN_BYTES = int(os.getenv('TODO_COMPRESS_MIN_BYTES', '512'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -135,8 +259,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
-        'rest_framework.authentication.TokenAuthentication',
+        'todo.authentication.CachedBasicAuthentication',
+        'todo.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -144,4 +268,14 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    'DEFAULT_THROTTLE_CLASSES': ['todo.throttling.TokenBucketThrottle'],
+    'DEFAULT_RENDERER_CLASSES': [
+        'todo.fastjson.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'todo.fastjson.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }